@@ -9,12 +9,72 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 import logging
+from typing import Optional, Tuple
+
+from django.core.cache import cache
 
 from backend.apps.role.models import AnonymousRole, Role, RoleUser
 
 logger = logging.getLogger("app")
 ROLE_SESSION_KEY = "_auth_role_id"
 
+# 用户角色认证结果缓存, 角色数据或成员变更时通过递增角色版本号失效
+ROLE_CACHE_TIMEOUT = 5 * 60
+ROLE_VERSION_KEY_PREFIX = "bk_iam:role_auth:version"
+ROLE_CACHE_KEY_PREFIX = "bk_iam:role_auth:role"
+
+
+def _version_key(role_id: int) -> str:
+    return f"{ROLE_VERSION_KEY_PREFIX}:{role_id}"
+
+
+def _role_key(role_id: int, username: str) -> str:
+    return f"{ROLE_CACHE_KEY_PREFIX}:{role_id}:{username}"
+
+
+def _get_cached_role(username: str, role_id: int) -> Tuple[Optional[Role], Optional[int]]:
+    """
+    返回缓存的角色快照与当前的角色版本号, 查询缓存出错时版本号为None
+    """
+    version_key, role_key = _version_key(role_id), _role_key(role_id, username)
+    try:
+        # 版本号与角色快照一次查询
+        data = cache.get_many([version_key, role_key])
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("get role auth cache error")
+        return None, None
+
+    current_version = data.get(version_key, 0)
+    if role_key not in data:
+        return None, current_version
+
+    version, role = data[role_key]
+    if version != current_version:
+        return None, current_version
+    return role, current_version
+
+
+def _set_cached_role(username: str, role_id: int, role: Role, version: int):
+    """
+    version必须是查询DB前读取的版本号, 查询DB期间角色变更时缓存的快照会因版本号不一致而失效
+    """
+    try:
+        cache.set(_role_key(role_id, username), (version, role), ROLE_CACHE_TIMEOUT)
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("set role auth cache error")
+
+
+def invalidate_role(role_id: int):
+    """
+    角色数据或成员变更后调用, 该角色所有用户的认证缓存失效
+    """
+    try:
+        version_key = _version_key(role_id)
+        cache.get_or_set(version_key, 0, None)
+        cache.incr(version_key)
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("invalidate role auth cache error")
+
 
 def authenticate(request=None, role_id=0):
     """authenticate user's current role"""
@@ -25,9 +85,20 @@ def authenticate(request=None, role_id=0):
     if not user:
         return AnonymousRole()
 
-    # 2. 用户的角色不存在, 返回staff
-    if role_id == 0 or not RoleUser.objects.user_role_exists(request.user.username, role_id):
+    if role_id == 0:
+        return AnonymousRole()
+
+    # 2. 用户与角色关系已认证过, 直接使用缓存
+    role, version = _get_cached_role(user.username, role_id)
+    if role is not None:
+        return role
+
+    # 3. 用户的角色不存在, 返回staff
+    if not RoleUser.objects.user_role_exists(user.username, role_id):
         return AnonymousRole()
 
-    # 3. 对于用户与角色关系认证通过的，返回对应的分级管理员(超级管理员和系统管理员是两类特殊的分级管理员)
-    return Role.objects.get(id=role_id)
+    # 4. 对于用户与角色关系认证通过的，返回对应的分级管理员(超级管理员和系统管理员是两类特殊的分级管理员)
+    role = Role.objects.get(id=role_id)
+    if version is not None:
+        _set_cached_role(user.username, role_id, role, version)
+    return role
@@ -11,10 +11,15 @@ specific language governing permissions and limitations under the License.
 import logging
 
 from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from backend.apps.role.models import Role, RoleUser
 from backend.biz.org_sync.syncer import Syncer
 
+from .role_auth import invalidate_role
+
 logger = logging.getLogger("app")
 
 
@@ -25,3 +30,18 @@ def sync_user(sender, user, **kwargs):
     except Exception:  # pylint: disable=broad-except
         # 异常仅仅记录日志，不报错，不影响登录逻辑
         logger.exception("sync single user exception when user logged in")
+
+
+@receiver(post_save, sender=Role, dispatch_uid="backend.account.invalidate_role_on_save")
+@receiver(post_delete, sender=Role, dispatch_uid="backend.account.invalidate_role_on_delete")
+def invalidate_role_auth(sender, instance, **kwargs):
+    # 事务提交后再失效, 避免并发请求在提交前重新缓存旧数据
+    role_id = instance.id
+    transaction.on_commit(lambda: invalidate_role(role_id))
+
+
+@receiver(post_delete, sender=RoleUser, dispatch_uid="backend.account.invalidate_role_user_on_delete")
+def invalidate_role_user_auth(sender, instance, **kwargs):
+    # Note: 新增成员不影响已缓存的认证结果, 只需要处理删除
+    role_id = instance.role_id
+    transaction.on_commit(lambda: invalidate_role(role_id))
@@ -9,7 +9,9 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 import base64
+import hashlib
 import logging
+import time
 
 import jwt
 from django.conf import settings
@@ -17,12 +19,19 @@ from django.contrib.auth import get_user_model
 from rest_framework.authentication import BaseAuthentication
 
 from backend.component import esb
-from backend.util.cache import region
+from backend.util.cache import ExpiringLRUCache, region
 
 from .constants import BKNonEntityUser
 
 logger = logging.getLogger("app")
 
+# 已校验的JWT: token摘要 -> (username, app_code), 过期时间不超过JWT本身的exp
+JWT_CACHE_TIMEOUT = 60
+_verified_jwt_cache = ExpiringLRUCache(max_size=10000, default_timeout=JWT_CACHE_TIMEOUT)
+# 用户字段: username -> (db, 字段名列表, 字段值列表), 每次请求据此构造新的user对象, 不在请求/线程间共享ORM实例
+USER_CACHE_TIMEOUT = 5 * 60
+_user_cache = ExpiringLRUCache(max_size=10000, default_timeout=USER_CACHE_TIMEOUT)
+
 
 class ESBAuthentication(BaseAuthentication):
     """
@@ -36,12 +45,19 @@ class ESBAuthentication(BaseAuthentication):
         if not credentials:
             return None
 
-        verified, payload = self.verify_credentials(credentials=credentials)
-        if not verified:
-            return None
+        # 同一JWT会被频繁使用, 缓存校验结果, 避免每次都进行解密验签
+        cache_key = self._get_jwt_cache_key(credentials)
+        cached = _verified_jwt_cache.get(cache_key)
+        if cached is not None:
+            username, app_code = cached
+        else:
+            verified, payload = self.verify_credentials(credentials=credentials)
+            if not verified:
+                return None
 
-        username = self._get_username_from_jwt_payload(payload)
-        app_code = self._get_app_code_from_jwt_payload(payload)
+            username = self._get_username_from_jwt_payload(payload)
+            app_code = self._get_app_code_from_jwt_payload(payload)
+            self._cache_verified_jwt(cache_key, payload, username, app_code)
 
         request.bk_app_code = app_code  # 获取到调用 app_code
 
@@ -68,6 +84,24 @@ class ESBAuthentication(BaseAuthentication):
 
         return True, jwt_payload
 
+    def _get_jwt_cache_key(self, credentials):
+        content = f"{credentials['from']}:{credentials['jwt']}"
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _cache_verified_jwt(self, cache_key, payload, username, app_code):
+        timeout = JWT_CACHE_TIMEOUT
+        exp = payload.get("exp")
+        if exp is not None:
+            # 缓存时间不能超过JWT的有效期
+            try:
+                timeout = min(timeout, float(exp) - time.time())
+            except (TypeError, ValueError):
+                return
+        if timeout <= 0:
+            return
+
+        _verified_jwt_cache.set(cache_key, (username, app_code), timeout)
+
     def _decode_jwt(self, content, public_key):
         try:
             return jwt.decode(content, public_key, issuer="APIGW")
@@ -104,9 +138,16 @@ class ESBAuthentication(BaseAuthentication):
 
     def _get_or_create_user(self, username):
         user_model = get_user_model()
+        cached = _user_cache.get(username)
+        if cached is not None:
+            db, field_names, values = cached
+            return user_model.from_db(db, field_names, values)
+
         user, _ = user_model.objects.get_or_create(
             username=username, defaults={"is_active": True, "is_staff": False, "is_superuser": False}
         )
+        field_names = [f.attname for f in user_model._meta.concrete_fields]
+        _user_cache.set(username, (user._state.db, field_names, tuple(getattr(user, name) for name in field_names)))
         return user
 
     def _get_apigw_public_key(self):
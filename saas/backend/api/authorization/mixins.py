@@ -8,26 +8,24 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-import logging
-from typing import List
+from typing import Any, Dict, List, Set
 
 from rest_framework import exceptions
 from rest_framework.response import Response
 
 from backend.api.constants import ALLOW_ANY
-from backend.biz.org_sync.syncer import Syncer
+from backend.api.mixins import SubjectUserSyncMixin
 from backend.biz.policy import PolicyBean, PolicyBeanList, PolicyOperationBiz, PolicyQueryBiz
 from backend.biz.role import RoleAuthorizationScopeChecker, RoleBiz
-from backend.common.error_codes import APIException, error_codes
+from backend.common.error_codes import APIException
+from backend.metrics.span import operation_span
 from backend.service.constants import ADMIN_USER, SubjectType
 from backend.service.models import Subject
-from backend.util.cache import region
+from backend.util.cache import object_region
 
 from .constants import AllowListMatchOperationEnum, AllowListObjectOperationSep, AuthorizationAPIEnum, OperateEnum
 from .models import AuthAPIAllowListConfig
 
-logger = logging.getLogger("app")
-
 
 # TODO: 目前其他OpenAPI暂时没有其他多种匹配规则的需求，后续需要则抽取到api下共用
 class AllowItem:
@@ -61,44 +59,90 @@ class AllowItem:
         return False
 
 
+class AllowListMatcher:
+    """
+    编译后的白名单匹配器, 与逐个AllowItem匹配的结果一致
+    - is_any: 存在任意匹配的规则
+    - exact: 等于匹配的object_id集合
+    - prefix_trie: 前缀匹配的前缀树, 节点中包含_PREFIX_END的表示存在以该节点结尾的前缀
+    """
+
+    _PREFIX_END = ""
+
+    def __init__(self, allow_items: List[AllowItem]):
+        self.is_any = False
+        self.exact: Set[str] = set()
+        self.prefix_trie: Dict[str, Any] = {}
+
+        for item in allow_items:
+            if item.object_id == ALLOW_ANY:
+                self.is_any = True
+            elif item.operation == AllowListMatchOperationEnum.EQ.value:
+                self.exact.add(item.object_id)
+            elif item.operation == AllowListMatchOperationEnum.STARTS_WITH.value:
+                self._add_prefix(item.object_id)
+
+    def _add_prefix(self, prefix: str):
+        node = self.prefix_trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[self._PREFIX_END] = True
+
+    def _match_prefix(self, object_id: str) -> bool:
+        node = self.prefix_trie
+        for char in object_id:
+            if self._PREFIX_END in node:
+                return True
+            if char not in node:
+                return False
+            node = node[char]
+
+        return self._PREFIX_END in node
+
+    def match(self, object_id: str) -> bool:
+        return self.is_any or object_id in self.exact or (bool(self.prefix_trie) and self._match_prefix(object_id))
+
+    def list_not_matched(self, object_ids: List[str]) -> List[str]:
+        """批量匹配, 返回不匹配的object_id"""
+        if self.is_any:
+            return []
+
+        return [object_id for object_id in object_ids if not self.match(object_id)]
+
+
 class AuthorizationAPIAllowListCheckMixin:
     """授权API相关白名单控制"""
 
-    @region.cache_on_arguments(expiration_time=60)  # 缓存一分钟
-    def _list_system_allow_list(self, api: str, system_id: str) -> List[AllowItem]:
-        """查询系统某类API的白名单"""
+    # Note: 缓存的是编译后的匹配器对象本身, 不会被修改, 无需序列化
+    @object_region.cache_on_arguments(expiration_time=60)  # 缓存一分钟
+    def _get_system_allow_list_matcher(self, api: str, system_id: str) -> AllowListMatcher:
+        """查询系统某类API的白名单, 并编译为匹配器"""
         allow_list = AuthAPIAllowListConfig.objects.filter(type=api, system_id=system_id)
-        return [AllowItem(object_id=i.object_id) for i in allow_list]
+        return AllowListMatcher([AllowItem(object_id=i.object_id) for i in allow_list])
 
     def _is_allowed(self, api: str, system_id: str, object_id: str) -> bool:
         """判断是否系统允许某个API"""
-        allow_list = self._list_system_allow_list(api, system_id)
-        for i in allow_list:
-            if i.match(object_id):
-                return True
-
-        return False
+        return self._get_system_allow_list_matcher(api, system_id).match(object_id)
 
     def verify_api(self, system_id: str, object_id: str, api: AuthorizationAPIEnum):
         """
         对授权API进行权限校验，判断该系统是否允许调用
         """
-        is_allowed = self._is_allowed(api, system_id, object_id)
-
-        if not is_allowed:
-            raise exceptions.PermissionDenied(
-                detail=f"{api} api don't support the [{object_id}] of system[{system_id}]"
-            )
+        self.verify_api_by_object_ids(system_id, [object_id], api)
 
     def verify_api_by_object_ids(self, system_id: str, object_ids: List[str], api: AuthorizationAPIEnum):
         """
         批量Object进行校验
         """
-        for object_id in object_ids:
-            self.verify_api(system_id, object_id, api)
+        not_matched_object_ids = self._get_system_allow_list_matcher(api, system_id).list_not_matched(object_ids)
 
+        if not_matched_object_ids:
+            raise exceptions.PermissionDenied(
+                detail=f"{api} api don't support the [{not_matched_object_ids[0]}] of system[{system_id}]"
+            )
 
-class AuthViewMixin:
+
+class AuthViewMixin(SubjectUserSyncMixin):
     """所有授权API的一些公共处理函数"""
 
     role_biz = RoleBiz()
@@ -115,35 +159,25 @@ class AuthViewMixin:
             # 原样返回，PolicyID=0，默认没有执行实际授权
             return policy_list.policies
 
-        # 检测被授权的用户是否存在，不存在则尝试同步
-        if subject.type == SubjectType.USER.value:
-            self._check_or_sync_user(subject.id)
+        with operation_span(operate, system_id):
+            # 检测被授权的用户是否存在，不存在则尝试同步
+            self.check_or_sync_users([subject])
 
-        # 特殊逻辑：校验授权用户组是否超过其分级管理员范围
-        if subject.type == SubjectType.GROUP.value and operate == OperateEnum.GRANT.value:
-            self._check_scope(subject, policy_list)
+            # 特殊逻辑：校验授权用户组是否超过其分级管理员范围
+            if subject.type == SubjectType.GROUP.value and operate == OperateEnum.GRANT.value:
+                self._check_scope(subject, policy_list)
 
-        policies = []
-        # 授权或回收
-        if operate == OperateEnum.GRANT.value:
-            action_ids = [p.action_id for p in policy_list.policies]
-            self.policy_operation_biz.alter(system_id, subject, policy_list.policies)
-            policies = self.policy_query_biz.list_by_subject(system_id, subject, action_ids)
-        elif operate == OperateEnum.REVOKE.value:
-            policies = self.policy_operation_biz.revoke(system_id, subject, policy_list.policies)
+            policies = []
+            # 授权或回收
+            if operate == OperateEnum.GRANT.value:
+                action_ids = [p.action_id for p in policy_list.policies]
+                self.policy_operation_biz.alter(system_id, subject, policy_list.policies)
+                policies = self.policy_query_biz.list_by_subject(system_id, subject, action_ids)
+            elif operate == OperateEnum.REVOKE.value:
+                policies = self.policy_operation_biz.revoke(system_id, subject, policy_list.policies)
 
         return policies
 
-    def _check_or_sync_user(self, username):
-        """
-        检测用户是否存在，不存在则同步用户
-        """
-        try:
-            Syncer().sync_single_user(username)
-        except Exception:  # pylint: disable=broad-except
-            logger.exception(f"[OpenAPI] authorize user[{username}] check error")
-            raise error_codes.VALIDATE_ERROR.format(f"user[{username}] not exists")
-
     def _check_scope(self, subject: Subject, policy_list: PolicyBeanList):
         """检查是否策略超过用户组对应分级管理员可授权的范围"""
         assert subject.type == SubjectType.GROUP.value
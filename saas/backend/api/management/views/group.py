@@ -28,7 +28,7 @@ from backend.api.management.serializers import (
     ManagementGroupMemberDeleteSLZ,
     ManagementGroupMemberSLZ,
 )
-from backend.api.mixins import ExceptionHandlerMixin
+from backend.api.mixins import ExceptionHandlerMixin, SubjectUserSyncMixin
 from backend.apps.group.audit import (
     GroupCreateAuditProvider,
     GroupDeleteAuditProvider,
@@ -200,7 +200,7 @@ class ManagementGroupViewSet(ExceptionHandlerMixin, GenericViewSet):
         return Response({})
 
 
-class ManagementGroupMemberViewSet(ExceptionHandlerMixin, GenericViewSet):
+class ManagementGroupMemberViewSet(SubjectUserSyncMixin, ExceptionHandlerMixin, GenericViewSet):
     """用户组成员"""
 
     authentication_classes = [ESBAuthentication]
@@ -261,6 +261,8 @@ class ManagementGroupMemberViewSet(ExceptionHandlerMixin, GenericViewSet):
         role = self.role_biz.get_role_by_group_id(group.id)
         self.group_check_biz.check_role_subject_scope(role, members)
         self.group_check_biz.check_member_count(group.id, len(members))
+        # 检测成员中的用户是否存在, 不存在的用户一次性同步
+        self.check_or_sync_users(members)
 
         # 添加成员
         self.biz.add_members(group.id, members, expired_at)
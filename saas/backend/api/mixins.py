@@ -9,6 +9,8 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 import json
+import logging
+from typing import List
 
 from django.utils import translation
 from rest_framework import exceptions
@@ -16,9 +18,14 @@ from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from rest_framework.views import set_rollback
 
+from backend.biz.org_sync.syncer import Syncer
 from backend.biz.system import SystemBiz
 from backend.common.constants import DjangoLanguageEnum
 from backend.common.error_codes import error_codes
+from backend.service.constants import SubjectType
+from backend.service.models import Subject
+
+logger = logging.getLogger("app")
 
 
 class SystemClientCheckMixin:
@@ -36,6 +43,25 @@ class SystemClientCheckMixin:
             )
 
 
+class SubjectUserSyncMixin:
+    def check_or_sync_users(self, subjects: List[Subject]):
+        """
+        批量检测subjects中的用户是否存在, 不存在的用户一次性同步(一次UserMgr查询与一次IAM后台调用)
+        """
+        usernames = [s.id for s in subjects if s.type == SubjectType.USER.value]
+        if not usernames:
+            return
+
+        try:
+            not_exists_usernames = Syncer().sync_users(usernames)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception(f"[OpenAPI] user[{','.join(usernames)}] check error")
+            raise error_codes.VALIDATE_ERROR.format(f"user[{','.join(usernames)}] not exists")
+
+        if not_exists_usernames:
+            raise error_codes.VALIDATE_ERROR.format(f"user[{','.join(not_exists_usernames)}] not exists")
+
+
 class ExceptionHandlerMixin:
     """
     open api 直接返回serializer的error
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from django.core.management.base import BaseCommand
+
+from backend.apps.policy.models import Policy
+from backend.apps.template.models import PermTemplatePolicyAuthorized
+from backend.service.constants import SubjectType
+from backend.service.group_policy_index import GroupPolicyIndexService
+
+
+class Command(BaseCommand):
+    help = "build group policy index for pre-application group recommendation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("-s", action="store", dest="system_id", help="only build the system", required=False)
+
+    def handle(self, *args, **options):
+        system_id = options.get("system_id")
+
+        group_systems = set()
+        for model in [Policy, PermTemplatePolicyAuthorized]:
+            qs = model.objects.filter(subject_type=SubjectType.GROUP.value)
+            if system_id:
+                qs = qs.filter(system_id=system_id)
+            group_systems.update(qs.values_list("subject_id", "system_id").distinct())
+
+        svc = GroupPolicyIndexService()
+        for group_id, _system_id in sorted(group_systems):
+            svc.rebuild(_system_id, int(group_id))
+
+        self.stdout.write(self.style.SUCCESS(f"build group policy index success, count: {len(group_systems)}"))
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.24 on 2026-10-19 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group', '0011_groupsaasattribute'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupPolicyIndex',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group_id', models.IntegerField(verbose_name='用户组ID')),
+                ('system_id', models.CharField(max_length=32, verbose_name='系统ID')),
+                ('action_id', models.CharField(max_length=64, verbose_name='操作ID')),
+                ('resource_type_id', models.CharField(default='', max_length=32, verbose_name='资源类型ID')),
+                ('path', models.TextField(default='', verbose_name='资源实例路径')),
+                ('path_hash', models.CharField(max_length=32, verbose_name='路径摘要')),
+                ('attribute', models.TextField(default='{}', verbose_name='属性条件')),
+            ],
+            options={
+                'verbose_name': '用户组策略索引',
+                'verbose_name_plural': '用户组策略索引',
+                'index_together': {('group_id', 'system_id'), ('system_id', 'action_id', 'path_hash')},
+            },
+        ),
+    ]
@@ -58,3 +58,23 @@ class GroupSaaSAttribute(TimestampedModel):
         verbose_name_plural = "用户组SaaS属性"
         # Note: 只允许用户组的某个属性的值最多只有一个，后续需要支持一个用户组的一个属性多个值，则去除唯一约束即可
         unique_together = ["group_id", "key"]
+
+
+class GroupPolicyIndex(models.Model):
+    """
+    用户组策略的倒排索引, 用于根据申请的资源反查有权限的用户组
+    每条记录表示用户组对某个操作在path前缀(和属性条件)下的资源有权限, path与attribute都为空表示任意资源
+    """
+
+    group_id = models.IntegerField("用户组ID")
+    system_id = models.CharField("系统ID", max_length=32)
+    action_id = models.CharField("操作ID", max_length=64)
+    resource_type_id = models.CharField("资源类型ID", max_length=32, default="")
+    path = models.TextField("资源实例路径", default="")
+    path_hash = models.CharField("路径摘要", max_length=32)
+    attribute = models.TextField("属性条件", default="{}")
+
+    class Meta:
+        verbose_name = "用户组策略索引"
+        verbose_name_plural = "用户组策略索引"
+        index_together = [["system_id", "action_id", "path_hash"], ["group_id", "system_id"]]
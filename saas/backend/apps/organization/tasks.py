@@ -24,6 +24,7 @@ from backend.biz.org_sync.iam_user import IAMBackendUserSyncService
 from backend.biz.org_sync.iam_user_department import IAMBackendUserDepartmentSyncService
 from backend.biz.org_sync.syncer import Syncer
 from backend.biz.org_sync.user import DBUserSyncService
+from backend.biz.org_sync.user_cache import known_user_cache
 from backend.biz.org_sync.user_leader import DBUserLeaderSyncService
 
 from .constants import SYNC_TASK_DEFAULT_EXECUTOR, SyncTaskLockKey, SyncTaskStatus, SyncType
@@ -104,6 +105,9 @@ def sync_organization(executor: str = SYNC_TASK_DEFAULT_EXECUTOR) -> int:
     SyncRecord.objects.filter(id=record.id).update(status=sync_status, updated_time=timezone.now())
     if sync_status == SyncTaskStatus.Failed.value:
         SyncErrorLog.objects.create_error_log(record.id, exception_msg, traceback_msg)
+    else:
+        # 全量同步后用户可能被删除，已存在用户的缓存需要失效
+        known_user_cache.invalidate()
 
     return record.id
 
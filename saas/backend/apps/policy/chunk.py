@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+策略资源的分块存储
+
+policy的resources中, 体积主要来自于每个condition下实例的path列表
+分块存储时, Policy表中只保存去掉path的resources骨架, path按hash分桶后保存到PolicyResourceChunk表中
+
+chunk key: {system_id}:{resource_type}|{condition_id}|{instance_type}|{bucket}/{bucket_count}
+
+- 同一个实例的path按path hash落到固定的桶中, 新增/删除少量path时只会影响所在的桶
+- 桶的数量为 ceil(path数量 / chunk_size) 向上取整到2的幂, 只有桶数量变化时该实例的所有桶才会重写
+"""
+import hashlib
+import math
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from backend.util.json import json_dumps
+
+CHUNK_KEY_SEP = "|"
+
+
+def _bucket_count(path_count: int, chunk_size: int) -> int:
+    if path_count <= chunk_size:
+        return 1
+    return 2 ** math.ceil(math.log2(math.ceil(path_count / chunk_size)))
+
+
+def _path_hash(path: List[Dict]) -> int:
+    return zlib.crc32(
+        "/".join("{},{},{}".format(node.get("system_id", ""), node["type"], node["id"]) for node in path).encode()
+    )
+
+
+def gen_chunk_key(related_resource_type: Dict, condition_id: str, instance_type: str, bucket: int, count: int) -> str:
+    return CHUNK_KEY_SEP.join(
+        [
+            "{}:{}".format(related_resource_type["system_id"], related_resource_type["type"]),
+            condition_id,
+            instance_type,
+            "{}/{}".format(bucket, count),
+        ]
+    )
+
+
+def digest_chunk(paths: List[List[Dict]]) -> str:
+    return hashlib.md5(json_dumps(paths).encode("utf-8")).hexdigest()
+
+
+def split_resources(resources: List[Dict], chunk_size: int) -> Tuple[List[Dict], Dict[str, List[List[Dict]]]]:
+    """
+    拆分resources为骨架与path分块
+    """
+    skeleton = []
+    chunks: Dict[str, List[List[Dict]]] = {}
+    for rt in resources:
+        conditions = []
+        for condition in rt["condition"]:
+            instances = []
+            for instance in condition["instances"]:
+                instances.append(dict(instance, path=[]))
+
+                count = _bucket_count(len(instance["path"]), chunk_size)
+                buckets: Dict[int, List[List[Dict]]] = defaultdict(list)
+                for path in instance["path"]:
+                    buckets[_path_hash(path) % count].append(path)
+
+                for bucket, paths in buckets.items():
+                    chunks[gen_chunk_key(rt, condition["id"], instance["type"], bucket, count)] = paths
+
+            conditions.append(dict(condition, instances=instances))
+        skeleton.append(dict(rt, condition=conditions))
+
+    return skeleton, chunks
+
+
+def assemble_resources(skeleton: List[Dict], chunks: Iterable[Tuple[str, List[List[Dict]]]]) -> List[Dict]:
+    """
+    使用骨架与path分块组装完整的resources
+    """
+    instance_dict = {}
+    for rt in skeleton:
+        rt_key = "{}:{}".format(rt["system_id"], rt["type"])
+        for condition in rt["condition"]:
+            for instance in condition["instances"]:
+                instance_dict[(rt_key, condition["id"], instance["type"])] = instance
+
+    # 按key排序, 保证同一份数据每次组装出的path顺序稳定
+    for key, paths in sorted(chunks, key=lambda c: c[0]):
+        rt_key, condition_id, instance_type, _ = key.split(CHUNK_KEY_SEP)
+        instance = instance_dict.get((rt_key, condition_id, instance_type))
+        if instance is not None:
+            instance["path"].extend(paths)
+
+    return skeleton
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from aenum import LowerStrEnum, auto, skip
+from django.utils.translation import gettext as _
+
+from backend.util.enum import ChoicesEnum
+
+
+class PolicyResourceStorageEnum(ChoicesEnum, LowerStrEnum):
+    """策略资源的存储方式"""
+
+    JSON = auto()
+    CHUNKED = auto()
+
+    _choices_labels = skip(((JSON, _("完整JSON")), (CHUNKED, _("分块存储"))))
+
+
+class PolicyChangeConcurrencyModeEnum(ChoicesEnum, LowerStrEnum):
+    """策略变更的并发控制方式"""
+
+    LOCK = auto()
+    OPTIMISTIC = auto()
+
+    _choices_labels = skip(((LOCK, _("分布式锁")), (OPTIMISTIC, _("乐观并发控制"))))
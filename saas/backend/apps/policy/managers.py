@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from collections import defaultdict
+from typing import List
+
+from django.db import models
+
+from .constants import PolicyResourceStorageEnum
+
+
+class PolicyQuerySet(models.QuerySet):
+    def delete(self):
+        """
+        删除策略时同时删除分块存储的资源
+        """
+        chunk_model = self.model._meta.apps.get_model("policy", "PolicyResourceChunk")
+        chunk_model.objects.filter(
+            policy_pk__in=self.filter(resource_storage=PolicyResourceStorageEnum.CHUNKED.value).values("id")
+        ).delete()
+        return super().delete()
+
+
+PolicyManager = models.Manager.from_queryset(PolicyQuerySet)
+
+
+class PolicyResourceChunkManager(models.Manager):
+    def prefetch_for_policies(self, policies: List):
+        """
+        一次查询预加载多个分块存储策略的资源分块
+        """
+        chunked_policies = [
+            p for p in policies if p.resource_storage == PolicyResourceStorageEnum.CHUNKED.value and p.id
+        ]
+        if not chunked_policies:
+            return
+
+        chunk_dict = defaultdict(list)
+        for chunk in self.filter(policy_pk__in=[p.id for p in chunked_policies]):
+            chunk_dict[chunk.policy_pk].append(chunk)
+
+        for p in chunked_policies:
+            p._prefetched_resource_chunks = chunk_dict[p.id]
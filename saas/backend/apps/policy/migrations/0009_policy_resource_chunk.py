@@ -0,0 +1,34 @@
+# Generated by Django 2.2.24 on 2026-10-19 08:40
+
+import backend.common.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policy', '0008_auto_20211103_1458'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='policy',
+            name='resource_storage',
+            field=models.CharField(choices=[('json', '完整JSON'), ('chunked', '分块存储')], default='json', max_length=16, verbose_name='资源策略存储方式'),
+        ),
+        migrations.CreateModel(
+            name='PolicyResourceChunk',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('policy_pk', models.BigIntegerField(verbose_name='策略表主键')),
+                ('key', models.CharField(max_length=255, verbose_name='分块标识')),
+                ('digest', models.CharField(max_length=32, verbose_name='分块内容摘要')),
+                ('content', backend.common.models.CompressedJSONField(verbose_name='分块内容')),
+            ],
+            options={
+                'verbose_name': '权限策略资源分块',
+                'verbose_name_plural': '权限策略资源分块',
+                'unique_together': {('policy_pk', 'key')},
+            },
+        ),
+    ]
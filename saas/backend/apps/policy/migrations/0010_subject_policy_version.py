@@ -0,0 +1,28 @@
+# Generated by Django 2.2.24 on 2026-10-19 08:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policy', '0009_policy_resource_chunk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectPolicyVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('system_id', models.CharField(max_length=32)),
+                ('subject_type', models.CharField(max_length=32)),
+                ('subject_id', models.CharField(max_length=64)),
+                ('version', models.BigIntegerField(default=0, verbose_name='版本号')),
+            ],
+            options={
+                'verbose_name': '权限策略版本',
+                'verbose_name_plural': '权限策略版本',
+                'unique_together': {('subject_id', 'subject_type', 'system_id')},
+            },
+        ),
+    ]
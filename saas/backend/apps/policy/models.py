@@ -12,9 +12,13 @@ import json
 
 from django.db import models
 
-from backend.common.models import BaseModel
+from backend.common.models import BaseModel, CompressedJSONField
 from backend.util.json import json_dumps
 
+from .chunk import assemble_resources
+from .constants import PolicyResourceStorageEnum
+from .managers import PolicyManager, PolicyResourceChunkManager
+
 
 class Policy(BaseModel):
     """
@@ -35,6 +39,14 @@ class Policy(BaseModel):
     # policy
     _resources = models.TextField("资源策略", db_column="resources")  # json
     policy_id = models.BigIntegerField("后端policy_id", default=0)
+    resource_storage = models.CharField(
+        "资源策略存储方式",
+        max_length=16,
+        choices=PolicyResourceStorageEnum.get_choices(),
+        default=PolicyResourceStorageEnum.JSON.value,
+    )
+
+    objects = PolicyManager()
 
     class Meta:
         verbose_name = "权限策略"
@@ -44,8 +56,53 @@ class Policy(BaseModel):
 
     @property
     def resources(self):
+        if self.resource_storage == PolicyResourceStorageEnum.CHUNKED.value:
+            return assemble_resources(json.loads(self._resources), [(c.key, c.content) for c in self.resource_chunks])
         return json.loads(self._resources)
 
     @resources.setter
     def resources(self, resources):
         self._resources = json_dumps(resources)
+
+    @property
+    def resource_chunks(self):
+        """
+        分块存储的资源, 批量查询时可以通过PolicyResourceChunk.objects.prefetch_for_policies预加载
+        """
+        if not hasattr(self, "_prefetched_resource_chunks"):
+            self._prefetched_resource_chunks = list(PolicyResourceChunk.objects.filter(policy_pk=self.id))
+        return self._prefetched_resource_chunks
+
+
+class PolicyResourceChunk(models.Model):
+    """
+    策略资源分块, 只有分块存储的策略才有数据
+    """
+
+    policy_pk = models.BigIntegerField("策略表主键")
+    key = models.CharField("分块标识", max_length=255)
+    digest = models.CharField("分块内容摘要", max_length=32)
+    content = CompressedJSONField("分块内容")
+
+    objects = PolicyResourceChunkManager()
+
+    class Meta:
+        verbose_name = "权限策略资源分块"
+        verbose_name_plural = "权限策略资源分块"
+        unique_together = ["policy_pk", "key"]
+
+
+class SubjectPolicyVersion(models.Model):
+    """
+    subject在系统下的策略集合版本号, 用于策略变更的乐观并发控制
+    """
+
+    system_id = models.CharField(max_length=32)
+    subject_type = models.CharField(max_length=32)
+    subject_id = models.CharField(max_length=64)
+    version = models.BigIntegerField("版本号", default=0)
+
+    class Meta:
+        verbose_name = "权限策略版本"
+        verbose_name_plural = "权限策略版本"
+        unique_together = ["subject_id", "subject_type", "system_id"]
@@ -12,7 +12,7 @@ from django.conf import settings
 from rest_framework import serializers
 
 from backend.apps.policy.models import Policy
-from backend.common.serializers import BaseAction
+from backend.common.serializers import ActionQuerySLZ, BaseAction
 from backend.common.time import PERMANENT_SECONDS
 from backend.util.uuid import gen_uuid
 
@@ -107,6 +107,30 @@ class PolicySLZ(serializers.Serializer):
     expired_display = serializers.CharField()
 
 
+class PolicyListQuerySLZ(ActionQuerySLZ):
+    summary = serializers.BooleanField(label="是否只返回策略摘要", required=False, default=False)
+
+
+class PolicyInstanceQuerySLZ(serializers.Serializer):
+    system_id = serializers.CharField(label="系统ID")
+    resource_system_id = serializers.CharField(label="资源类型系统ID")
+    resource_type = serializers.CharField(label="资源类型")
+    limit = serializers.IntegerField(label="分页Limit", min_value=1, max_value=1000, required=False, default=100)
+    offset = serializers.IntegerField(label="分页offset", min_value=0, required=False, default=0)
+
+
+class PolicyInstancePathSLZ(serializers.Serializer):
+    condition_id = serializers.CharField(label="条件id")
+    type = serializers.CharField(label="资源类型")
+    name = serializers.CharField(label="资源类型名称")
+    path = serializers.ListField(label="链路", child=ResourceSLZ(label="节点"))
+
+
+class PolicyInstancePageSLZ(serializers.Serializer):
+    count = serializers.IntegerField(label="实例路径总数")
+    results = serializers.ListField(label="实例路径", child=PolicyInstancePathSLZ(label="实例路径"))
+
+
 class PolicyModelSLZ(serializers.ModelSerializer):
     type = serializers.CharField(source="action_type", read_only=True)
     id = serializers.CharField(source="action_id", read_only=True)
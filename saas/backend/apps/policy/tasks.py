@@ -13,6 +13,8 @@ import logging
 
 from aenum import LowerStrEnum, auto
 from celery import task
+from django.conf import settings
+from django.core.cache import cache
 
 from backend.api.authorization.constants import AuthorizationAPIEnum
 from backend.api.authorization.models import AuthAPIAllowListConfig
@@ -20,8 +22,10 @@ from backend.apps.approval.models import ActionProcessRelation
 from backend.apps.policy.models import Policy
 from backend.apps.role.models import RoleScope
 from backend.apps.template.models import PermTemplate, PermTemplatePolicyAuthorized
+from backend.biz.resource_rename import ResourceRenameReconciler
 from backend.component import iam
 from backend.service.constants import RoleScopeType
+from backend.service.group_policy_index import GroupPolicyIndexService
 from backend.util.enum import ChoicesEnum
 from backend.util.json import json_dumps
 
@@ -85,8 +89,9 @@ def execute_model_change_event():
 
 def delete_action_policies(system_id: str, action_id: str):
     """删除某个操作的所有策略"""
-    # 1. 用户或用户组自定义权限删除
+    # 1. 用户或用户组自定义权限删除, 以及用户组的策略索引
     Policy.objects.filter(system_id=system_id, action_id=action_id).delete()
+    GroupPolicyIndexService().delete_by_action(system_id, action_id)
 
     # 2. 权限模板：变更权限模板里的action_ids及其授权的数据
     _delete_action_from_perm_template(system_id, action_id)
@@ -176,3 +181,21 @@ def _delete_action_from_role_scope(system_id: str, action_id: str):
     # 批量更新分级管理员授权范围
     if len(updated_role_scopes) > 0:
         RoleScope.objects.bulk_update(updated_role_scopes, fields=["content"], batch_size=10)
+
+
+@task(ignore_result=True)
+def reconcile_renamed_resource():
+    """后台巡检策略/模板授权/分级管理员授权范围中被重命名的资源实例, 更新资源名称"""
+    if not settings.ENABLE_RESOURCE_RENAME_RECONCILER:
+        return
+
+    # 避免上一次巡检未结束时重复执行
+    lock = cache.lock("bk_iam:lock:reconcile_renamed_resource", timeout=60 * 30)
+    if not lock.acquire(blocking=False):
+        logger.info("reconcile_renamed_resource is running, skip")
+        return
+
+    try:
+        ResourceRenameReconciler(settings.RESOURCE_RENAME_RECONCILE_BATCH_SIZE).reconcile()
+    finally:
+        lock.release()
@@ -15,6 +15,9 @@ from . import views
 urlpatterns = [
     path("", views.PolicyViewSet.as_view({"get": "list", "delete": "destroy"}), name="policy.list_policy"),
     path("<int:pk>/", views.PolicyViewSet.as_view({"put": "update"}), name="policy.detail"),
+    path(
+        "<int:pk>/instances/", views.PolicyInstanceViewSet.as_view({"get": "list"}), name="policy.list_policy_instance"
+    ),
     path("systems/", views.PolicySystemViewSet.as_view({"get": "list"}), name="policy.list_policy_system"),
     path(
         "expire_soon/", views.PolicyExpireSoonViewSet.as_view({"get": "list"}), name="policy.list_policy_expire_soon"
@@ -27,7 +27,6 @@ from backend.biz.policy import ConditionBean, PolicyBean, PolicyOperationBiz, Po
 from backend.biz.policy_tag import PolicyTagBean, PolicyTagBeanList
 from backend.biz.related_policy import RelatedPolicyBiz
 from backend.common.error_codes import error_codes
-from backend.common.serializers import ActionQuerySLZ
 from backend.common.swagger import ResponseSwaggerAutoSchema
 from backend.common.time import get_soon_expire_ts
 from backend.service.action import ActionService
@@ -37,6 +36,9 @@ from backend.service.models import Subject as SvcSubject
 from .serializers import (
     PolicyDeleteSLZ,
     PolicyExpireSoonSLZ,
+    PolicyInstancePageSLZ,
+    PolicyInstanceQuerySLZ,
+    PolicyListQuerySLZ,
     PolicyPartDeleteSLZ,
     PolicyResourceCopySLZ,
     PolicySLZ,
@@ -59,12 +61,12 @@ class PolicyViewSet(GenericViewSet):
     @swagger_auto_schema(
         operation_description="用户的所有权限列表",
         auto_schema=ResponseSwaggerAutoSchema,
-        query_serializer=ActionQuerySLZ,
+        query_serializer=PolicyListQuerySLZ,
         responses={status.HTTP_200_OK: PolicySLZ(label="策略", many=True)},
         tags=["policy"],
     )
     def list(self, request, *args, **kwargs):
-        slz = ActionQuerySLZ(data=request.query_params)
+        slz = PolicyListQuerySLZ(data=request.query_params)
         slz.is_valid(raise_exception=True)
 
         system_id = slz.validated_data["system_id"]
@@ -83,6 +85,12 @@ class PolicyViewSet(GenericViewSet):
             return Response([p.dict() for p in apply_policy_list.policies])
 
         subject = SvcSubject(type=SubjectType.USER.value, id=request.user.username)
+
+        # 摘要模式只返回每个资源类型的实例数量, 实例通过PolicyInstanceViewSet分页展开
+        if slz.validated_data["summary"]:
+            summaries = self.policy_query_biz.list_summary_by_subject(system_id, subject)
+            return Response([one.dict() for one in summaries])
+
         policies = self.policy_query_biz.list_by_subject(system_id, subject)
 
         # ResourceNameAutoUpdate
@@ -160,6 +168,38 @@ class PolicyViewSet(GenericViewSet):
         return Response({})
 
 
+class PolicyInstanceViewSet(GenericViewSet):
+
+    paginator = None  # 去掉swagger中的limit offset参数
+
+    biz = PolicyQueryBiz()
+
+    @swagger_auto_schema(
+        operation_description="分页查询策略中指定资源类型的实例",
+        auto_schema=ResponseSwaggerAutoSchema,
+        query_serializer=PolicyInstanceQuerySLZ,
+        responses={status.HTTP_200_OK: PolicyInstancePageSLZ(label="实例")},
+        tags=["policy"],
+    )
+    def list(self, request, *args, **kwargs):
+        slz = PolicyInstanceQuerySLZ(data=request.query_params)
+        slz.is_valid(raise_exception=True)
+
+        data = slz.validated_data
+        subject = SvcSubject(type=SubjectType.USER.value, id=request.user.username)
+
+        count, results = self.biz.list_paging_instance(
+            data["system_id"],
+            subject,
+            kwargs["pk"],
+            data["resource_system_id"],
+            data["resource_type"],
+            data["limit"],
+            data["offset"],
+        )
+        return Response({"count": count, "results": [one.dict() for one in results]})
+
+
 class PolicySystemViewSet(GenericViewSet):
 
     paginator = None  # 去掉swagger中的limit offset参数
@@ -33,8 +33,10 @@ def sync_system_manager():
     """
     创建系统管理员
     """
-    # 查询后端所有的系统信息
-    systems = {system.id: system for system in SystemBiz().list()}
+    # 查询后端所有的系统信息, 同时检查系统列表是否有变更, 有变更时通知所有进程刷新系统缓存
+    system_biz = SystemBiz()
+    system_biz.refresh()
+    systems = {system.id: system for system in system_biz.list()}
 
     # 查询已创建的系统管理员的系统id
     exists_system_ids = Role.objects.filter(type=RoleType.SYSTEM_MANAGER.value).values_list("code", flat=True)
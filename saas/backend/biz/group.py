@@ -8,8 +8,8 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+from collections import defaultdict
 from datetime import datetime
-from itertools import groupby
 from typing import Any, Dict, List, Optional, Tuple
 
 from django.conf import settings
@@ -32,9 +32,11 @@ from backend.common.time import PERMANENT_SECONDS, expired_at_display
 from backend.long_task.constants import TaskType
 from backend.long_task.models import TaskDetail
 from backend.long_task.tasks import TaskFactory
+from backend.metrics.span import operation_span
 from backend.service.constants import RoleRelatedObjectType, SubjectType
 from backend.service.engine import EngineService
 from backend.service.group import GroupCreate, GroupMemberExpiredAt, GroupService, SubjectGroup
+from backend.service.group_policy_index import GroupPolicyIndexService
 from backend.service.group_saas_attribute import GroupAttributeService
 from backend.service.models import Policy, Subject
 from backend.service.policy.query import PolicyQueryService
@@ -115,6 +117,7 @@ class GroupBiz:
     group_svc = GroupService()
     group_attribute_svc = GroupAttributeService()
     engine_svc = EngineService()
+    group_policy_index_svc = GroupPolicyIndexService()
     role_svc = RoleService()
 
     # TODO 这里为什么是biz?
@@ -216,6 +219,10 @@ class GroupBiz:
         scope_checker.check_policies(system_id, added_policy_list.policies)
 
     def update_policies(self, role, group_id: int, system_id: str, template_id: int, policies: List[PolicyBean]):
+        with operation_span("update", system_id):
+            self._update_policies(role, group_id, system_id, template_id, policies)
+
+    def _update_policies(self, role, group_id: int, system_id: str, template_id: int, policies: List[PolicyBean]):
         """
         更新用户组单个权限
         """
@@ -317,6 +324,8 @@ class GroupBiz:
             self.template_biz.delete_template_auth_by_subject(subject)
             # 删除所有的自定义策略
             PolicyModel.objects.filter(subject_type=subject.type, subject_id=subject.id).delete()
+            # 删除用户组的策略索引
+            self.group_policy_index_svc.delete_by_group(group_id)
             # 删除用户组的属性
             self.group_attribute_svc.batch_delete_attributes([group_id])
             # 删除用户组本身
@@ -367,10 +376,12 @@ class GroupBiz:
 
         try:
             policy_resources = self.engine_svc.gen_search_policy_resources(policies)
-            # 填充资源实例的属性
-            for pr in policy_resources:
-                if len(pr.resources) != 0:
-                    self._fill_resources_attribute(pr.resources)
+            # 填充资源实例的属性, 所有策略的资源一起查询
+            self._fill_resources_attribute([r for pr in policy_resources for r in pr.resources])
+
+            # 使用SaaS维护的用户组策略索引, 不限制查询的资源数量
+            if settings.ENABLE_GROUP_POLICY_INDEX:
+                return self.group_policy_index_svc.list_group_ids(system_id, policy_resources)
 
             results = self.engine_svc.query_subjects_by_policy_resources(
                 system_id, policy_resources, SubjectType.GROUP.value
@@ -393,31 +404,27 @@ class GroupBiz:
         """
         用户组通过policy查询subjects的资源填充属性
         """
-        need_fetch_resources = []
+        # 按资源类型分组, 每个资源类型只查询一次
+        type_resources: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
         for resource in resources:
             if resource["id"] != "*" and not resource["attribute"]:
-                need_fetch_resources.append(resource)
+                type_resources[(resource["system"], resource["type"])].append(resource)
 
-        if not need_fetch_resources:
+        if not type_resources:
             return
 
-        for key, parts in groupby(need_fetch_resources, key=lambda resource: (resource["system"], resource["type"])):
-            self._exec_fill_resources_attribute(key[0], key[1], list(parts))
-
-    def _exec_fill_resources_attribute(self, system_id, resource_type_id, resources):
-        # 查询属性
-        resource_ids = list({resource["id"] for resource in resources})
-        resource_info_dict = self.resource_biz.fetch_auth_attributes(
-            system_id, resource_type_id, resource_ids, raise_api_exception=False
+        resource_info_dicts = self.resource_biz.batch_fetch_auth_attributes(
+            {key: [resource["id"] for resource in parts] for key, parts in type_resources.items()},
+            raise_api_exception=False,
         )
         # 填充属性
-        for resource in resources:
-            _id = resource["id"]
-            if not resource_info_dict.has(_id):
-                continue
-            attrs = resource_info_dict.get_attributes(_id, ignore_none_value=True)
-            # 填充
-            resource["attribute"] = attrs
+        for key, parts in type_resources.items():
+            resource_info_dict = resource_info_dicts[key]
+            for resource in parts:
+                _id = resource["id"]
+                if not resource_info_dict.has(_id):
+                    continue
+                resource["attribute"] = resource_info_dict.get_attributes(_id, ignore_none_value=True)
 
     def _check_lock_before_grant(self, group: Group, templates: List[GroupTemplateGrantBean]):
         """
@@ -459,13 +466,14 @@ class GroupBiz:
                 self._valid_grant_actions_not_exists(subject, template.system_id, action_ids)
 
             try:
-                # 校验资源的名称是否一致
-                if need_check_resource_name:
-                    template_policy_list = PolicyBeanList(system_id=template.system_id, policies=template.policies)
-                    template_policy_list.check_resource_name()
-                # 检查策略是否在role的授权范围内
-                scope_checker = RoleAuthorizationScopeChecker(role)
-                scope_checker.check_policies(template.system_id, template.policies)
+                with operation_span("grant_check", template.system_id):
+                    # 校验资源的名称是否一致
+                    if need_check_resource_name:
+                        template_policy_list = PolicyBeanList(system_id=template.system_id, policies=template.policies)
+                        template_policy_list.check_resource_name()
+                    # 检查策略是否在role的授权范围内
+                    scope_checker = RoleAuthorizationScopeChecker(role)
+                    scope_checker.check_policies(template.system_id, template.policies)
             except CodeException as e:
                 raise error_codes.VALIDATE_ERROR.format(
                     _("系统: {} 模板: {} 校验错误: {}").format(template.system_id, template.template_id, e.message),
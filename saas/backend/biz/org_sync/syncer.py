@@ -11,11 +11,19 @@ specific language governing permissions and limitations under the License.
 所有组织架构同步操作 统一处理
 """
 import datetime
+import logging
+from typing import Dict, List
+
+from django.db import IntegrityError, transaction
 
 from backend.apps.organization.constants import NEW_USER_AUTO_SYNC_COUNT_LIMIT
 from backend.apps.organization.models import User
 from backend.component import iam, usermgr
 
+from .user_cache import known_user_cache
+
+logger = logging.getLogger("organization")
+
 
 class Syncer:
     """
@@ -51,6 +59,86 @@ class Syncer:
         if is_created:
             iam.create_subjects([{"type": "user", "id": user.username, "name": user.display_name}])
 
+    def sync_users(self, usernames: List[str]) -> List[str]:
+        """
+        批量检查用户是否存在，不存在则同步
+        1. 过滤已知存在的用户（缓存）
+        2. 一次DB查询过滤已同步的用户
+        3. 剩余用户一次性从UserMgr查询并同步到DB与IAM后台
+        返回UserMgr中也不存在的用户名
+        """
+        usernames = list(dict.fromkeys(usernames))
+        unknown_usernames = known_user_cache.filter_unknown(usernames)
+        if not unknown_usernames:
+            return []
+
+        exist_usernames = set(User.objects.filter(username__in=unknown_usernames).values_list("username", flat=True))
+        missing_usernames = [u for u in unknown_usernames if u not in exist_usernames]
+        if not missing_usernames:
+            known_user_cache.add(unknown_usernames)
+            return []
+
+        users = usermgr.list_user_by_usernames(missing_usernames)
+        # 与单用户同步一致，以ID判断是否已同步，避免用户名变更时重复创建
+        exist_ids = set(User.objects.filter(id__in=[u["id"] for u in users]).values_list("id", flat=True))
+        created_users = self._create_users([u for u in users if u["id"] not in exist_ids])
+        if created_users:
+            iam.create_subjects(
+                [{"type": "user", "id": user.username, "name": user.display_name} for user in created_users]
+            )
+
+        found_usernames = {u["username"] for u in users}
+        known_user_cache.add(list(exist_usernames | found_usernames))
+
+        return [u for u in missing_usernames if u not in found_usernames]
+
+    def _create_users(self, users: List[Dict]) -> List[User]:
+        """
+        批量创建用户, 返回实际新建的用户
+        并发同步同一用户时(如多个首次授权请求)批量创建会冲突, 此时逐个get_or_create, 只返回本次创建的用户
+        """
+        if not users:
+            return []
+
+        db_users = [
+            User(
+                id=user["id"],
+                username=user["username"],
+                display_name=user["display_name"] or user["username"],
+                staff_status=user["staff_status"],
+                category_id=user["category_id"],
+            )
+            for user in users
+        ]
+        try:
+            # 使用savepoint, 冲突时不影响调用方的事务
+            with transaction.atomic():
+                User.objects.bulk_create(db_users, batch_size=1000)
+            return db_users
+        except IntegrityError:
+            logger.info("bulk create users conflict, fallback to create one by one")
+
+        created_users = []
+        for db_user in db_users:
+            try:
+                with transaction.atomic():
+                    user, is_created = User.objects.get_or_create(
+                        id=db_user.id,
+                        defaults={
+                            "username": db_user.username,
+                            "display_name": db_user.display_name,
+                            "staff_status": db_user.staff_status,
+                            "category_id": db_user.category_id,
+                        },
+                    )
+            except IntegrityError:
+                # 用户名已被其他ID的用户占用, 由全量同步处理
+                logger.exception("create user %s fail", db_user.username)
+                continue
+            if is_created:
+                created_users.append(user)
+        return created_users
+
     def sync_new_users(self):
         """
         执行新增用户同步
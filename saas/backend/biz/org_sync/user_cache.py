@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+已存在用户的缓存, 用于减少授权等接口中检查用户是否存在的查询
+"""
+import logging
+from typing import Iterable, List
+
+from django.core.cache import cache
+
+from backend.util.cache import ExpiringLRUCache
+
+logger = logging.getLogger("app")
+
+
+class KnownUserCache:
+    """
+    已同步到DB的用户名缓存
+    1. 进程内LRU缓存, 有容量上限, 每条记录LOCAL_EXPIRATION秒后需要重新确认
+    2. Redis缓存, 通过版本号失效, 组织架构全量同步后递增版本号, 所有缓存都会失效
+    Note: 只缓存存在的用户, 不存在的用户每次都需要查询
+    """
+
+    VERSION_KEY = "bk_iam:known_user:version"
+    KEY_PREFIX = "bk_iam:known_user"
+
+    LOCAL_MAX_SIZE = 10000
+    LOCAL_EXPIRATION = 60
+    REDIS_EXPIRATION = 24 * 60 * 60
+
+    def __init__(self) -> None:
+        self._local = ExpiringLRUCache(max_size=self.LOCAL_MAX_SIZE, default_timeout=self.LOCAL_EXPIRATION)
+
+    def filter_unknown(self, usernames: List[str]) -> List[str]:
+        """
+        返回不在缓存中的用户名
+        """
+        unknown = [u for u in usernames if self._local.get(u) is None]
+        if not unknown:
+            return []
+
+        try:
+            version = self._get_version()
+            cached = cache.get_many([self._key(version, u) for u in unknown])
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("known user cache get error")
+            return unknown
+
+        redis_known = {u for u in unknown if self._key(version, u) in cached}
+        self._add_local(redis_known)
+
+        return [u for u in unknown if u not in redis_known]
+
+    def add(self, usernames: List[str]):
+        if not usernames:
+            return
+
+        self._add_local(usernames)
+        try:
+            version = self._get_version()
+            cache.set_many({self._key(version, u): 1 for u in usernames}, self.REDIS_EXPIRATION)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("known user cache set error")
+
+    def invalidate(self):
+        """
+        组织架构同步后调用, 其他进程的进程内缓存在LOCAL_EXPIRATION内失效
+        """
+        self._local.clear()
+
+        try:
+            cache.get_or_set(self.VERSION_KEY, 0, None)
+            cache.incr(self.VERSION_KEY)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("known user cache invalidate error")
+
+    def _add_local(self, usernames: Iterable[str]):
+        for username in usernames:
+            self._local.set(username, True)
+
+    def _get_version(self) -> int:
+        return cache.get(self.VERSION_KEY) or 0
+
+    def _key(self, version: int, username: str) -> str:
+        return f"{self.KEY_PREFIX}:{version}:{username}"
+
+
+known_user_cache = KnownUserCache()
@@ -10,19 +10,25 @@ specific language governing permissions and limitations under the License.
 """
 import functools
 import logging
+import random
 import time
 from copy import deepcopy
 from itertools import chain, groupby
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from typing import Any, ClassVar, Dict, Iterable, List, Optional, Set, Tuple
 
 from django.conf import settings
 from django.core.cache import cache
+from django.db import connection
 from django.utils.decorators import method_decorator
 from django.utils.translation import gettext as _
+from pydantic import BaseModel
 from pydantic.tools import parse_obj_as
 
+from backend.apps.policy.constants import PolicyChangeConcurrencyModeEnum
 from backend.common.error_codes import error_codes
 from backend.common.time import PERMANENT_SECONDS, expired_at_display, generate_default_expired_at
+from backend.metrics import policy_change_conflict_total, policy_change_wait_duration
+from backend.metrics.span import stage_span, trace_operation
 from backend.service.action import ActionService
 from backend.service.constants import ANY_ID, FETCH_MAX_LIMIT
 from backend.service.models import (
@@ -34,7 +40,9 @@ from backend.service.models import (
     PathNode,
     PathResourceType,
     Policy,
+    PolicySummary,
     RelatedResource,
+    RelatedResourceSummary,
     RelatedResourceType,
     ResourceTypeDict,
     Subject,
@@ -43,9 +51,9 @@ from backend.service.models import (
 )
 from backend.service.policy.operation import PolicyOperationService
 from backend.service.policy.query import PolicyQueryService
+from backend.service.policy.version import PolicyVersionConflict, PolicyVersionService
 from backend.service.resource_type import ResourceTypeService
 from backend.service.system import SystemService
-from backend.service.utils.translate import translate_path
 from backend.util.model import ExcludeModel
 
 from .resource import ResourceBiz, ResourceNodeBean
@@ -58,10 +66,33 @@ class PolicyEmptyException(Exception):
 
 
 class PathNodeBean(PathNode):
+    # 缓存节点在路径字符串中的片段, 不作为pydantic字段, 不会被序列化
+    __slots__ = ("_path_segment",)
+
+    # 任意节点的type/id被修改时递增, PathNodeBeanList据此判断缓存的路径key是否失效
+    mutation_version: ClassVar[int] = 0
+
     name: str = ""
     type_name: str = ""
     type_name_en: str = ""
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in ("type", "id"):
+            object.__setattr__(self, "_path_segment", None)
+            PathNodeBean.mutation_version += 1
+
+    @property
+    def path_segment(self) -> str:
+        """
+        节点在路径字符串中的片段, 与translate_path的格式一致
+        """
+        segment = getattr(self, "_path_segment", None)
+        if segment is None:
+            segment = "{},{}/".format(self.type, self.id)
+            object.__setattr__(self, "_path_segment", segment)
+        return segment
+
     def fill_empty_fields(self, resource_type_dict: ResourceTypeDict):
         self.type_name, self.type_name_en = resource_type_dict.get_name(self.system_id, self.type)
 
@@ -80,11 +111,37 @@ class PathNodeBeanList:
     def __init__(self, nodes: List[PathNodeBean]) -> None:
         self.nodes = nodes
 
+    @property
+    def nodes(self) -> List[PathNodeBean]:
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes: List[PathNodeBean]):
+        self._nodes = nodes
+        self._path_key: Optional[Tuple[str, ...]] = None
+        self._path_key_version: Tuple[int, int] = (-1, -1)
+
     def dict(self) -> List[Dict[str, Any]]:
         return [node.dict() for node in self.nodes]
 
-    def to_path_string(self):
-        return translate_path(self.dict())
+    @property
+    def path_key(self) -> Tuple[str, ...]:
+        """
+        路径的可hash key, 由各节点的path_segment组成, 只计算一次
+
+        节点type/id被修改或nodes增删节点后重新计算, 原地替换nodes中的元素需要重新赋值nodes
+        """
+        version = (PathNodeBean.mutation_version, len(self._nodes))
+        if self._path_key is None or self._path_key_version != version:
+            self._path_key = tuple(node.path_segment for node in self._nodes)
+            self._path_key_version = version
+        return self._path_key
+
+    def to_path_string(self) -> str:
+        """
+        路径的字符串表示, 与translate_path(self.dict())一致
+        """
+        return "/" + "".join(self.path_key)
 
     def _to_path_resource_types(self) -> List[PathResourceType]:
         return [one.to_path_resource_type() for one in self.nodes]
@@ -116,6 +173,45 @@ class PathNodeBeanList:
         return "/".join(["{}:{}".format(node.type, node.name) for node in self.nodes])
 
 
+class PathScopeMatcher:
+    """
+    范围路径的前缀匹配
+
+    与比较to_path_string的startswith结果一致, 末尾为*的范围路径匹配该层级任意实例
+    范围路径按节点组织成前缀树, 每条路径的匹配只与路径深度有关, 与范围路径的数量无关
+    """
+
+    _END = ""  # 前缀树中标记范围路径结束, 不会与path_segment冲突
+
+    def __init__(self, path_lists: Iterable[PathNodeBeanList] = ()) -> None:
+        self._root: Dict[str, Any] = {}
+        for path_list in path_lists:
+            self.add(path_list)
+
+    def add(self, path_list: PathNodeBeanList):
+        tree = self._root
+        for segment in path_list.path_key:
+            tree = tree.setdefault(segment, {})
+        tree[self._END] = True
+
+    def match(self, path_list: PathNodeBeanList) -> bool:
+        tree = self._root
+        for node, segment in zip(path_list.nodes, path_list.path_key):
+            if self._END in tree:
+                return True
+
+            # 范围路径末尾为*, 匹配该层级同类型的任意实例
+            any_tree = tree.get("{},{}/".format(node.type, ANY_ID))
+            if any_tree is not None and self._END in any_tree:
+                return True
+
+            if segment not in tree:
+                return False
+            tree = tree[segment]
+
+        return self._END in tree
+
+
 class InstanceBean(Instance):
     path: List[List[PathNodeBean]]
 
@@ -779,6 +875,7 @@ class PolicyBeanList:
         return generate_default_expired_at()
 
     # For Operation
+    @stage_span("merge")
     def split_to_creation_and_update_for_grant(
         self, new_policy_list: "PolicyBeanList"
     ) -> Tuple["PolicyBeanList", "PolicyBeanList"]:
@@ -814,6 +911,7 @@ class PolicyBeanList:
 
         return PolicyBeanList(self.system_id, create_policies), PolicyBeanList(self.system_id, update_policies)
 
+    @stage_span("merge")
     def split_to_update_and_delete_for_revoke(
         self, delete_policy_list: "PolicyBeanList"
     ) -> Tuple["PolicyBeanList", "PolicyBeanList"]:
@@ -906,6 +1004,7 @@ class PolicyBeanList:
             nodes.extend(p.list_path_node())
         return nodes
 
+    @stage_span("check_resource_name")
     def check_resource_name(self):
         """
         校验策略里包含资源实例名称与ID是否匹配，主要用于防止前端提交数据的错误
@@ -973,6 +1072,10 @@ class PolicyBeanList:
         策略里存储的资源名称可能已经变了，需要进行更新
         Note: 该函数仅用于需要对外展示策略数据时调用，不会自动更新DB里数据
         """
+        # 开启后台巡检后, 由巡检任务更新资源名称, 查询时不再回调接入系统
+        if settings.ENABLE_RESOURCE_RENAME_RECONCILER:
+            return []
+
         # 由于自动更新并非核心功能，若接入系统查询有问题，也需要正常显示
         try:
             # 获取策略里被重命名的资源实例
@@ -996,6 +1099,56 @@ class PolicyBeanList:
         return changed_policies
 
 
+class RelatedResourceSummaryBean(RelatedResourceSummary):
+    name: str = ""
+    name_en: str = ""
+
+
+class PolicySummaryBean(PolicySummary):
+    related_resource_types: List[RelatedResourceSummaryBean]
+
+    type: str = ""
+    name: str = ""
+    name_en: str = ""
+    description: str = ""
+    description_en: str = ""
+    expired_display: str = ""
+
+    def __init__(self, **data: Any):
+        if "expired_at" in data and "expired_display" not in data:
+            data["expired_display"] = expired_at_display(data["expired_at"])
+        super().__init__(**data)
+
+    def dict(self, *args, **kwargs):
+        kwargs["by_alias"] = True
+        return super().dict(*args, **kwargs)
+
+    def fill_empty_fields(self, action: Optional[Action], resource_type_dict: ResourceTypeDict):
+        if action:
+            for field in ["type", "name", "name_en", "description", "description_en"]:
+                setattr(self, field, getattr(action, field))
+
+        for rt in self.related_resource_types:
+            rt.name, rt.name_en = resource_type_dict.get_name(rt.system_id, rt.type)
+
+
+class PolicyInstancePathBean(BaseModel):
+    """
+    策略中的一条实例路径, 用于分页展开策略的实例
+    """
+
+    condition_id: str
+    type: str
+    name: str = ""
+    name_en: str = ""
+    path: List[PathNodeBean]
+
+    def fill_empty_fields(self, resource_type_dict: ResourceTypeDict):
+        for node in self.path:
+            node.fill_empty_fields(resource_type_dict)
+        self.name, self.name_en = resource_type_dict.get_name(self.path[-1].system_id, self.type)
+
+
 class SystemCounterBean(SystemCounter):
     name: str = ""
     name_en: str = ""
@@ -1058,6 +1211,56 @@ class PolicyQueryBiz:
         policy_list = PolicyBeanList(system_id, parse_obj_as(List[PolicyBean], policies), need_fill_empty_fields=True)
         return policy_list
 
+    def list_summary_by_subject(self, system_id: str, subject: Subject) -> List[PolicySummaryBean]:
+        """
+        查询subject指定系统的策略摘要, 只包含每个资源类型的实例数量, 不展开条件
+        """
+        summaries = parse_obj_as(List[PolicySummaryBean], self.svc.list_summary_by_subject(system_id, subject))
+
+        system_ids = {rt.system_id for one in summaries for rt in one.related_resource_types}
+        resource_type_dict = self.resource_type_svc.get_resource_type_dict(list(system_ids))
+        action_list = self.action_svc.new_action_list(system_id)
+        for one in summaries:
+            one.fill_empty_fields(action_list.get(one.action_id), resource_type_dict)
+
+        return summaries
+
+    def list_paging_instance(
+        self,
+        system_id: str,
+        subject: Subject,
+        policy_id: int,
+        resource_system_id: str,
+        resource_type_id: str,
+        limit: int,
+        offset: int,
+    ) -> Tuple[int, List[PolicyInstancePathBean]]:
+        """
+        分页查询策略中指定资源类型的实例路径, 只有当前页的数据才会转换为Bean并填充名称
+        """
+        resources = self.svc.get_resources_by_policy_id(system_id, subject, policy_id)
+
+        paths = [
+            (c["id"], i["type"], path)
+            for rt in resources
+            if rt["system_id"] == resource_system_id and rt["type"] == resource_type_id
+            for c in rt["condition"]
+            for i in c["instances"]
+            for path in i["path"]
+        ]
+
+        page = [
+            PolicyInstancePathBean(condition_id=condition_id, type=_type, path=path)
+            for condition_id, _type, path in paths[offset : offset + limit]
+        ]
+
+        system_ids = {node.system_id for one in page for node in one.path}
+        resource_type_dict = self.resource_type_svc.get_resource_type_dict(list(system_ids))
+        for one in page:
+            one.fill_empty_fields(resource_type_dict)
+
+        return len(paths), page
+
     def list_system_counter_by_subject(self, subject: Subject) -> List[SystemCounterBean]:
         """
         查询subject有权限的系统-policy数量信息
@@ -1121,10 +1324,15 @@ class PolicyQueryBiz:
 
 
 def policy_change_lock(func):
-    """装饰器：策略变更的分布式全局锁，避免并发导致数据错误
+    """装饰器：策略变更的并发控制，避免并发导致数据错误
     Note: 若被添加于类的方法上，需要使用method_decorator，主要是为了不关注类的self/cls参数
     from django.utils.decorators import method_decorator
     method_decorator(policy_change_lock)
+
+    settings.POLICY_CHANGE_CONCURRENCY_MODE:
+    - lock: 分布式全局锁
+    - optimistic: 比较并交换subject策略集合的版本号, 冲突时重新执行整个变更;
+      调用方已开启事务时, 重复读隔离级别下重试读到的仍是旧快照, 无法通过重试解决冲突, 使用分布式锁
     """
 
     @functools.wraps(func)
@@ -1132,20 +1340,66 @@ def policy_change_lock(func):
         # Note: 必须保证被装饰的函数有参数system_id和subject
         system_id = kwargs["system_id"] if "system_id" in kwargs else args[0]
         subject = kwargs["subject"] if "subject" in kwargs else args[1]
+
+        if (
+            settings.POLICY_CHANGE_CONCURRENCY_MODE == PolicyChangeConcurrencyModeEnum.OPTIMISTIC.value
+            and not connection.in_atomic_block
+        ):
+            return _retry_on_version_conflict(func, system_id, subject, *args, **kwargs)
+
         # TODO: 后面重构cache模块时统一定义前缀
         lock_key = f"bk_iam:lock:{system_id}:{subject.type}:{subject.id}"
+        start = time.time()
         # 加 system + subject 锁
         with cache.lock(lock_key, timeout=10):
+            policy_change_wait_duration.labels(
+                mode=PolicyChangeConcurrencyModeEnum.LOCK.value, system=system_id
+            ).observe((time.time() - start) * 1000)
             return func(*args, **kwargs)
 
     return wrapper
 
 
+def _retry_on_version_conflict(func, system_id: str, subject: Subject, *args, **kwargs):
+    """
+    乐观并发控制: 读取版本号后执行变更, 写DB时版本号已变化则重新读取策略并合并
+
+    Note: 变更过程中会原地修改传入的策略(如新增策略的过期时间), 且调用方(如审计)会读取修改后的入参,
+    因此首次执行使用原始参数(与锁模式一致), 执行前只保存一份副本; 发生冲突时才从副本复制出新的参数重试
+    """
+    version_svc = PolicyVersionService()
+    origin = deepcopy((args, kwargs))
+    wasted = 0.0
+    for retry in range(settings.POLICY_CHANGE_OPTIMISTIC_MAX_RETRY + 1):
+        if retry > 0:
+            args, kwargs = deepcopy(origin)
+
+        start = time.time()
+        version = version_svc.get(system_id, subject)
+        try:
+            with version_svc.expect(system_id, subject, version):
+                result = func(*args, **kwargs)
+        except PolicyVersionConflict:
+            wasted += time.time() - start
+            policy_change_conflict_total.labels(system=system_id).inc()
+            logger.info("policy change of %s %s conflict, retry %d", system_id, subject, retry)
+            time.sleep(random.uniform(0, 0.05 * (retry + 1)))
+            continue
+
+        policy_change_wait_duration.labels(
+            mode=PolicyChangeConcurrencyModeEnum.OPTIMISTIC.value, system=system_id
+        ).observe(wasted * 1000)
+        return result
+
+    raise error_codes.CONFLICT_ERROR.format(_("策略正在被并发修改, 请稍后重试"), replace=True)
+
+
 class PolicyOperationBiz:
     query_biz = PolicyQueryBiz()
 
     svc = PolicyOperationService()
 
+    @method_decorator(trace_operation("delete_by_ids"))
     @method_decorator(policy_change_lock)
     def delete_by_ids(self, system_id: str, subject: Subject, policy_ids: List[int]):
         """
@@ -1153,6 +1407,7 @@ class PolicyOperationBiz:
         """
         self.svc.delete_by_ids(system_id, subject, policy_ids)
 
+    @method_decorator(trace_operation("delete_partial"))
     @method_decorator(policy_change_lock)
     def delete_partial(
         self,
@@ -1190,6 +1445,7 @@ class PolicyOperationBiz:
 
         return policy
 
+    @method_decorator(trace_operation("update"))
     @method_decorator(policy_change_lock)
     def update(self, system_id: str, subject: Subject, policies: List[PolicyBean]) -> List[PolicyBean]:
         """
@@ -1213,6 +1469,7 @@ class PolicyOperationBiz:
 
         return update_policy_list.policies
 
+    @method_decorator(trace_operation("alter"))
     @method_decorator(policy_change_lock)
     def alter(self, system_id: str, subject: Subject, policies: List[PolicyBean]):
         """
@@ -1236,6 +1493,7 @@ class PolicyOperationBiz:
             update_policies=update_policy_list.to_svc_policies(),
         )
 
+    @method_decorator(trace_operation("revoke"))
     @method_decorator(policy_change_lock)
     def revoke(self, system_id: str, subject: Subject, delete_policies: List[PolicyBean]) -> List[PolicyBean]:
         """
@@ -1260,7 +1518,6 @@ class PolicyOperationBiz:
 
         return update_policy_list.policies + whole_delete_policy_list.policies
 
-    @method_decorator(policy_change_lock)
     def update_due_to_renamed_resource(
         self, system_id: str, subject: Subject, policies: List[PolicyBean]
     ) -> List[PolicyBean]:
@@ -1268,6 +1525,16 @@ class PolicyOperationBiz:
         更新策略，这里只是更新策略里的资源实例名称，并不会影响策略本身鉴权相关的
         返回的是所有策略，包括未被更新的
         """
+        # 开启后台巡检后, 直接返回DB中存储的名称, 也无需加策略变更锁
+        if settings.ENABLE_RESOURCE_RENAME_RECONCILER:
+            return policies
+
+        return self._update_due_to_renamed_resource(system_id, subject, policies)
+
+    @method_decorator(policy_change_lock)
+    def _update_due_to_renamed_resource(
+        self, system_id: str, subject: Subject, policies: List[PolicyBean]
+    ) -> List[PolicyBean]:
         policy_list = PolicyBeanList(system_id, parse_obj_as(List[PolicyBean], policies))
         updated_policies = policy_list.auto_update_resource_name()
         if len(updated_policies) > 0:
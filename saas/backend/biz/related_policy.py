@@ -9,7 +9,7 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 from copy import deepcopy
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from backend.biz.policy import (
     ConditionBean,
@@ -202,8 +202,9 @@ class RelatedPolicyBiz:
         return [ConditionBean(**{"id": gen_uuid(), "instances": new_instances, "attributes": []})]
 
     @staticmethod
-    def _translate_path(path: List[PathNodeBean]) -> str:
-        return "/".join(["{},{},{}".format(node.system_id, node.type, node.id) for node in path])
+    def _translate_path(path: List[PathNodeBean]) -> Tuple[PathNodeBean, ...]:
+        # PathNode的hash与相等比较基于(system_id, type, id), 节点元组可直接作为路径去重的key, 无需拼接字符串
+        return tuple(path)
 
     def _merge_multi_conditions(self, rrt_conditions: List[List[ConditionBean]]) -> List[ConditionBean]:
         """
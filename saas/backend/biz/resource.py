@@ -10,6 +10,7 @@ specific language governing permissions and limitations under the License.
 """
 import logging
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Tuple
 
 from django.utils.translation import gettext as _
@@ -17,6 +18,8 @@ from pydantic import BaseModel
 from pydantic.tools import parse_obj_as
 
 from backend.common.error_codes import APIException, error_codes
+from backend.common.local import local
+from backend.metrics.span import bind_operation, stage_span
 from backend.service.models import (
     ResourceAttribute,
     ResourceAttributeValue,
@@ -24,9 +27,13 @@ from backend.service.models import (
     ResourceInstanceInfo,
 )
 from backend.service.resource import ResourceProvider
+from backend.util.cache import region
 
 logger = logging.getLogger(__name__)
 
+# 批量查询多个资源类型的鉴权属性时, 并发请求接入系统的最大线程数
+FETCH_AUTH_ATTRIBUTES_MAX_WORKERS = 5
+
 
 class ResourceAttributeBean(ResourceAttribute):
     pass
@@ -141,14 +148,46 @@ class ResourceBiz:
     ) -> ResourceInfoDictBean:
         """查询所有资源实例的用于鉴权的属性，同时如果查询有问题，则直接忽略错误"""
         rp = self.new_resource_provider(system_id, resource_type_id)
-
+        attrs = self._list_auth_attrs(system_id, resource_type_id, raise_api_exception)
+        return self._fetch_instance_auth_attributes(rp, ids, attrs, raise_api_exception)
+
+    @stage_span("fetch_auth_attributes")
+    def batch_fetch_auth_attributes(
+        self, type_ids: Dict[Tuple[str, str], List[str]], raise_api_exception=False
+    ) -> Dict[Tuple[str, str], ResourceInfoDictBean]:
+        """
+        批量查询多个资源类型的资源实例鉴权属性
+        type_ids: (system_id, resource_type_id) -> 资源实例ID列表, 每个资源类型只回调一次接入系统, 多个资源类型并发查询
+        """
+        # Note: ResourceProvider初始化时会读取当前请求的request_id等线程变量, 需要在当前线程创建
+        tasks = []
+        for (system_id, resource_type_id), ids in type_ids.items():
+            rp = self.new_resource_provider(system_id, resource_type_id)
+            attrs = self._list_auth_attrs(system_id, resource_type_id, raise_api_exception)
+            tasks.append(((system_id, resource_type_id), rp, sorted(set(ids)), attrs))
+
+        if len(tasks) <= 1:
+            return {
+                key: self._fetch_instance_auth_attributes(rp, ids, attrs, raise_api_exception)
+                for key, rp, ids, attrs in tasks
+            }
+
+        # 工作线程中需要使用当前线程的请求上下文(request_id, 调试信息)与策略操作(阶段耗时)
+        fetch = local.bind(bind_operation(self._fetch_instance_auth_attributes))
+        with ThreadPoolExecutor(max_workers=min(len(tasks), FETCH_AUTH_ATTRIBUTES_MAX_WORKERS)) as executor:
+            futures = {
+                key: executor.submit(fetch, rp, ids, attrs, raise_api_exception) for key, rp, ids, attrs in tasks
+            }
+            return {key: future.result() for key, future in futures.items()}
+
+    def _list_auth_attrs(self, system_id: str, resource_type_id: str, raise_api_exception=False) -> List[str]:
+        """查询资源类型用于鉴权的属性"""
         # 鉴权属性，需要包括拓扑路径，这种由权限中心产生的
         # TODO: _bk_iam_path_ 需要提取为常量，目前多处都直接裸写
         attrs = ["_bk_iam_path_"]
         # 查询支持该资源类型配置的属性
         try:
-            resource_attrs = rp.list_attr()
-            attrs.extend([i.id for i in resource_attrs])
+            attrs.extend(self._list_attr_ids(system_id, resource_type_id))
         except APIException as error:
             logging.info(
                 f"fetch_resource_all_auth_attributes({system_id}, {resource_type_id}) list_attr error: {error}"
@@ -156,13 +195,22 @@ class ResourceBiz:
             # 判断是否忽略接口异常
             if raise_api_exception:
                 raise error
+        return attrs
 
+    @region.cache_on_arguments(expiration_time=60)  # 缓存1分钟
+    def _list_attr_ids(self, system_id: str, resource_type_id: str) -> List[str]:
+        rp = self.new_resource_provider(system_id, resource_type_id)
+        return [i.id for i in rp.list_attr()]
+
+    def _fetch_instance_auth_attributes(
+        self, rp: ResourceProvider, ids: List[str], attrs: List[str], raise_api_exception=False
+    ) -> ResourceInfoDictBean:
         # 查询资源实例的属性
         try:
             resource_infos = rp.fetch_instance_info(ids, attrs)
         except APIException as error:
             logging.info(
-                f"fetch_resource_all_auth_attributes({system_id}, {resource_type_id}) "
+                f"fetch_resource_all_auth_attributes({rp.system_id}, {rp.resource_type_id}) "
                 f"fetch_instance_info error: {error}"
             )
             # 不需要抛异常则直接返回
@@ -172,6 +220,7 @@ class ResourceBiz:
 
         return ResourceInfoDictBean(data={i.id: ResourceInfoBean(**i.dict()) for i in resource_infos})
 
+    @stage_span("fetch_resource_name")
     def fetch_resource_name(
         self, resource_node_beans: List[ResourceNodeBean], raise_not_found_exception=False
     ) -> ResourceNodeAttributeDictBean:
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+后台巡检策略/模板授权/分级管理员授权范围中被重命名的资源实例
+
+替代页面查询时实时回调接入系统更新资源名称(ResourceNameAutoUpdate):
+1. 每类数据按主键游标增量巡检, 到末尾后从头开始, 即每次处理的都是最久未检查的数据
+2. 一批数据里所有的资源实例按(system, resource_type)合并去重后批量查询名称
+3. 只回写名称有变化的数据, 回写时重新读取数据, 避免覆盖并发的变更
+"""
+import json
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+from backend.apps.policy.models import Policy as PolicyModel
+from backend.apps.policy.models import PolicyResourceChunk
+from backend.apps.role.models import RoleScope
+from backend.apps.template.models import PermTemplatePolicyAuthorized
+from backend.service.constants import ACTION_ALL, ANY_ID, FETCH_MAX_LIMIT, RoleScopeType
+from backend.service.models import Policy, Subject
+from backend.service.policy.operation import PolicyOperationService
+from backend.util.basic import chunked
+from backend.util.json import json_dumps
+
+from .policy import policy_change_lock
+from .resource import ResourceBiz
+
+logger = logging.getLogger("celery")
+
+# (system_id, resource_type_id, resource_id)
+ResourceKey = Tuple[str, str, str]
+
+
+def _iter_path_nodes(related_resource_types: List[Dict]) -> Iterable[Dict]:
+    for rt in related_resource_types:
+        for condition in rt.get("condition", []):
+            for instance in condition.get("instances", []):
+                for path in instance.get("path", []):
+                    yield from path
+
+
+def _count_instance(related_resource_types: List[Dict]) -> int:
+    return sum(
+        len(instance.get("path", []))
+        for rt in related_resource_types
+        for condition in rt.get("condition", [])
+        for instance in condition.get("instances", [])
+    )
+
+
+def _rename_nodes(related_resource_types: List[Dict], real_names: Dict[ResourceKey, str]) -> bool:
+    """
+    使用实际名称修改节点, 返回是否有修改
+    """
+    is_changed = False
+    for node in _iter_path_nodes(related_resource_types):
+        real_name = real_names.get((node.get("system_id", ""), node["type"], node["id"]))
+        if real_name and real_name != node.get("name"):
+            node["name"] = real_name
+            is_changed = True
+    return is_changed
+
+
+def _iter_template_resources(data: Dict) -> Iterable[List[Dict]]:
+    for action in data.get("actions", []):
+        yield action.get("related_resource_types", [])
+
+
+def _iter_scope_resources(content: List[Dict]) -> Iterable[List[Dict]]:
+    for system in content:
+        for action in system.get("actions", []):
+            if action.get("id") == ACTION_ALL:
+                continue
+            yield action.get("related_resource_types", [])
+
+
+@policy_change_lock
+def _update_policy_resource_name(system_id: str, subject: Subject, ids: List[int], real_names: Dict[ResourceKey, str]):
+    """
+    在策略变更锁内重新读取策略, 只修改资源名称
+    """
+    db_policies = list(PolicyModel.objects.filter(id__in=ids).exclude(policy_id=0))
+    PolicyResourceChunk.objects.prefetch_for_policies(db_policies)
+
+    policies = []
+    for p in db_policies:
+        resources = p.resources
+        if _rename_nodes(resources, real_names):
+            policies.append(
+                Policy(action_id=p.action_id, related_resource_types=resources, policy_id=p.policy_id, expired_at=0)
+            )
+
+    if policies:
+        PolicyOperationService().update_db_policies(system_id, subject, policies)
+
+
+class ResourceRenameReconciler:
+    """
+    资源实例重命名的后台巡检
+    """
+
+    resource_biz = ResourceBiz()
+
+    cursor_key_prefix = "bk_iam:resource_rename:cursor"
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+
+    def reconcile(self):
+        self.reconcile_policies()
+        self.reconcile_template_authorized()
+        self.reconcile_role_scopes()
+
+    def reconcile_policies(self):
+        db_policies = self._next_batch(
+            "policy", PolicyModel.objects.exclude(policy_id=0).only("id", "system_id", "subject_type", "subject_id")
+        )
+        if not db_policies:
+            return
+
+        full_policies = list(PolicyModel.objects.filter(id__in=[p.id for p in db_policies]))
+        # 分块存储的策略一次性预加载所有分块, 避免逐条查询
+        PolicyResourceChunk.objects.prefetch_for_policies(full_policies)
+        resources_dict = {p.id: p.resources for p in full_policies}
+        real_names = self._fetch_real_names(resources_dict.values())
+
+        # 按subject+system合并, 每组只加一次策略变更锁
+        changed: Dict[Tuple[str, str, str], List[int]] = defaultdict(list)
+        for p in db_policies:
+            resources = resources_dict.get(p.id)
+            if resources is not None and _rename_nodes(resources, real_names):
+                changed[(p.system_id, p.subject_type, p.subject_id)].append(p.id)
+
+        for (system_id, subject_type, subject_id), ids in changed.items():
+            self._safe_execute(
+                _update_policy_resource_name,
+                system_id,
+                Subject(type=subject_type, id=subject_id),
+                ids,
+                real_names,
+            )
+
+    def reconcile_template_authorized(self):
+        authorized_templates = self._next_batch("template_authorized", PermTemplatePolicyAuthorized.objects.all())
+        if not authorized_templates:
+            return
+
+        real_names = self._fetch_real_names(
+            chain_resources for one in authorized_templates for chain_resources in _iter_template_resources(one.data)
+        )
+
+        for one in authorized_templates:
+            if any(_rename_nodes(resources, real_names) for resources in _iter_template_resources(one.data)):
+                self._safe_execute(self._update_template_authorized, one.id, real_names)
+
+    def reconcile_role_scopes(self):
+        role_scopes = self._next_batch("role_scope", RoleScope.objects.filter(type=RoleScopeType.AUTHORIZATION.value))
+        if not role_scopes:
+            return
+
+        real_names = self._fetch_real_names(
+            resources for one in role_scopes for resources in _iter_scope_resources(json.loads(one.content))
+        )
+
+        for one in role_scopes:
+            if any(
+                _rename_nodes(resources, real_names) for resources in _iter_scope_resources(json.loads(one.content))
+            ):
+                self._safe_execute(self._update_role_scope, one.id, real_names)
+
+    def _update_template_authorized(self, authorized_template_id: int, real_names: Dict[ResourceKey, str]):
+        with transaction.atomic():
+            authorized_template = PermTemplatePolicyAuthorized.objects.select_for_update().get(
+                id=authorized_template_id
+            )
+            data = authorized_template.data
+            # Note: 需要遍历所有的操作, 不能使用any短路
+            changes = [_rename_nodes(resources, real_names) for resources in _iter_template_resources(data)]
+            if any(changes):
+                authorized_template.data = data
+                authorized_template.save(update_fields=["_data"])
+
+    def _update_role_scope(self, role_scope_id: int, real_names: Dict[ResourceKey, str]):
+        with transaction.atomic():
+            role_scope = RoleScope.objects.select_for_update().get(id=role_scope_id)
+            content = json.loads(role_scope.content)
+            changes = [_rename_nodes(resources, real_names) for resources in _iter_scope_resources(content)]
+            if any(changes):
+                role_scope.content = json_dumps(content)
+                role_scope.save(update_fields=["content"])
+
+    def _next_batch(self, name: str, queryset) -> List:
+        """
+        按主键游标获取下一批数据, 到末尾后下一次从头开始
+        """
+        cursor_key = f"{self.cursor_key_prefix}:{name}"
+        cursor = cache.get(cursor_key) or 0
+
+        objs = list(queryset.filter(id__gt=cursor).order_by("id")[: self.batch_size])
+        cache.set(cursor_key, objs[-1].id if len(objs) == self.batch_size else 0, None)
+        return objs
+
+    def _fetch_real_names(self, resources_list: Iterable[List[Dict]]) -> Dict[ResourceKey, str]:
+        """
+        批量查询资源实例的实际名称, 同一资源类型的实例合并查询
+        """
+        resource_ids: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        for resources in resources_list:
+            # 防御性措施：忽略大策略，避免给接入系统请求压力
+            if _count_instance(resources) > FETCH_MAX_LIMIT:
+                continue
+
+            for node in _iter_path_nodes(resources):
+                if node["id"] == ANY_ID or not node.get("system_id"):
+                    continue
+                resource_ids[(node["system_id"], node["type"])].add(node["id"])
+
+        real_names: Dict[ResourceKey, str] = {}
+        for (system_id, resource_type_id), ids in resource_ids.items():
+            rp = self.resource_biz.new_resource_provider(system_id, resource_type_id)
+            for part_ids in chunked(sorted(ids), FETCH_MAX_LIMIT):
+                try:
+                    infos = rp.fetch_instance_name(part_ids)
+                except Exception as error:  # pylint: disable=broad-except
+                    # 某个接入系统查询失败不影响其他资源类型的巡检
+                    logger.warning(
+                        "reconcile renamed resource: fetch_instance_name(%s, %s) error=%s",
+                        system_id,
+                        resource_type_id,
+                        error,
+                    )
+                    break
+
+                for info in infos:
+                    real_names[(system_id, resource_type_id, info.id)] = info.display_name
+
+        return real_names
+
+    def _safe_execute(self, func: Callable, *args):
+        try:
+            func(*args)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("reconcile renamed resource: %s%s fail", func.__name__, args[:-1])
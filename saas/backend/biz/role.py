@@ -27,11 +27,13 @@ from backend.biz.policy import (
     InstanceBean,
     PathNodeBean,
     PathNodeBeanList,
+    PathScopeMatcher,
     PolicyBean,
     PolicyBeanList,
     ThinSystem,
 )
 from backend.common.error_codes import APIException, error_codes
+from backend.metrics.span import stage_span
 from backend.service.constants import (
     ACTION_ALL,
     SUBJECT_ALL,
@@ -555,31 +557,12 @@ class RoleAuthorizationScopeChecker:
 
         policy_scope = PolicyBean.parse_obj(self.system_action_scope[system_id][action_id])
         for rrt in policy_scope.related_resource_types:
-            scope_str_paths = []
-            inside_paths = []
-            for path_list in rrt.iter_path_list(ignore_attribute=True):
-                sp = path_list.to_path_string()
-                # 处理路径中存在*的情况
-                if sp.endswith(",*/"):
-                    sp = sp[:-2]
-
-                scope_str_paths.append(sp)
-
-            for path in paths:
-                if self._is_path_match_scope_paths(path, scope_str_paths):
-                    inside_paths.append(path)
-
-            paths = inside_paths
+            matcher = PathScopeMatcher(rrt.iter_path_list(ignore_attribute=True))
+            paths = [path for path in paths if matcher.match(PathNodeBeanList(path))]
 
         return paths
 
-    def _is_path_match_scope_paths(self, path: List[PathNodeBean], scope_str_paths: List[str]):
-        tp = PathNodeBeanList(path).to_path_string()
-        for sp in scope_str_paths:
-            if tp.startswith(sp):
-                return True
-        return False
-
+    @stage_span("scope_check")
     def check_policies(self, system_id: str, policies: List[PolicyBean]):
         """
         检查重构后的Policy结构
@@ -588,6 +571,7 @@ class RoleAuthorizationScopeChecker:
         for p in policies:
             self._check_policy_in_scope(system_id, p)
 
+    @stage_span("scope_check")
     def list_not_match_policy(self, system_id: str, policies: List[PolicyBean]) -> List[PolicyBean]:
         """与check_policies的检测逻辑一样，只是不直接抛异常，而是返回不满足的策略"""
         try:
@@ -751,24 +735,11 @@ class ActionScopeDiffer:
         return True
 
     def _diff_instances(self, template_instances: List[InstanceBean], scope_instances: List[InstanceBean]) -> bool:
-        scope_paths = []
-        for i in scope_instances:
-            for p in i.path:
-                sp = PathNodeBeanList(p).to_path_string()
-
-                # 处理路径中存在*的情况
-                if sp.endswith(",*/"):
-                    sp = sp[:-2]
-
-                scope_paths.append(sp)
+        matcher = PathScopeMatcher(PathNodeBeanList(p) for i in scope_instances for p in i.path)
 
         for i in template_instances:
             for p in i.path:
-                path = PathNodeBeanList(p).to_path_string()
-                for sp in scope_paths:
-                    if path.startswith(sp):
-                        break
-                else:
+                if not matcher.match(PathNodeBeanList(p)):
                     return False  # 模板中的某个路径, 不能满足任意一个范围中的路径
 
         return True
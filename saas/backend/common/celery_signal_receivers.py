@@ -8,11 +8,12 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-from celery.signals import task_failure, task_success
+from celery.signals import task_failure, task_postrun, task_success, worker_process_shutdown
 from werkzeug.local import release_local
 
-from backend.common.debug import log_task_error_trace
-from backend.common.local import celery_local
+from backend.common.debug import log_task_error_trace, receiver
+from backend.common.local import celery_local, local
+from backend.publisher.publisher import publisher
 
 
 @task_success.connect
@@ -31,3 +32,18 @@ def task_failure_handler(sender, exception, traceback, **kwargs):
         release_local(celery_local)
     except IndexError:
         return
+
+
+@task_postrun.connect
+def task_postrun_handler(sender=None, task_id=None, **kwargs):
+    # 清理task级别的memo
+    local.release_task_memo(task_id)
+    # 任务结束即推送任务中产生的删除策略消息, 不等待合并窗口, 避免子进程回收时丢失
+    publisher.flush()
+
+
+@worker_process_shutdown.connect
+def worker_process_shutdown_handler(**kwargs):
+    # celery子进程通过os._exit退出, 不会执行atexit, 需要在这里推送未发送的消息, 写入未落盘的调试信息
+    publisher.flush()
+    receiver.flush()
@@ -8,13 +8,18 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import atexit
 import json
 import logging
+import os
+import queue
+import random
 import re
+import threading
 import traceback
 from abc import ABCMeta, abstractmethod
-from copy import deepcopy
-from typing import Any, Dict, List
+from copy import copy
+from typing import Any, Dict, List, Optional
 
 from aenum import LowerStrEnum, auto
 from django.conf import settings
@@ -25,13 +30,14 @@ from django_redis import get_redis_connection
 from backend.common.local import Singleton, get_local
 from backend.util.json import json_dumps
 
-__all__ = ["RedisStorage", "http_trace", "log_api_error_trace", "log_task_error_trace"]
+__all__ = ["RedisStorage", "http_trace", "span_trace", "log_api_error_trace", "log_task_error_trace"]
 
 logger = logging.getLogger("app")
 
 
 class TraceType(LowerStrEnum):
     HTTP = auto()
+    SPAN = auto()
     API = auto()
     TASK = auto()
 
@@ -65,11 +71,28 @@ def http_trace(**kwargs):
         pass
 
 
+def span_trace(**kwargs):
+    """
+    策略操作各阶段的耗时
+    """
+    info = {"type": TraceType.SPAN.value}
+    info.update(kwargs)
+    try:
+        stack.push(info)
+    except IndexError:
+        pass
+
+
 class DebugObserver(metaclass=ABCMeta):
     @abstractmethod
     def update(self, data: Dict[str, Any]):
         pass
 
+    def flush(self):
+        """
+        写入尚未落盘的数据, 进程退出前调用
+        """
+
 
 class DebugReceiver(Singleton):
     """
@@ -94,17 +117,106 @@ class DebugReceiver(Singleton):
             except Exception:  # pylint: disable=broad-except
                 logger.exception(f"{ob.__class__.__name__} debug update fail")
 
+    def flush(self):
+        for ob in self._observers:
+            try:
+                ob.flush()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception(f"{ob.__class__.__name__} debug flush fail")
+
 
 class RedisObserver(DebugObserver):
+    sample_rate = settings.DEBUG_TRACE_SAMPLE_RATE
+
     def __init__(self) -> None:
         self.storage = RedisStorage()
+        self.flusher = TraceFlusher(self.storage) if settings.DEBUG_TRACE_ASYNC_FLUSH else None
 
     def update(self, data: Dict[str, Any]):
-        _type = data["type"]
-        if _type == TraceType.API.value:
-            self.storage.set_api_data(data)
-        elif _type == TraceType.TASK.value:
-            self.storage.set_task_data(data)
+        if data["type"] not in (TraceType.API.value, TraceType.TASK.value):
+            return
+
+        # 采样, 避免大量错误时写入过多的调试信息
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+
+        if self.flusher is not None:
+            self.flusher.put(data)
+        else:
+            self.storage.set_many([data])
+
+    def flush(self):
+        if self.flusher is not None:
+            self.flusher.flush()
+
+
+class TraceFlusher:
+    """
+    调试信息异步写入
+
+    请求/任务线程只把数据放入有界队列, 由后台线程批量清理敏感信息并写入redis, 队列满时直接丢弃
+    """
+
+    batch_size = 100
+
+    def __init__(self, storage: "RedisStorage", maxsize: int = settings.DEBUG_TRACE_QUEUE_SIZE) -> None:
+        self.storage = storage
+        self.queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = 0
+
+    def put(self, data: Dict[str, Any]):
+        self._ensure_thread()
+        try:
+            self.queue.put_nowait(data)
+        except queue.Full:
+            logger.warning("debug trace queue is full, drop trace %s", data.get("id"))
+
+    def flush(self):
+        """
+        将队列中已有的数据全部写入redis
+        """
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            self._write(batch)
+
+    def _ensure_thread(self):
+        # fork出的子进程中不存在父进程的线程, 需要重新启动
+        if self._thread is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="debug-trace-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            batch.extend(self._drain(self.batch_size - 1))
+            self._write(batch)
+
+    def _drain(self, limit: int = 0) -> List[Dict[str, Any]]:
+        limit = limit or self.batch_size
+        batch: List[Dict[str, Any]] = []
+        while len(batch) < limit:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            self.storage.set_many(batch)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("debug trace flush fail")
 
 
 class RedisStorage:
@@ -134,43 +246,58 @@ class RedisStorage:
 
         return [json.loads(one) for one in results if one]
 
-    def set_api_data(self, data: Dict[str, Any]):
-        self._set(data)
-
-    def set_task_data(self, data: Dict[str, Any]):
-        self._set(data)
-
-        # 如果是task产生的数据, 建立时间的索引
-        self._append_task(data["id"])
+    def set_profile(self, data: Dict[str, Any]):
+        """
+        保存请求的性能分析结果, 按天建立索引, 索引中只保存概要信息
+        """
+        profile_id = data["id"]
+        summary = {k: v for k, v in data.items() if k != "content"}
+        index_key = self._gen_profile_index_key()
+        with self.cli.pipeline(transaction=False) as pipe:
+            pipe.set(self._gen_profile_key(profile_id), json_dumps(data), ex=self.ttl)
+            pipe.lpush(index_key, json_dumps(summary))
+            pipe.ltrim(index_key, 0, self.queue_size - 1)
+            pipe.expire(index_key, self.ttl)
+            pipe.execute()
 
-    def _set(self, data):
-        key = data["id"]
-        clean_data = self.cleaner.clean(data)
-        self.cli.set(self._gen_redis_key(key), json_dumps(clean_data), ex=self.ttl)
+    def get_profile(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        value = self.cli.get(self._gen_profile_key(profile_id))
+        return json.loads(value) if value else None
 
-        # 保持队列长度
-        self._fixed_size(key)
+    def list_profile(self, day: str) -> List[Dict[str, Any]]:
+        return [json.loads(one) for one in self.cli.lrange(self._gen_profile_index_key(day), 0, -1)]
 
-    def _gen_redis_key(self, key):
-        return f"iam:debug:{key}"
+    def set_api_data(self, data: Dict[str, Any]):
+        self.set_many([data])
 
-    def _gen_task_key(self):
-        day = timezone.now().strftime("%Y%m%d")
-        return f"iam:debug:task:{day}"
+    def set_task_data(self, data: Dict[str, Any]):
+        self.set_many([data])
 
-    def _fixed_size(self, key):
+    def set_many(self, items: List[Dict[str, Any]]):
         """
-        保持定长队列长度
+        批量写入调试信息
+
+        写入数据, 入队, task时间索引与队列裁剪在同一个pipeline中完成, 只有队列超长时才额外删除被淘汰的key
         """
-        cnt = self.cli.lpush(self.queue_key, key)
-        if cnt <= self.queue_size:
+        if not items:
             return
 
-        # 保持队列长度, 删除多余的key
-        with self.cli.pipeline() as pipe:
+        task_key = self._gen_task_key()
+        with self.cli.pipeline(transaction=False) as pipe:
+            for data in items:
+                key = data["id"]
+                pipe.set(self._gen_redis_key(key), json_dumps(self.cleaner.clean(data)), ex=self.ttl)
+                pipe.lpush(self.queue_key, key)
+
+                # 如果是task产生的数据, 建立时间的索引
+                if data["type"] == TraceType.TASK.value:
+                    pipe.lpush(task_key, key)
+                    pipe.expire(task_key, self.ttl)
+
+            # 保持队列长度
             pipe.lrange(self.queue_key, self.queue_size, -1)
             pipe.ltrim(self.queue_key, 0, self.queue_size - 1)
-            del_keys = pipe.execute()[0]
+            del_keys = pipe.execute()[-2]
 
         if not del_keys:
             return
@@ -180,10 +307,19 @@ class RedisStorage:
                 pipe.delete(self._gen_redis_key(str(raw_key, encoding="utf-8")))
             pipe.execute()
 
-    def _append_task(self, _id):
-        key = self._gen_task_key()
-        self.cli.lpush(key, _id)
-        self.cli.expire(key, self.ttl)
+    def _gen_redis_key(self, key):
+        return f"iam:debug:{key}"
+
+    def _gen_profile_key(self, profile_id):
+        return f"iam:debug:profile:{profile_id}"
+
+    def _gen_profile_index_key(self, day=""):
+        day = day or timezone.now().strftime("%Y%m%d")
+        return f"iam:debug:profiles:{day}"
+
+    def _gen_task_key(self):
+        day = timezone.now().strftime("%Y%m%d")
+        return f"iam:debug:task:{day}"
 
 
 class SensitiveCleaner:
@@ -198,30 +334,54 @@ class SensitiveCleaner:
         self.sensitive_key_func = {"url": lambda value: re.sub(self.ip_pattern, "ip", value)}
 
     def clean(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        data = deepcopy(data)
-        self._clean(data)
-        return data
+        """
+        返回清理后的数据, 只复制有改写的容器, 未改写的部分与原数据共享
+        """
+        return self._clean(data)
+
+    def _clean(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        changed: Dict[Any, Any] = {}
+        for key, value in data.items():
+            new_value = self._clean_value(key, value)
+            if new_value is not value:
+                changed[key] = new_value
+
+        if not changed:
+            return data
+
+        new_data = copy(data)
+        for key, value in changed.items():
+            new_data[key] = value
+        return new_data
+
+    def _clean_value(self, key: Any, value: Any) -> Any:
+        if isinstance(value, dict):
+            return self._clean(value)
+
+        if isinstance(value, list):
+            new_list = [self._clean(one) if isinstance(one, dict) else one for one in value]
+            if any(new is not old for new, old in zip(new_list, value)):
+                return new_list
+            return value
+
+        if isinstance(value, str):
+            new_value = value
+            for sk in self.sensitive_keys:
+                if str(key).endswith(sk):
+                    new_value = "***"
 
-    def _clean(self, data: Dict[str, Any]):
-        for key in data.keys():
-            value = data[key]
+            if key in self.sensitive_key_func:
+                new_value = self.sensitive_key_func[key](new_value)
 
-            if isinstance(value, dict):
-                self._clean(value)
-            elif isinstance(value, list):
-                for one in value:
-                    if isinstance(one, dict):
-                        self._clean(one)
-            elif isinstance(value, str):
-                for sk in self.sensitive_keys:
-                    if str(key).endswith(sk):
-                        data[key] = "***"
+            if new_value != value:
+                return new_value
 
-                if key in self.sensitive_key_func:
-                    data[key] = self.sensitive_key_func[key](value)
+        return value
 
 
 receiver = DebugReceiver()
+# 进程退出前写入异步队列中未落盘的调试信息, celery子进程退出不会触发atexit, 见celery_signal_receivers
+atexit.register(receiver.flush)
 
 
 def log_api_error_trace(request, force=False):
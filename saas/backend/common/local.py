@@ -11,8 +11,11 @@ specific language governing permissions and limitations under the License.
 全局相关
 """
 
+import functools
 import inspect
+from typing import Any, Callable, Dict, Optional
 
+from celery import current_task
 from celery.app.task import Task
 from werkzeug.local import Local as _Local
 from werkzeug.local import release_local
@@ -21,6 +24,9 @@ from backend.util.uuid import gen_uuid
 
 _local = _Local()
 
+# celery task级别的memo, key为task_id, 在task结束时清理
+_task_memos: Dict[str, Dict[Any, Any]] = {}
+
 
 def new_request_id():
     return gen_uuid()
@@ -82,9 +88,47 @@ class Local(Singleton):
 
         return ""
 
+    @property
+    def memo(self) -> Optional[Dict[Any, Any]]:
+        """
+        请求级别的memo, 随release一起清理
+        celery task中使用task级别的memo, 在task结束时清理; 两者都不存在时返回None, 即不做memo
+        """
+        if self.request is not None:
+            if not hasattr(_local, "memo"):
+                _local.memo = {}
+            return _local.memo
+
+        task_id = current_task.request.id if current_task else None
+        if task_id:
+            return _task_memos.setdefault(task_id, {})
+
+        return None
+
+    def release_task_memo(self, task_id: str):
+        _task_memos.pop(task_id, None)
+
     def release(self):
         release_local(_local)
 
+    def bind(self, func: Callable) -> Callable:
+        """
+        线程池的工作线程中看不到当前线程的local变量(request及其request_id, 调试信息栈等)
+        返回的函数在工作线程中使用当前线程的local变量执行, 结束后清理工作线程的local
+        """
+        values = dict(_local.__storage__.get(_local.__ident_func__(), {}))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for key, value in values.items():
+                setattr(_local, key, value)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                release_local(_local)
+
+        return wrapper
+
 
 local = Local()
 
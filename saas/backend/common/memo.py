@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+请求级别的memo
+
+同一个请求(或celery task)内, 相同参数的查询只执行一次, 请求结束时随local.release()清理
+"""
+import functools
+from copy import deepcopy
+from typing import Any, Hashable
+
+from backend.common.local import local
+
+__all__ = ["request_memoize", "invalidate_request_memo"]
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return frozenset(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def request_memoize(namespace: str, copy: bool = False):
+    """装饰器：请求级别的memo
+    Note: 与region.cache_on_arguments()一样, 用于类的方法时会忽略self参数
+
+    namespace: memo的命名空间, 用于invalidate_request_memo清理
+    copy: 是否返回深拷贝, 调用方会修改返回数据时需要设置为True
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            memo = local.memo
+            if memo is None:
+                return func(self, *args, **kwargs)
+
+            key = (namespace, _freeze(args), _freeze(kwargs))
+            if key not in memo:
+                memo[key] = func(self, *args, **kwargs)
+
+            return deepcopy(memo[key]) if copy else memo[key]
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_request_memo(namespace: str):
+    """
+    清理当前请求中指定命名空间的memo, 数据变更后需要调用
+    """
+    memo = local.memo
+    if not memo:
+        return
+
+    for key in [key for key in memo if key[0] == namespace]:
+        memo.pop(key)
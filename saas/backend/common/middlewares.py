@@ -8,31 +8,101 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import itertools
+import logging
+import time
+
 from django.conf import settings
+from pyinstrument import Profiler
 from pyinstrument.middleware import ProfilerMiddleware
+from pyinstrument.renderers.html import HTMLRenderer
+from pyinstrument.renderers.jsonrenderer import JSONRenderer
 
+from backend.common.debug import RedisStorage
 from backend.common.local import local
 
+logger = logging.getLogger("app")
+
 
 class CustomProfilerMiddleware(ProfilerMiddleware):
     """
     自定义 pyinstrument 中间件，便于开启和配置仅API请求统计性能
+
+    - ENABLE_PYINSTRUMENT: 统计所有API请求, 结果保存到PYINSTRUMENT_PROFILE_DIR
+    - 采样模式: 按采样率/耗时阈值/调试请求头统计, 结果保存到debug redis中, 可通过/debug/profiles/查看
     """
 
+    renderers = {"html": HTMLRenderer, "json": JSONRenderer}
+
     def __init__(self, get_response=None):
         self.get_response = get_response
+        self._counter = itertools.count(1)
+        self._storage = None
 
     def __call__(self, request):
         response = None
         # 仅仅统计API请求的性能
         api_url_prefix = f"{settings.SITE_URL}api/v1"
+        if not request.path.startswith(api_url_prefix):
+            return self.get_response(request)
+
         # 开启了统计性能并且请求为API请求，则统计
-        if getattr(settings, "ENABLE_PYINSTRUMENT", False) and request.path.startswith(api_url_prefix):
+        if getattr(settings, "ENABLE_PYINSTRUMENT", False):
             response = self.process_request(request)
+            response = response or self.get_response(request)
+            return self.process_response(request, response)
 
-        response = response or self.get_response(request)
+        is_debug = request.META.get(settings.PYINSTRUMENT_DEBUG_HEADER, "") != ""
+        if not (is_debug or self._should_sample()):
+            return self.get_response(request)
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            session = profiler.stop()
+
+        if self._should_keep(request, is_debug, session.duration):
+            self._save(request, session)
+
+        return response
 
-        return self.process_response(request, response)
+    def _should_sample(self) -> bool:
+        if settings.PYINSTRUMENT_SAMPLE_RATE > 0:
+            return next(self._counter) % settings.PYINSTRUMENT_SAMPLE_RATE == 0
+
+        # 只配置了耗时阈值时, 需要统计所有请求
+        return settings.PYINSTRUMENT_SLOW_THRESHOLD > 0
+
+    def _should_keep(self, request, is_debug: bool, duration: float) -> bool:
+        if is_debug:
+            # 调试请求头只对白名单中的用户生效, 用户在认证后才能确定
+            user = getattr(request, "user", None)
+            return getattr(user, "username", "") in settings.PYINSTRUMENT_DEBUG_USERS
+
+        return duration >= settings.PYINSTRUMENT_SLOW_THRESHOLD
+
+    def _save(self, request, session):
+        renderer = settings.PYINSTRUMENT_RENDERER if settings.PYINSTRUMENT_RENDERER in self.renderers else "html"
+        try:
+            if self._storage is None:
+                self._storage = RedisStorage()
+
+            self._storage.set_profile(
+                {
+                    "id": getattr(request, "request_id", "") or local.request_id,
+                    "path": request.path,
+                    "method": request.method,
+                    "username": getattr(getattr(request, "user", None), "username", ""),
+                    "duration": round(session.duration, 3),
+                    "renderer": renderer,
+                    "created_at": int(time.time()),
+                    "content": self.renderers[renderer]().render(session),
+                }
+            )
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("save profile of %s fail", request.path)
 
 
 class RequestProvider(object):
@@ -22,12 +22,17 @@ import logging
 import time
 import traceback
 from functools import partial
-from urllib.parse import urlparse
 
 import requests
 
 from backend.common.debug import http_trace
-from backend.metrics import component_request_duration, get_component_by_url
+from backend.metrics import (
+    component_request_duration,
+    component_request_size,
+    component_response_size,
+    get_component_route,
+)
+from backend.metrics.span import stage_span
 
 logger = logging.getLogger("component")
 
@@ -39,6 +44,13 @@ def _gen_header():
     return headers
 
 
+def _get_body_size(body) -> int:
+    if not body:
+        return 0
+    return len(body.encode("utf-8")) if isinstance(body, str) else len(body)
+
+
+@stage_span("component")
 def _http_request(method, url, headers=None, data=None, timeout=None, verify=False, cert=None, cookies=None):
     trace_func = partial(http_trace, method=method, url=url, data=data)
 
@@ -75,12 +87,17 @@ def _http_request(method, url, headers=None, data=None, timeout=None, verify=Fal
     else:
         # record for /metrics
         latency = int((time.time() - st) * 1000)
+        component, path = get_component_route(url)
         component_request_duration.labels(
-            component=get_component_by_url(url),
+            component=component,
             method=method,
-            path=urlparse(url).path,
+            path=path,
             status=resp.status_code,
         ).observe(latency)
+        component_request_size.labels(component=component, method=method, path=path).observe(
+            _get_body_size(resp.request.body)
+        )
+        component_response_size.labels(component=component, method=method, path=path).observe(len(resp.content))
 
         if resp.status_code != 200:
             content = resp.content[:100] if resp.content else ""
@@ -12,6 +12,7 @@ import logging
 from typing import Dict, List, Tuple
 
 from django.conf import settings
+from dogpile.cache.api import NO_VALUE
 
 from backend.common.error_codes import error_codes
 from backend.common.local import local
@@ -87,14 +88,35 @@ def get_system(system_id: str, fields: str = DEFAULT_SYSTEM_FIELDS) -> Dict:
     return _call_iam_api(http_get, url_path, data={"fields": fields})
 
 
-@region.cache_on_arguments(expiration_time=60)  # 缓存1分钟
 def list_resource_type(systems: List[str], fields: str = DEFAULT_RESOURCE_TYPE_FIELDS) -> Dict[str, List[Dict]]:
     """
     查询系统的资源类型
-    """
-    url_path = "/api/v1/web/resource-types"
-    params = {"systems": ",".join(systems), "fields": fields}
-    return _call_iam_api(http_get, url_path, data=params)
+    按系统缓存1分钟, 与传入的系统顺序无关, 只有未缓存的系统才会批量查询
+    """
+    system_ids = list(dict.fromkeys(systems))  # 去重并保持顺序
+    keys = [_resource_type_cache_key(system_id, fields) for system_id in system_ids]
+
+    system_resource_types = {}
+    missing_system_ids = []
+    for system_id, value in zip(system_ids, region.get_multi(keys, expiration_time=60)):
+        if value is NO_VALUE:
+            missing_system_ids.append(system_id)
+        else:
+            system_resource_types[system_id] = value
+
+    if missing_system_ids:
+        url_path = "/api/v1/web/resource-types"
+        params = {"systems": ",".join(missing_system_ids), "fields": fields}
+        data = _call_iam_api(http_get, url_path, data=params)
+
+        region.set_multi({_resource_type_cache_key(system_id, fields): value for system_id, value in data.items()})
+        system_resource_types.update(data)
+
+    return system_resource_types
+
+
+def _resource_type_cache_key(system_id: str, fields: str) -> str:
+    return f"iam:list_resource_type:{system_id}:{fields}"
 
 
 @region.cache_on_arguments(expiration_time=60)  # 缓存1分钟
@@ -393,6 +415,10 @@ def alter_policies(
     }]
 
     delete_policy_ids: [2, 3, 4]
+
+    return: {
+        "create_policy_ids": {"view_host": 5}  # 新创建策略的action_id -> policy_id, 旧版本后端可能不返回
+    }
     """
     url_path = f"/api/v1/web/systems/{system_id}/policies"
     data = {
@@ -25,7 +25,8 @@ from backend.common.debug import http_trace
 from backend.common.error_codes import error_codes
 from backend.common.i18n import get_bk_language
 from backend.common.local import local
-from backend.metrics import callback_request_duration
+from backend.metrics import callback_request_duration, callback_request_size, callback_response_size
+from backend.metrics.span import stage_span
 from backend.util.cache import region
 
 request_pool = requests.Session()
@@ -104,6 +105,7 @@ class ResourceProviderClient:
         self.http_auth = _generate_http_auth(auth_info)
         self.timeout = 30
 
+    @stage_span("callback")
     def _call_api(self, data):
         """调用请求API"""
         trace_func = partial(http_trace, method="post", url=self.url, data=data)
@@ -169,6 +171,12 @@ class ResourceProviderClient:
                 path=urlparse(self.url).path,
                 status=resp.status_code,
             ).observe(latency)
+            callback_request_size.labels(
+                system=self.system_id, resource_type=self.resource_type_id, function=data["method"]
+            ).observe(len(resp.request.body or b""))
+            callback_response_size.labels(
+                system=self.system_id, resource_type=self.resource_type_id, function=data["method"]
+            ).observe(len(resp.content))
         except requests.exceptions.RequestException as e:
             logger.exception(f"RequestException! {base_log_msg} ")
             trace_func(exc=traceback.format_exc())
@@ -44,6 +44,27 @@ def retrieve_user(username) -> Dict:
     return _call_esb_api(http_get, url_path, data=params)
 
 
+def list_user_by_usernames(usernames: List[str]) -> List[Dict]:
+    """批量查询指定用户名的用户信息，不存在的用户不会返回"""
+    exact_lookups = ",".join(usernames)
+
+    def list_paging_user(page: int, page_size: int) -> Tuple[int, List[Dict]]:
+        """[分页]获取指定用户名的用户列表"""
+        url_path = "/api/c/compapi/v2/usermanage/list_users/"
+        params = {
+            "fields": "id,username,display_name,staff_status,category_id",
+            "ordering": "id",
+            "page": page,
+            "page_size": page_size,
+            "lookup_field": "username",
+            "exact_lookups": exact_lookups,
+        }
+        data = _call_esb_api(http_get, url_path, data=params)
+        return data["count"], data["results"]
+
+    return list_all_data_by_paging(list_paging_user, USERMGR_DEFAULT_PAGE_SIZE)
+
+
 def list_new_user(end_utc_time: datetime.datetime, minute_delta: int = 0) -> List[Dict]:
     """查询新增用户，条件是时间"""
     # 生成要查询的条件
@@ -14,5 +14,7 @@ from . import views
 
 urlpatterns = [
     path("", views.DebugViewSet.as_view({"get": "list"}), name="debug.list_debug"),
+    path("profiles/", views.ProfileViewSet.as_view({"get": "list"}), name="debug.list_profile"),
+    path("profiles/<str:id>/", views.ProfileViewSet.as_view({"get": "retrieve"}), name="debug.profile_detail"),
     path("<str:id>/", views.DebugViewSet.as_view({"get": "retrieve"}), name="debug.detail"),
 ]
@@ -8,6 +8,7 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+from django.http import HttpResponse
 from django.utils import timezone
 from drf_yasg.openapi import Response as yasg_response
 from drf_yasg.utils import swagger_auto_schema
@@ -18,6 +19,7 @@ from rest_framework.viewsets import GenericViewSet
 
 from backend.common.authentication import BasicAppCodeAuthentication
 from backend.common.debug import RedisStorage
+from backend.common.error_codes import error_codes
 from backend.common.swagger import ResponseSwaggerAutoSchema
 
 
@@ -51,3 +53,42 @@ class DebugViewSet(GenericViewSet):
         _id = kwargs["id"]
         data = RedisStorage().get(_id)
         return Response(data)
+
+
+class ProfileViewSet(GenericViewSet):
+
+    authentication_classes = [BasicAppCodeAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    paginator = None  # 去掉swagger中的limit offset参数
+
+    lookup_field = "id"
+
+    content_types = {"html": "text/html; charset=utf-8", "json": "application/json"}
+
+    @swagger_auto_schema(
+        operation_description="API请求性能分析列表",
+        auto_schema=ResponseSwaggerAutoSchema,
+        responses={status.HTTP_200_OK: yasg_response([])},
+        tags=["debug"],
+    )
+    def list(self, request, *args, **kwargs):
+        day = request.query_params.get("day", timezone.now().strftime("%Y%m%d"))
+        data = RedisStorage().list_profile(day)
+        return Response(data)
+
+    @swagger_auto_schema(
+        operation_description="下载API请求性能分析结果",
+        auto_schema=ResponseSwaggerAutoSchema,
+        tags=["debug"],
+    )
+    def retrieve(self, request, *args, **kwargs):
+        _id = kwargs["id"]
+        data = RedisStorage().get_profile(_id)
+        if not data:
+            raise error_codes.NOT_FOUND_ERROR
+
+        renderer = data["renderer"]
+        response = HttpResponse(data["content"], content_type=self.content_types.get(renderer, "text/plain"))
+        response["Content-Disposition"] = f'attachment; filename="{_id}.{renderer}"'
+        return response
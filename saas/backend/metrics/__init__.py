@@ -9,10 +9,16 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+import re
+from typing import List, Pattern, Tuple
 from urllib.parse import urlparse
 
 from aenum import LowerStrEnum, auto
-from prometheus_client import Histogram
+from django.conf import settings
+from prometheus_client import Counter, Histogram
+
+# 未知的路径统一使用该标签, 避免标签数量无限增长
+OTHER_PATH = "other"
 
 
 class ComponentEnum(LowerStrEnum):
@@ -24,8 +30,46 @@ class ComponentEnum(LowerStrEnum):
     CMSI = auto()
 
 
+# 路径中带有ID的URL族, 按顺序匹配, 替换为模板后作为标签
+_ROUTE_TEMPLATES: List[Tuple[Pattern, str]] = [
+    (re.compile(pattern), template)
+    for pattern, template in [
+        (
+            r"/api/v1/web/systems/[^/]+/actions/[^/]+/policies$",
+            "/api/v1/web/systems/{system_id}/actions/{action_id}/policies",
+        ),
+        (r"/api/v1/web/systems/[^/]+/actions/[^/]+$", "/api/v1/web/systems/{system_id}/actions/{action_id}"),
+        (r"/api/v1/web/systems/[^/]+(?P<sub>/[a-z\-/]+)?$", r"/api/v1/web/systems/{system_id}\g<sub>"),
+        (r"/api/v1/web/model-change-event/[^/]+$", "/api/v1/web/model-change-event/{event_pk}"),
+    ]
+]
+
+
 def get_component_by_url(url: str) -> str:
+    return get_component_route(url)[0]
+
+
+def get_component_route(url: str) -> Tuple[str, str]:
+    """
+    获取url对应的组件与用于标签的路径
+
+    已知的URL族替换为路径模板, 其他已知组件的路径是固定的, 未知组件的路径只有在白名单中才保留
+    """
     path = urlparse(url).path
+    component = _get_component_by_path(path)
+    if component == ComponentEnum.IAM_BACKEND.value:
+        for pattern, template in _ROUTE_TEMPLATES:
+            m = pattern.search(path)
+            if m:
+                return component, path[: m.start()] + m.expand(template)
+
+    if component != "unknown" or _is_path_allowed(path):
+        return component, path
+
+    return component, OTHER_PATH
+
+
+def _get_component_by_path(path: str) -> str:
     if "/api/v1/web/" in path:
         return ComponentEnum.IAM_BACKEND.value
     elif "/api/v1/engine" in path or "/api/v1/batch-search" in path:
@@ -41,6 +85,10 @@ def get_component_by_url(url: str) -> str:
     return "unknown"
 
 
+def _is_path_allowed(path: str) -> bool:
+    return any(path.startswith(prefix) for prefix in settings.METRICS_PATH_ALLOW_LIST)
+
+
 # for usermgr/itsm/login/iam_backend
 component_request_duration = Histogram(
     "bkiam_component_request_duration_milliseconds",
@@ -56,3 +104,56 @@ callback_request_duration = Histogram(
     ("system", "resource_type", "function", "method", "path", "status"),
     buckets=(50, 100, 200, 500, 1000, 2000, 5000),
 )
+
+# 请求与响应的大小, 用于分析数据量对耗时的影响
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+component_request_size = Histogram(
+    "bkiam_component_request_size_bytes",
+    "The size of the request body, partitioned by component, method and HTTP path.",
+    ("component", "method", "path"),
+    buckets=SIZE_BUCKETS,
+)
+
+component_response_size = Histogram(
+    "bkiam_component_response_size_bytes",
+    "The size of the response body, partitioned by component, method and HTTP path.",
+    ("component", "method", "path"),
+    buckets=SIZE_BUCKETS,
+)
+
+callback_request_size = Histogram(
+    "bkiam_callback_request_size_bytes",
+    "The size of the callback request body, partitioned by system, resource type and function.",
+    ("system", "resource_type", "function"),
+    buckets=SIZE_BUCKETS,
+)
+
+callback_response_size = Histogram(
+    "bkiam_callback_response_size_bytes",
+    "The size of the callback response body, partitioned by system, resource type and function.",
+    ("system", "resource_type", "function"),
+    buckets=SIZE_BUCKETS,
+)
+
+# for stages of policy operation, see backend.metrics.span
+policy_operation_stage_duration = Histogram(
+    "bkiam_policy_operation_stage_duration_milliseconds",
+    "How long each stage of the policy operation took, partitioned by system, operation and stage.",
+    ("system", "operation", "stage"),
+    buckets=(5, 10, 50, 100, 200, 500, 1000, 2000, 5000, 10000),
+)
+
+# for policy change concurrency control, lock: 等待锁的时间, optimistic: 因版本冲突而浪费的时间
+policy_change_wait_duration = Histogram(
+    "bkiam_policy_change_wait_duration_milliseconds",
+    "How long the policy change waited for concurrency control, partitioned by mode and system.",
+    ("mode", "system"),
+    buckets=(1, 5, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+
+policy_change_conflict_total = Counter(
+    "bkiam_policy_change_conflict_total",
+    "How many optimistic policy changes conflicted and retried, partitioned by system.",
+    ("system",),
+)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+策略变更链路的分阶段耗时
+
+operation_span标记一次策略操作(如授权), 操作内的stage_span记录各阶段的耗时:
+- 上报到prometheus, 标签为系统, 操作与阶段, 阶段total为整个操作的耗时
+- 开启settings.ENABLE_DEBUG_TRACE_SPAN时, 操作结束后把各阶段耗时放入调试信息, 随api/task的错误跟踪信息一起记录
+
+不在操作内的stage_span不做任何记录; 阶段可以嵌套, 耗时包含嵌套的阶段
+"""
+import functools
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from backend.common.debug import span_trace
+
+from . import policy_operation_stage_duration
+
+STAGE_TOTAL = "total"
+
+_local = threading.local()
+
+
+class OperationSpan:
+    def __init__(self, operation: str, system_id: str) -> None:
+        self.operation = operation
+        self.system_id = system_id
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+        # 线程池中的阶段会并发记录到同一个操作
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, cost: float):
+        with self._lock:
+            self.stages[stage] += cost
+            self.counts[stage] += 1
+        policy_operation_stage_duration.labels(system=self.system_id, operation=self.operation, stage=stage).observe(
+            cost
+        )
+
+    def to_trace(self) -> Dict:
+        return {
+            "operation": self.operation,
+            "system": self.system_id,
+            "stages": {stage: {"cost": int(cost), "count": self.counts[stage]} for stage, cost in self.stages.items()},
+        }
+
+
+def get_current_operation() -> Optional[OperationSpan]:
+    return getattr(_local, "operation", None)
+
+
+@contextmanager
+def operation_span(operation: str, system_id: str):
+    """
+    标记一次策略操作, 已在操作内时不重复标记, 阶段耗时记录到外层操作
+    """
+    if get_current_operation() is not None:
+        yield
+        return
+
+    span = OperationSpan(operation, system_id)
+    _local.operation = span
+    start = time.time()
+    try:
+        yield
+    finally:
+        _local.operation = None
+        span.record(STAGE_TOTAL, (time.time() - start) * 1000)
+
+        if settings.ENABLE_DEBUG_TRACE_SPAN:
+            span_trace(**span.to_trace())
+
+
+@contextmanager
+def stage_span(stage: str):
+    """
+    记录阶段耗时, 可作为装饰器使用
+    """
+    span = get_current_operation()
+    if span is None:
+        yield
+        return
+
+    start = time.time()
+    try:
+        yield
+    finally:
+        span.record(stage, (time.time() - start) * 1000)
+
+
+def bind_operation(func):
+    """
+    线程池的工作线程中看不到当前线程的策略操作, 返回的函数在工作线程中把阶段耗时记录到当前操作
+    """
+    span = get_current_operation()
+    if span is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _local.operation = span
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.operation = None
+
+    return wrapper
+
+
+def trace_operation(operation: str):
+    """
+    装饰器: 标记策略操作
+    Note: 与policy_change_lock一样, 被装饰的函数必须有参数system_id, 用于类的方法时需要使用method_decorator
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            system_id = kwargs["system_id"] if "system_id" in kwargs else args[0]
+            with operation_span(operation, system_id):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import threading
+from typing import Dict, List, Optional
+
+import redis
+from django.conf import settings
+
+from backend.util.json import json_dumps
+
+from .constants import (
+    DELETE_POLICY_PUB_SUB_KEY,
+    DELETE_POLICY_REDIS_LIST_MAX_LENGTH,
+    DELETE_POLICY_STREAM_KEY,
+    DELETE_POLICY_STREAM_MAX_LENGTH,
+    DELETE_POLICY_STREAM_MESSAGE_FIELD,
+    PubSubBackendEnum,
+)
+
+_lock = threading.Lock()
+_client: Optional[redis.Redis] = None
+
+
+def is_pub_sub_enabled() -> bool:
+    """若没有Redis配置，则不需要推送"""
+    return bool(getattr(settings, "PUB_SUB_REDIS_HOST", None))
+
+
+def get_pub_sub_redis() -> redis.Redis:
+    """
+    用于订阅推送的Redis, 进程内共享连接池
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                pool = redis.ConnectionPool(
+                    host=settings.PUB_SUB_REDIS_HOST,
+                    port=int(settings.PUB_SUB_REDIS_PORT),
+                    db=int(settings.PUB_SUB_REDIS_DB),
+                    password=settings.PUB_SUB_REDIS_PASSWORD,
+                    decode_responses=True,
+                    # 推送不能长时间阻塞调用者
+                    socket_connect_timeout=5,
+                    socket_timeout=5,
+                )
+                _client = redis.Redis(connection_pool=pool)
+    return _client
+
+
+def push_delete_policies_messages(messages: List[Dict]):
+    """
+    使用pipeline一次性将消息添加到Redis队列里
+    """
+    if not messages:
+        return
+
+    with get_pub_sub_redis().pipeline(transaction=False) as pipe:
+        if settings.PUB_SUB_BACKEND == PubSubBackendEnum.STREAM.value:
+            for m in messages:
+                # Note: redis-py 2.x 不支持Streams命令, 直接执行原生命令; MAXLEN ~ 近似裁剪, 性能更好
+                pipe.execute_command(
+                    "XADD",
+                    DELETE_POLICY_STREAM_KEY,
+                    "MAXLEN",
+                    "~",
+                    DELETE_POLICY_STREAM_MAX_LENGTH,
+                    "*",
+                    DELETE_POLICY_STREAM_MESSAGE_FIELD,
+                    json_dumps(m),
+                )
+        else:
+            pipe.lpush(DELETE_POLICY_PUB_SUB_KEY, *[json_dumps(m) for m in messages])
+            # 队列长度最多1万，避免长时间不消费导致的问题
+            pipe.ltrim(DELETE_POLICY_PUB_SUB_KEY, 0, DELETE_POLICY_REDIS_LIST_MAX_LENGTH - 1)
+        pipe.execute()
@@ -13,6 +13,19 @@ from aenum import LowerStrEnum, auto
 DELETE_POLICY_PUB_SUB_KEY = "bk_iam:deleted_policy"
 DELETE_POLICY_REDIS_LIST_MAX_LENGTH = 10000
 
+# Redis Streams, 消费者通过消费组各自记录消费进度
+DELETE_POLICY_STREAM_KEY = "bk_iam:deleted_policy:stream"
+DELETE_POLICY_STREAM_MAX_LENGTH = 100000
+DELETE_POLICY_STREAM_MESSAGE_FIELD = "message"
+
+
+# 订阅推送的存储方式
+class PubSubBackendEnum(LowerStrEnum):
+    # Redis List, 所有消费者竞争消费
+    LIST = auto()
+    # Redis Streams, 支持多个消费组独立消费与确认
+    STREAM = auto()
+
 
 # 枚举策略删除时的方式：用策略ID删除、直接删除Subject导致策略删除
 class DeletePolicyTypeEnum(LowerStrEnum):
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from .connection import is_pub_sub_enabled, push_delete_policies_messages
+from .tasks import publish_delete_policies_message_by_celery
+
+logger = logging.getLogger("app")
+
+# 合并后单条消息data里列表的最大长度, 避免单条消息过大
+MESSAGE_MAX_ITEMS = 5000
+
+
+class DeletePolicyPublisher:
+    """
+    删除策略的订阅推送
+
+    1. 进程内合并一个时间窗口内的同类型消息, 窗口结束后统一推送
+    2. 使用共享连接池的Redis pipeline直接推送, 推送失败时才退回到celery任务
+    """
+
+    def __init__(self, batch_window: float) -> None:
+        self.batch_window = batch_window
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._buffer: Dict[str, Dict[str, List]] = defaultdict(lambda: defaultdict(list))
+        self._timer: Optional[threading.Timer] = None
+
+    def _reset_after_fork(self):
+        # fork出的子进程中不存在父进程的定时器线程, 继承的锁与缓冲也不可用(缓冲由父进程负责推送), 需要重置
+        if self._pid != os.getpid():
+            self._reset()
+
+    def publish(self, _type: str, data: Dict[str, List]):
+        """
+        data: 需要根据type传入对应的数据, 每个字段都是列表, 同类型消息按字段合并
+        """
+        if not is_pub_sub_enabled():
+            return
+
+        if self.batch_window <= 0:
+            self._send(self._gen_messages({_type: data}))
+            return
+
+        self._reset_after_fork()
+        with self._lock:
+            for key, values in data.items():
+                self._buffer[_type][key].extend(values)
+
+            if self._timer is None:
+                timer = threading.Timer(self.batch_window, self.flush)
+                timer.daemon = True
+                timer.start()
+                self._timer = timer
+
+    def flush(self):
+        self._reset_after_fork()
+        with self._lock:
+            buffer, self._buffer = self._buffer, defaultdict(lambda: defaultdict(list))
+            self._timer = None
+
+        if buffer:
+            self._send(self._gen_messages(buffer))
+
+    def _gen_messages(self, buffer: Dict[str, Dict[str, List]]) -> List[Dict]:
+        timestamp = int(time.time())
+        messages = []
+        for _type, data in buffer.items():
+            size = max([len(values) for values in data.values()] or [0])
+            for i in range(0, max(size, 1), MESSAGE_MAX_ITEMS):
+                messages.append(
+                    {
+                        "timestamp": timestamp,
+                        "type": _type,
+                        "data": {key: values[i : i + MESSAGE_MAX_ITEMS] for key, values in data.items()},
+                    }
+                )
+        return messages
+
+    def _send(self, messages: List[Dict]):
+        # 由于订阅并非主要流程，所以错误不能引发调用者的任何异常
+        try:
+            push_delete_policies_messages(messages)
+            return
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("publish delete policies message by redis error, fallback to celery")
+
+        for message in messages:
+            publish_delete_policies_message_by_celery(message)
+
+
+publisher = DeletePolicyPublisher(settings.PUB_SUB_PUBLISH_BATCH_WINDOW)
+# 进程退出前推送未发送的消息, celery子进程退出不会触发atexit, 见celery_signal_receivers
+atexit.register(publisher.flush)
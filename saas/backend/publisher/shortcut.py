@@ -11,12 +11,12 @@ specific language governing permissions and limitations under the License.
 from typing import Dict, List
 
 from .constants import DeletePolicyTypeEnum
-from .tasks import publish_delete_policies
+from .publisher import publisher
 
 
 def publish_delete_policies_by_id(policy_ids: List[int]):
     if len(policy_ids) > 0:
-        publish_delete_policies(DeletePolicyTypeEnum.POLICY.value, {"policy_ids": policy_ids})
+        publisher.publish(DeletePolicyTypeEnum.POLICY.value, {"policy_ids": policy_ids})
 
 
 def publish_delete_policies_by_subject(subjects: List[Dict]):
@@ -24,11 +24,11 @@ def publish_delete_policies_by_subject(subjects: List[Dict]):
     subjects: [{"type", "id"}, ...]
     """
     if len(subjects) > 0:
-        publish_delete_policies(DeletePolicyTypeEnum.SUBJECT.value, {"subjects": subjects})
+        publisher.publish(DeletePolicyTypeEnum.SUBJECT.value, {"subjects": subjects})
 
 
 def publish_delete_policies_by_template_subject(template_id: int, subject_type: str, subject_id: str):
-    publish_delete_policies(
+    publisher.publish(
         DeletePolicyTypeEnum.SUBJECT_TEMPLATE.value,
         {"subject_templates": [{"template_id": template_id, "subject": {"type": subject_type, "id": subject_id}}]},
     )
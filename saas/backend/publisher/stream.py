@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+
+from .connection import get_pub_sub_redis
+from .constants import DELETE_POLICY_STREAM_KEY, DELETE_POLICY_STREAM_MESSAGE_FIELD
+
+
+class DeletePolicyStreamConsumer:
+    """
+    删除策略变更流的消费者
+
+    每个下游缓存使用独立的消费组, 各自记录消费进度, 互不影响
+    消费后需要调用ack确认, 未确认的消息可以通过read_pending重新获取
+    """
+
+    def __init__(self, group: str, consumer: str, client: Optional[redis.Redis] = None) -> None:
+        self.group = group
+        self.consumer = consumer
+        self.client = client or get_pub_sub_redis()
+
+    def ensure_group(self, start_id: str = "$"):
+        """
+        创建消费组, 默认只消费创建之后的消息; 已存在则忽略
+        """
+        try:
+            self.client.execute_command("XGROUP", "CREATE", DELETE_POLICY_STREAM_KEY, self.group, start_id, "MKSTREAM")
+        except redis.ResponseError as error:
+            if "BUSYGROUP" not in str(error):
+                raise
+
+    def read(self, count: int = 100, block_ms: Optional[int] = None) -> List[Tuple[str, Dict]]:
+        """
+        读取新消息
+        """
+        return self._read_group(">", count, block_ms)
+
+    def read_pending(self, count: int = 100) -> List[Tuple[str, Dict]]:
+        """
+        读取已投递给当前消费者但未确认的消息, 用于消费者重启后恢复
+        """
+        return self._read_group("0", count, None)
+
+    def ack(self, message_ids: List[str]) -> int:
+        if not message_ids:
+            return 0
+        return self.client.execute_command("XACK", DELETE_POLICY_STREAM_KEY, self.group, *message_ids)
+
+    def _read_group(self, start_id: str, count: int, block_ms: Optional[int]) -> List[Tuple[str, Dict]]:
+        args: List[Any] = ["XREADGROUP", "GROUP", self.group, self.consumer, "COUNT", count]
+        if block_ms is not None:
+            args.extend(["BLOCK", block_ms])
+        args.extend(["STREAMS", DELETE_POLICY_STREAM_KEY, start_id])
+
+        # 返回格式: [[stream, [[id, [field, value, ...]], ...]]]
+        resp = self.client.execute_command(*args) or []
+        messages: List[Tuple[str, Dict]] = []
+        for _, entries in resp:
+            for message_id, fields in entries:
+                # 已被裁剪的消息fields为空
+                if not fields:
+                    messages.append((message_id, {}))
+                    continue
+                field_dict = dict(zip(fields[::2], fields[1::2]))
+                messages.append((message_id, json.loads(field_dict[DELETE_POLICY_STREAM_MESSAGE_FIELD])))
+        return messages
@@ -9,16 +9,11 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 import logging
-import time
 from typing import Dict
 
-import redis
 from celery import task
-from django.conf import settings
 
-from backend.util.json import json_dumps
-
-from .constants import DELETE_POLICY_PUB_SUB_KEY, DELETE_POLICY_REDIS_LIST_MAX_LENGTH, DeletePolicyTypeEnum
+from .connection import is_pub_sub_enabled, push_delete_policies_messages
 
 logger = logging.getLogger("celery")
 
@@ -28,36 +23,17 @@ def publish_delete_policies_message(message: Dict):
     """
     删除策略订阅推送
     """
-    # 1. 查询用于订阅推送的Redis信息
     # 若没有Redis配置，则直接忽略
-    if not getattr(settings, "PUB_SUB_REDIS_HOST", None):
+    if not is_pub_sub_enabled():
         return
 
-    rds = redis.Redis(
-        host=settings.PUB_SUB_REDIS_HOST,
-        port=int(settings.PUB_SUB_REDIS_PORT),
-        db=int(settings.PUB_SUB_REDIS_DB),
-        password=settings.PUB_SUB_REDIS_PASSWORD,
-        decode_responses=True,
-    )
-
-    # 2. 将消息添加到Redis队列里
-    rds.lpush(DELETE_POLICY_PUB_SUB_KEY, json_dumps(message))
-    # 队列长度最多1万，避免长时间不消费导致的问题
-    rds.ltrim(DELETE_POLICY_PUB_SUB_KEY, 0, DELETE_POLICY_REDIS_LIST_MAX_LENGTH - 1)
+    push_delete_policies_messages([message])
 
 
-def publish_delete_policies(_type: DeletePolicyTypeEnum, data: Dict):
+def publish_delete_policies_message_by_celery(message: Dict):
     """
-    data: 需要根据type传入对应的数据
+    通过celery任务推送消息, 用于直接推送失败时
     """
-    # 构造要push event message
-    message = {"timestamp": int(time.time()), "type": _type, "data": data}
-
-    # 提前多判断一次：若没有Redis配置，则直接忽略，避免发起celery任务
-    if not getattr(settings, "PUB_SUB_REDIS_HOST", None):
-        return
-
     # 由于订阅并非主要流程，所以错误不能引发调用者的任何异常
     try:
         # 连接不上broker，只做3次重试即可，否则会阻塞调用者，所以需要覆盖Broker默认全局配置BROKER_CONNECTION_MAX_RETRIES=100
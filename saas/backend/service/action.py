@@ -12,6 +12,7 @@ from typing import List, Optional
 
 from pydantic import parse_obj_as
 
+from backend.common.memo import request_memoize
 from backend.component import iam
 from backend.util.cache import region
 
@@ -35,6 +36,7 @@ class ActionService:
 
     full_fields = "id,name,name_en,related_resource_types,version,type,description,description_en,related_actions"
 
+    @request_memoize("action_list", copy=True)  # 调用方可能修改返回的Action, 与原region缓存一样每次返回新的对象
     @region.cache_on_arguments(expiration_time=60)
     def list(self, system_id: str) -> List[Action]:
         """获取系统的Action列表"""
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+用户组策略的倒排索引
+
+索引记录: (用户组, 系统, 操作, 资源类型, 实例路径, 属性条件)
+查询时根据申请资源的路径前缀一次查出候选记录, 再在内存中校验资源类型与属性条件
+"""
+import hashlib
+import json
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from backend.apps.group.models import GroupPolicyIndex
+from backend.apps.policy.models import Policy as PolicyModel
+from backend.apps.policy.models import PolicyResourceChunk
+from backend.apps.template.models import PermTemplatePolicyAuthorized
+from backend.util.json import json_dumps
+
+from .constants import SubjectType
+from .engine import PolicyResource
+from .models import Subject
+from .utils.translate import translate_path
+
+# 实例路径的属性key
+IAM_PATH_KEY = "_bk_iam_path_"
+# 批量查询时path_hash的最大数量
+QUERY_PATH_HASH_LIMIT = 1000
+
+
+def _hash_path(path: str) -> str:
+    return hashlib.md5(path.encode("utf-8")).hexdigest()
+
+
+def _to_str_set(value: Any) -> Set[str]:
+    values = value if isinstance(value, (list, tuple, set)) else [value]
+    return {str(v) for v in values}
+
+
+class RequestResource:
+    """
+    申请的资源实例, 由Engine查询使用的resource转换
+    """
+
+    def __init__(self, resource: Dict[str, Any]) -> None:
+        self.type = resource["type"]
+        self.attribute: Dict[str, Any] = resource.get("attribute") or {}
+
+        path = self.attribute.get(IAM_PATH_KEY, "")
+        if not isinstance(path, str):
+            path = ""
+        if resource["id"] != "*":
+            path = (path or "/") + "{},{}/".format(self.type, resource["id"])
+        self.path = path
+
+    def gen_path_prefixes(self) -> List[str]:
+        """
+        生成可能覆盖该资源的所有路径, 包括每一层路径前缀以及将该层的ID替换为*的路径
+        """
+        prefixes = [""]
+        nodes = [n for n in self.path.split("/") if n]
+        for i, node in enumerate(nodes):
+            parent = "/" + "".join(n + "/" for n in nodes[:i])
+            prefixes.append(parent + node + "/")
+            prefixes.append(parent + node.split(",", 1)[0] + ",*/")
+        return prefixes
+
+    def match(self, index: GroupPolicyIndex, attribute: Dict[str, Set[str]]) -> bool:
+        if index.resource_type_id and index.resource_type_id != self.type:
+            return False
+
+        for key, values in attribute.items():
+            if key not in self.attribute:
+                return False
+
+            request_values = _to_str_set(self.attribute[key])
+            if key == IAM_PATH_KEY:
+                # 路径属性为前缀匹配
+                if not all(any(rv.startswith(v) for v in values) for rv in request_values):
+                    return False
+            elif not request_values.issubset(values):
+                return False
+
+        return True
+
+
+class GroupPolicyIndexService:
+    def sync(self, system_id: str, subject: Subject, action_ids: List[str]):
+        """
+        用户组策略变更后增量更新变更操作的索引, 未开启时不处理
+        """
+        if not settings.ENABLE_GROUP_POLICY_INDEX or subject.type != SubjectType.GROUP.value or not action_ids:
+            return
+
+        self.rebuild(system_id, int(subject.id), action_ids)
+
+    def rebuild(self, system_id: str, group_id: int, action_ids: Optional[List[str]] = None):
+        """
+        重建用户组在系统下的索引(包括自定义权限与模板权限), action_ids为None时重建所有操作
+        """
+        action_ids = sorted(set(action_ids)) if action_ids is not None else None
+
+        indexes: List[GroupPolicyIndex] = []
+        for action_id, related_resource_types in self._iter_group_actions(system_id, group_id, action_ids):
+            indexes.extend(self._gen_indexes(system_id, group_id, action_id, related_resource_types))
+
+        with transaction.atomic():
+            qs = GroupPolicyIndex.objects.filter(group_id=group_id, system_id=system_id)
+            if action_ids is not None:
+                qs = qs.filter(action_id__in=action_ids)
+            qs.delete()
+            if indexes:
+                GroupPolicyIndex.objects.bulk_create(indexes, batch_size=1000)
+
+    def delete_by_group(self, group_id: int):
+        """
+        删除用户组的所有索引
+        """
+        GroupPolicyIndex.objects.filter(group_id=group_id).delete()
+
+    def delete_by_action(self, system_id: str, action_id: str):
+        """
+        删除操作的所有索引
+        """
+        GroupPolicyIndex.objects.filter(system_id=system_id, action_id=action_id).delete()
+
+    def list_group_ids(self, system_id: str, policy_resources: List[PolicyResource]) -> List[int]:
+        """
+        查询拥有所有申请资源权限的用户组
+        """
+        if not policy_resources:
+            return []
+
+        # 申请的每个操作资源, None表示无关联资源或任意资源
+        requests: List[Tuple[str, Optional[RequestResource]]] = []
+        for pr in policy_resources:
+            if not pr.resources:
+                requests.append((pr.action_id, None))
+                continue
+            requests.extend((pr.action_id, RequestResource(r)) for r in pr.resources)
+
+        request_hashes: Dict[Tuple[str, Optional[RequestResource]], List[str]] = {}
+        path_hashes: Set[str] = set()
+        for action_id, resource in requests:
+            prefixes = resource.gen_path_prefixes() if resource else [""]
+            request_hashes[(action_id, resource)] = [_hash_path(p) for p in prefixes]
+            path_hashes.update(request_hashes[(action_id, resource)])
+
+        index_dict = self._query_index_dict(system_id, list({a for a, _ in requests}), list(path_hashes))
+
+        group_ids: Optional[Set[int]] = None
+        for (action_id, resource), hashes in request_hashes.items():
+            covered = set()
+            for path_hash in hashes:
+                for index, attribute in index_dict.get((action_id, path_hash), []):
+                    if index.group_id in covered:
+                        continue
+                    if resource is None:
+                        # 申请任意资源时, 用户组需要有任意资源的权限
+                        if not attribute:
+                            covered.add(index.group_id)
+                    elif resource.match(index, attribute):
+                        covered.add(index.group_id)
+
+            group_ids = covered if group_ids is None else group_ids & covered
+            if not group_ids:
+                return []
+
+        return sorted(group_ids or [])
+
+    def _query_index_dict(
+        self, system_id: str, action_ids: List[str], path_hashes: List[str]
+    ) -> Dict[Tuple[str, str], List[Tuple[GroupPolicyIndex, Dict[str, Set[str]]]]]:
+        index_dict = defaultdict(list)
+        for i in range(0, len(path_hashes), QUERY_PATH_HASH_LIMIT):
+            qs = GroupPolicyIndex.objects.filter(
+                system_id=system_id,
+                action_id__in=action_ids,
+                path_hash__in=path_hashes[i : i + QUERY_PATH_HASH_LIMIT],
+            ).only("group_id", "action_id", "resource_type_id", "path_hash", "attribute")
+            for index in qs:
+                attribute = {k: set(v) for k, v in json.loads(index.attribute).items()}
+                index_dict[(index.action_id, index.path_hash)].append((index, attribute))
+        return index_dict
+
+    def _iter_group_actions(
+        self, system_id: str, group_id: int, action_ids: Optional[List[str]] = None
+    ) -> Iterable[Tuple[str, List[Dict]]]:
+        subject_id = str(group_id)
+
+        qs = PolicyModel.objects.filter(
+            system_id=system_id, subject_type=SubjectType.GROUP.value, subject_id=subject_id
+        )
+        if action_ids is not None:
+            qs = qs.filter(action_id__in=action_ids)
+        db_policies = list(qs)
+        PolicyResourceChunk.objects.prefetch_for_policies(db_policies)
+        for p in db_policies:
+            yield p.action_id, p.resources
+
+        authorized_templates = PermTemplatePolicyAuthorized.objects.filter(
+            system_id=system_id, subject_type=SubjectType.GROUP.value, subject_id=subject_id
+        )
+        for authorized_template in authorized_templates:
+            for action in authorized_template.data["actions"]:
+                if action_ids is None or action["id"] in action_ids:
+                    yield action["id"], action["related_resource_types"]
+
+    def _gen_indexes(
+        self, system_id: str, group_id: int, action_id: str, related_resource_types: List[Dict]
+    ) -> List[GroupPolicyIndex]:
+        def new_index(resource_type_id: str = "", path: str = "", attribute: Optional[Dict] = None):
+            return GroupPolicyIndex(
+                group_id=group_id,
+                system_id=system_id,
+                action_id=action_id,
+                resource_type_id=resource_type_id,
+                path=path,
+                path_hash=_hash_path(path),
+                attribute=json_dumps(attribute or {}),
+            )
+
+        # 无关联资源类型的操作
+        if not related_resource_types:
+            return [new_index()]
+
+        # 与Engine查询一致, 不支持关联多个资源类型的操作
+        if len(related_resource_types) > 1:
+            return []
+
+        rrt = related_resource_types[0]
+        if not rrt["condition"]:
+            return [new_index(rrt["type"])]
+
+        indexes = []
+        for condition in rrt["condition"]:
+            attribute = {a["id"]: [str(v["id"]) for v in a["values"]] for a in condition.get("attributes", [])}
+            paths = {translate_path(path) for instance in condition.get("instances", []) for path in instance["path"]}
+            if not paths:
+                indexes.append(new_index(rrt["type"], attribute=attribute))
+                continue
+
+            indexes.extend(new_index(rrt["type"], path, attribute) for path in sorted(paths))
+
+        return indexes
@@ -53,7 +53,9 @@ from .policy import (
     PathNode,
     Policy,
     PolicyIDExpiredAt,
+    PolicySummary,
     RelatedResource,
+    RelatedResourceSummary,
     SystemCounter,
     Value,
 )
@@ -123,6 +125,8 @@ __all__ = [
     "Policy",
     "SystemCounter",
     "PolicyIDExpiredAt",
+    "PolicySummary",
+    "RelatedResourceSummary",
     "Subject",
     "Condition",
     "Instance",
@@ -8,7 +8,7 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-from typing import Any, List, Tuple
+from typing import Any, Dict, List, Tuple
 
 from pydantic import BaseModel, Field
 
@@ -126,6 +126,37 @@ class Policy(BaseModel):
         }
 
 
+class RelatedResourceSummary(BaseModel):
+    system_id: str
+    type: str
+    condition_count: int
+    instance_count: int  # 所有实例路径的数量(包含拓扑实例), 与分页查询实例接口的总数一致
+
+    @classmethod
+    def from_resource(cls, resource: Dict) -> "RelatedResourceSummary":
+        conditions = resource.get("condition", [])
+        return cls(
+            system_id=resource["system_id"],
+            type=resource["type"],
+            condition_count=len(conditions),
+            instance_count=sum(len(i["path"]) for c in conditions for i in c.get("instances", [])),
+        )
+
+
+class PolicySummary(BaseModel):
+    """
+    策略摘要, 只包含每个资源类型的条件与实例数量, 不展开具体的条件
+    """
+
+    action_id: str = Field(alias="id")
+    related_resource_types: List[RelatedResourceSummary]
+    policy_id: int
+    expired_at: int
+
+    class Config:
+        allow_population_by_field_name = True
+
+
 class BackendThinPolicy(BaseModel):
     id: int
     system: str
@@ -8,25 +8,39 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-from typing import List, Optional
+import json
+from typing import Dict, List, Optional, Tuple
 
+from django.conf import settings
 from django.db import transaction
+from django.db.models import BigIntegerField, Case, Value, When
 
+from backend.apps.policy.chunk import digest_chunk, split_resources
+from backend.apps.policy.constants import PolicyResourceStorageEnum
 from backend.apps.policy.models import Policy as PolicyModel
+from backend.apps.policy.models import PolicyResourceChunk
 from backend.component import iam
+from backend.metrics.span import stage_span
 from backend.util.json import json_dumps
 
+from ..group_policy_index import GroupPolicyIndexService
 from ..models import Policy, PolicyIDExpiredAt, Subject
 from .query import PolicyList, new_backend_policy_list_by_subject
+from .version import PolicyVersionService
 
 
 class PolicyOperationService:
+    version_svc = PolicyVersionService()
+    group_policy_index_svc = GroupPolicyIndexService()
+
     def delete_by_ids(self, system_id: str, subject: Subject, policy_ids: List[int]):
         """
         删除指定policy_id的策略
         """
         with transaction.atomic():
-            self._delete_db_policies(system_id, subject, policy_ids)
+            self.version_svc.compare_and_swap(system_id, subject)
+            deleted_action_ids = self._delete_db_policies(system_id, subject, policy_ids)
+            self.group_policy_index_svc.sync(system_id, subject, deleted_action_ids)
             iam.delete_policies(system_id, subject.type, subject.id, policy_ids)
 
     def alter(
@@ -44,22 +58,42 @@ class PolicyOperationService:
         update_policies = update_policies or []
         delete_policy_ids = delete_policy_ids or []
 
+        result = {}
+        need_sync_policy_id = False
         with transaction.atomic():
+            self.version_svc.compare_and_swap(system_id, subject)
+
             if create_policies:
                 self._create_db_policies(system_id, subject, create_policies)
 
             if update_policies:
-                self.update_db_policies(system_id, subject, update_policies)
+                self._update_db_policies(system_id, subject, update_policies)
 
+            deleted_action_ids = []
             if delete_policy_ids:
-                self._delete_db_policies(system_id, subject, delete_policy_ids)
+                deleted_action_ids = self._delete_db_policies(system_id, subject, delete_policy_ids)
 
             if create_policies or update_policies or delete_policy_ids:
-                self._alter_backend_policies(system_id, subject, create_policies, update_policies, delete_policy_ids)
+                self.group_policy_index_svc.sync(
+                    system_id,
+                    subject,
+                    [p.action_id for p in create_policies + update_policies] + deleted_action_ids,
+                )
+                result = self._alter_backend_policies(
+                    system_id, subject, create_policies, update_policies, delete_policy_ids
+                )
+
+            if create_policies:
+                # 优先使用后端直接返回的policy_id, 后端未返回或不完整时回退到查询后端同步
+                created_policy_ids = (result or {}).get("create_policy_ids") or {}
+                self._update_db_policy_id(system_id, subject, created_policy_ids)
+                need_sync_policy_id = any(p.action_id not in created_policy_ids for p in create_policies)
 
-        if create_policies:
+        # 回退同步需要查询后端, 放在事务外执行, 避免网络请求期间长时间占用事务
+        if need_sync_policy_id:
             self._sync_db_policy_id(system_id, subject)
 
+    @stage_span("backend_alter_policies")
     def _alter_backend_policies(
         self,
         system_id: str,
@@ -79,40 +113,174 @@ class PolicyOperationService:
             system_id, subject.type, subject.id, backend_create_policies, backend_update_policies, delete_policy_ids
         )
 
+    @stage_span("db_write")
     def _create_db_policies(self, system_id: str, subject: Subject, policies: List[Policy]) -> None:
         """
         创建新的策略
         """
         db_policies = [p.to_db_model(system_id, subject) for p in policies]
-        PolicyModel.objects.bulk_create(db_policies, batch_size=100)
+        if not self._is_chunked_storage():
+            PolicyModel.objects.bulk_create(db_policies, batch_size=100)
+            return
+
+        # 分块存储: Policy表只保存骨架, 创建后再使用主键关联分块
+        # MySQL的bulk_create不回填主键, 逐条创建, 直接使用对象的主键关联分块, 不依赖回查
+        policy_chunks = {}
+        for p in db_policies:
+            p._resources, chunks = self._split_resources(p._resources)
+            p.resource_storage = PolicyResourceStorageEnum.CHUNKED.value
+            p.save(force_insert=True)
+            policy_chunks[p.pk] = chunks
+        self._save_resource_chunks(policy_chunks)
 
     def update_db_policies(self, system_id: str, subject: Subject, policies: List[Policy]) -> None:
         """
-        更新已有的策略
+        更新已有的策略, 只修改DB
         """
+        with transaction.atomic():
+            self.version_svc.compare_and_swap(system_id, subject)
+            self._update_db_policies(system_id, subject, policies)
+
+    @stage_span("db_write")
+    def _update_db_policies(self, system_id: str, subject: Subject, policies: List[Policy]) -> None:
         policy_list = PolicyList(policies)
 
-        db_policies = PolicyModel.objects.filter(
-            subject_id=subject.id, subject_type=subject.type, system_id=system_id, policy_id__in=policy_list.ids
-        ).only("id", "action_id")
+        db_policies = (
+            PolicyModel.objects.filter(
+                subject_id=subject.id, subject_type=subject.type, system_id=system_id, policy_id__in=policy_list.ids
+            )
+            .only("id", "action_id", "resource_storage")
+            .order_by("id")
+        )
+
+        is_chunked = self._is_chunked_storage()
+        storage = PolicyResourceStorageEnum.CHUNKED.value if is_chunked else PolicyResourceStorageEnum.JSON.value
+        policy_chunks: Dict[int, Dict[str, List]] = {}
 
-        # 使用主键更新, 避免死锁
+        changed_policies = []
         for p in db_policies:
             update_policy = policy_list.get(p.action_id)
             if not update_policy:
                 continue
-            PolicyModel.objects.filter(id=p.id).update(
-                _resources=json_dumps([rt.dict() for rt in update_policy.related_resource_types])
+
+            resources = json_dumps([rt.dict() for rt in update_policy.related_resource_types])
+            if is_chunked:
+                resources, policy_chunks[p.id] = self._split_resources(resources)
+            elif p.resource_storage == PolicyResourceStorageEnum.CHUNKED.value:
+                # 切换回JSON存储, 需要清理原有的分块
+                policy_chunks[p.id] = {}
+
+            p._resources, p.resource_storage = resources, storage
+            changed_policies.append(p)
+
+        # 按主键顺序批量更新, 避免死锁; 按数据大小分批, 避免单条SQL过大
+        for batch in self._split_by_size(changed_policies):
+            PolicyModel.objects.bulk_update(batch, fields=["_resources", "resource_storage"])
+
+        if policy_chunks:
+            self._save_resource_chunks(policy_chunks)
+
+    def _split_by_size(self, db_policies: List[PolicyModel]) -> List[List[PolicyModel]]:
+        """
+        按resources的大小与数量拆分批次
+        """
+        batches: List[List[PolicyModel]] = []
+        batch: List[PolicyModel] = []
+        batch_size = 0
+        for p in db_policies:
+            if batch and (
+                batch_size + len(p._resources) > settings.POLICY_BULK_UPDATE_MAX_BYTES
+                or len(batch) >= settings.POLICY_BULK_UPDATE_BATCH_SIZE
+            ):
+                batches.append(batch)
+                batch, batch_size = [], 0
+            batch.append(p)
+            batch_size += len(p._resources)
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _is_chunked_storage(self) -> bool:
+        return settings.POLICY_RESOURCE_STORAGE == PolicyResourceStorageEnum.CHUNKED.value
+
+    def _split_resources(self, resources: str) -> Tuple[str, Dict[str, List]]:
+        skeleton, chunks = split_resources(json.loads(resources), settings.POLICY_RESOURCE_CHUNK_SIZE)
+        return json_dumps(skeleton), chunks
+
+    def _save_resource_chunks(self, policy_chunks: Dict[int, Dict[str, List]]) -> None:
+        """
+        按摘要对比已有分块, 只新增/更新/删除有变化的分块
+        """
+        exists_chunks = {
+            (c.policy_pk, c.key): c
+            for c in PolicyResourceChunk.objects.filter(policy_pk__in=list(policy_chunks.keys())).only(
+                "id", "policy_pk", "key", "digest"
             )
+        }
+
+        create_chunks, update_chunks = [], []
+        for policy_pk, chunks in policy_chunks.items():
+            for key, paths in chunks.items():
+                digest = digest_chunk(paths)
+                chunk = exists_chunks.pop((policy_pk, key), None)
+                if chunk is None:
+                    create_chunks.append(
+                        PolicyResourceChunk(policy_pk=policy_pk, key=key, digest=digest, content=paths)
+                    )
+                elif chunk.digest != digest:
+                    chunk.digest, chunk.content = digest, paths
+                    update_chunks.append(chunk)
+
+        if exists_chunks:
+            PolicyResourceChunk.objects.filter(id__in=sorted(c.id for c in exists_chunks.values())).delete()
+
+        # 按主键顺序批量更新, 避免死锁
+        if update_chunks:
+            PolicyResourceChunk.objects.bulk_update(
+                sorted(update_chunks, key=lambda c: c.id), fields=["digest", "content"], batch_size=100
+            )
+
+        if create_chunks:
+            PolicyResourceChunk.objects.bulk_create(create_chunks, batch_size=100)
 
-    def _delete_db_policies(self, system_id: str, subject: Subject, policy_ids: List[int]):
+    @stage_span("db_write")
+    def _delete_db_policies(self, system_id: str, subject: Subject, policy_ids: List[int]) -> List[str]:
         """
-        删除db Policies
+        删除db Policies, 返回删除的操作ID
         """
-        PolicyModel.objects.filter(
+        qs = PolicyModel.objects.filter(
             system_id=system_id, subject_type=subject.type, subject_id=subject.id, policy_id__in=policy_ids
-        ).delete()
+        )
+        action_ids = list(qs.values_list("action_id", flat=True))
+        qs.delete()
+        return action_ids
+
+    def _update_db_policy_id(self, system_id: str, subject: Subject, action_policy_ids: Dict[str, int]) -> None:
+        """
+        使用后端返回的action_id -> policy_id, 一条语句回写新建策略的policy_id
+        """
+        if not action_policy_ids:
+            return
+
+        PolicyModel.objects.filter(
+            system_id=system_id,
+            subject_type=subject.type,
+            subject_id=subject.id,
+            policy_id=0,
+            action_id__in=list(action_policy_ids.keys()),
+        ).update(
+            policy_id=Case(
+                *[
+                    When(action_id=action_id, then=Value(policy_id))
+                    for action_id, policy_id in action_policy_ids.items()
+                ],
+                default=Value(0),
+                output_field=BigIntegerField(),
+            )
+        )
 
+    @stage_span("sync_db_policy_id")
     def _sync_db_policy_id(self, system_id: str, subject: Subject) -> None:
         """
         同步SaaS-后端策略的policy_id
@@ -8,15 +8,17 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from django.db.models import Count
 
 from backend.apps.policy.models import Policy as PolicyModel
+from backend.apps.policy.models import PolicyResourceChunk
 from backend.common.error_codes import error_codes
 from backend.component import iam
+from backend.metrics.span import stage_span
 
-from ..models import BackendThinPolicy, Policy, Subject, SystemCounter
+from ..models import BackendThinPolicy, Policy, PolicySummary, RelatedResourceSummary, Subject, SystemCounter
 
 
 class PolicyList:
@@ -76,6 +78,7 @@ class BackendThinPolicyList:
 class PolicyQueryService:
     """Policy Query Service"""
 
+    @stage_span("db_read")
     def list_by_subject(
         self, system_id: str, subject: Subject, action_ids: Optional[List[str]] = None
     ) -> List[Policy]:
@@ -95,13 +98,53 @@ class PolicyQueryService:
         """
         backend_policy_list = new_backend_policy_list_by_subject(system_id, subject)
 
+        db_policies = [one for one in queryset if backend_policy_list.get(one.action_id)]
+        # 分块存储的策略一次性预加载所有分块, 在转换时再组装
+        PolicyResourceChunk.objects.prefetch_for_policies(db_policies)
+
         policies = [
             Policy.from_db_model(one, backend_policy_list.get(one.action_id).expired_at)  # type: ignore
-            for one in queryset
-            if backend_policy_list.get(one.action_id)
+            for one in db_policies
         ]
         return policies
 
+    def list_summary_by_subject(self, system_id: str, subject: Subject) -> List[PolicySummary]:
+        """
+        查询subject指定系统下所有Policy的摘要, 只统计数量, 不转换为完整的Policy
+        """
+        backend_policy_list = new_backend_policy_list_by_subject(system_id, subject)
+
+        db_policies = [
+            one
+            for one in PolicyModel.objects.filter(
+                system_id=system_id, subject_type=subject.type, subject_id=subject.id
+            )
+            if backend_policy_list.get(one.action_id)
+        ]
+        PolicyResourceChunk.objects.prefetch_for_policies(db_policies)
+
+        return [
+            PolicySummary(
+                action_id=one.action_id,
+                related_resource_types=[RelatedResourceSummary.from_resource(rt) for rt in one.resources],
+                policy_id=one.policy_id,
+                expired_at=backend_policy_list.get(one.action_id).expired_at,  # type: ignore
+            )
+            for one in db_policies
+        ]
+
+    def get_resources_by_policy_id(self, system_id: str, subject: Subject, policy_id: int) -> List[Dict]:
+        """
+        获取指定策略的资源数据, 只解析这一条策略
+        """
+        db_policy = PolicyModel.objects.filter(
+            system_id=system_id, subject_type=subject.type, subject_id=subject.id, policy_id=policy_id
+        ).first()
+        if db_policy is None:
+            raise error_codes.NOT_FOUND_ERROR
+
+        return db_policy.resources
+
     def list_by_policy_ids(self, system_id: str, subject: Subject, policy_ids: List[int]) -> List[Policy]:
         """
         查询指定policy_ids的策略
@@ -150,6 +193,7 @@ class PolicyQueryService:
         return PolicyList(self.list_by_subject(system_id, subject))
 
 
+@stage_span("backend_list_policy")
 def new_backend_policy_list_by_subject(
     system_id: str, subject: Subject, template_id: int = 0
 ) -> BackendThinPolicyList:
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import F
+from werkzeug.local import Local
+
+from backend.apps.policy.constants import PolicyChangeConcurrencyModeEnum
+from backend.apps.policy.models import SubjectPolicyVersion
+
+from ..models import Subject
+
+_local = Local()
+
+
+class PolicyVersionConflict(Exception):
+    """策略集合版本号冲突, 说明读取策略后已有其他并发变更"""
+
+
+class PolicyVersionService:
+    """
+    subject在系统下的策略集合版本号, 用于乐观并发控制
+
+    1. 变更前读取版本号, 通过expect记录期望的版本号
+    2. 在写DB的事务中调用compare_and_swap, 版本号不一致时抛出PolicyVersionConflict, 事务回滚
+    """
+
+    def is_enabled(self) -> bool:
+        return settings.POLICY_CHANGE_CONCURRENCY_MODE == PolicyChangeConcurrencyModeEnum.OPTIMISTIC.value
+
+    def get(self, system_id: str, subject: Subject) -> int:
+        version, _ = SubjectPolicyVersion.objects.get_or_create(
+            system_id=system_id, subject_type=subject.type, subject_id=subject.id
+        )
+        return version.version
+
+    @contextmanager
+    def expect(self, system_id: str, subject: Subject, version: int):
+        """
+        记录当前上下文中期望的版本号
+        """
+        expected_versions = self._expected_versions()
+        key = (system_id, subject.type, subject.id)
+        old = expected_versions.get(key)
+        expected_versions[key] = version
+        try:
+            yield
+        finally:
+            if old is None:
+                expected_versions.pop(key, None)
+            else:
+                expected_versions[key] = old
+
+    def compare_and_swap(self, system_id: str, subject: Subject) -> None:
+        """
+        比较并递增版本号, 必须在写DB的事务中调用
+        没有期望版本号的变更(未经过乐观并发控制的调用方)直接递增版本号, 使并发的变更能感知到
+        """
+        if not self.is_enabled():
+            return
+
+        key = (system_id, subject.type, subject.id)
+        expected = self._get_expected(key)
+        qs = SubjectPolicyVersion.objects.filter(system_id=system_id, subject_type=subject.type, subject_id=subject.id)
+
+        if expected is None:
+            if qs.update(version=F("version") + 1) == 0:
+                SubjectPolicyVersion.objects.get_or_create(
+                    system_id=system_id, subject_type=subject.type, subject_id=subject.id, defaults={"version": 1}
+                )
+            return
+
+        if qs.filter(version=expected).update(version=expected + 1) == 0:
+            raise PolicyVersionConflict(f"policy version of {key} is not {expected}")
+
+        # 同一上下文中的多次变更, 版本号需要跟随递增
+        self._expected_versions()[key] = expected + 1
+
+    def _get_expected(self, key: Tuple[str, str, str]) -> Optional[int]:
+        return self._expected_versions().get(key)
+
+    def _expected_versions(self) -> Dict[Tuple[str, str, str], int]:
+        if not hasattr(_local, "expected_versions"):
+            _local.expected_versions = {}
+        return _local.expected_versions
@@ -11,6 +11,7 @@ specific language governing permissions and limitations under the License.
 from collections import defaultdict
 from typing import Dict, List, Tuple
 
+from backend.common.memo import request_memoize
 from backend.component import iam
 
 from .models import ResourceType, ResourceTypeDict
@@ -27,6 +28,7 @@ class ResourceTypeService:
 
         return system_resource_types
 
+    @request_memoize("resource_type_dict")
     def get_resource_type_dict(self, system_ids: List[str]) -> ResourceTypeDict:
         """
         获取resource type name provider
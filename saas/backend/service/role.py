@@ -27,6 +27,7 @@ from backend.apps.role.models import (
 )
 from backend.apps.template.models import PermTemplate, PermTemplatePolicyAuthorized
 from backend.common.error_codes import error_codes
+from backend.common.memo import invalidate_request_memo, request_memoize
 from backend.component import iam
 from backend.util.json import json_dumps
 
@@ -85,6 +86,7 @@ class RoleService:
 
         return parse_obj_as(List[Subject], json.loads(role_scope.content))
 
+    @request_memoize("role_auth_scope", copy=True)  # 调用方会修改返回的授权范围
     def list_auth_scope(self, role_id: int) -> List[AuthScopeSystem]:
         """查询role的policy授权范围"""
         role_scope = RoleScope.objects.filter(role_id=role_id, type=RoleScopeType.AUTHORIZATION.value).first()
@@ -141,6 +143,7 @@ class RoleService:
             content=json_dumps([system.dict() for system in systems]),
         )
         system_scope.save(force_insert=True)
+        invalidate_request_memo("role_auth_scope")
 
         # 2. 创建授权对象的限制范围
         subject_scope = RoleScope(
@@ -227,6 +230,7 @@ class RoleService:
         RoleScope.objects.filter(role_id=role_id, type=RoleScopeType.AUTHORIZATION.value).update(
             content=json_dumps([system.dict() for system in systems])
         )
+        invalidate_request_memo("role_auth_scope")
 
     def _update_role_subject_scope(self, role_id: int, subjects: List[Subject]):
         """更新Role可授权的人员范围"""
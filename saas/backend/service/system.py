@@ -8,13 +8,22 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import hashlib
+import logging
+import threading
+import time
 from typing import List, Optional
 
+from django.core.cache import cache
+
 from backend.component import iam
 from backend.util.cache import region
+from backend.util.json import json_dumps
 
 from .models import System
 
+logger = logging.getLogger("app")
+
 
 class SystemList:
     def __init__(self, systems: List[System]) -> None:
@@ -24,18 +33,112 @@ class SystemList:
     def get(self, system_id: str) -> Optional[System]:
         return self._system_dict.get(system_id, None)
 
+    def list_by_ids(self, system_ids: List[str]) -> List[System]:
+        return [self._system_dict[_id] for _id in system_ids if _id in self._system_dict]
+
+
+class SystemCatalog:
+    """
+    进程内缓存的系统列表
+
+    1. 所有进程共享一个版本号(存储于Django Cache), 系统列表变化时递增版本号, 各进程发现版本号变化后重新查询
+    2. 版本号最多每CHECK_INTERVAL秒检查一次; 即使版本号未变化, 超过EXPIRATION_TIME后也会重新查询
+    """
+
+    VERSION_KEY = "bk_iam:system:catalog_version"
+    DIGEST_KEY = "bk_iam:system:catalog_digest"
+
+    CHECK_INTERVAL = 10
+    EXPIRATION_TIME = 10 * 60
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._system_list: Optional[SystemList] = None
+        self._version: Optional[int] = None
+        self._fetched_at = 0.0
+        self._checked_at = 0.0
+
+    def get(self) -> SystemList:
+        now = time.time()
+        system_list = self._system_list
+        if system_list is not None and now - self._fetched_at < self.EXPIRATION_TIME:
+            if now - self._checked_at < self.CHECK_INTERVAL:
+                return system_list
+
+            self._checked_at = now
+            if self._get_version() == self._version:
+                return system_list
+
+        with self._lock:
+            # 并发时只需要一个线程查询
+            if self._system_list is not None and self._system_list is not system_list:
+                return self._system_list
+            return self.refresh()
+
+    def refresh(self) -> SystemList:
+        """
+        查询最新的系统列表, 若与其他进程看到的不一致, 递增版本号通知其他进程
+        """
+        systems = [System(**i) for i in iam.list_system()]
+        digest = hashlib.md5(json_dumps([s.dict() for s in systems]).encode("utf-8")).hexdigest()
+
+        version = self._get_version()
+        if digest != self._safe_cache_call(cache.get, self.DIGEST_KEY):
+            self._safe_cache_call(cache.set, self.DIGEST_KEY, digest, None)
+            version = self.invalidate()
+
+        self._system_list = SystemList(systems)
+        self._version = version
+        self._fetched_at = self._checked_at = time.time()
+        return self._system_list
+
+    def invalidate(self) -> Optional[int]:
+        """
+        递增版本号, 所有进程在CHECK_INTERVAL内会重新查询系统列表
+        """
+        self._system_list = None
+        version = self._safe_cache_call(cache.get_or_set, self.VERSION_KEY, 0, None)
+        if version is None:
+            return None
+        return self._safe_cache_call(cache.incr, self.VERSION_KEY)
+
+    def _get_version(self) -> Optional[int]:
+        return self._safe_cache_call(cache.get, self.VERSION_KEY)
+
+    def _safe_cache_call(self, func, *args):
+        # 缓存不可用时退化为按过期时间刷新, 不影响正常查询
+        try:
+            return func(*args)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("system catalog cache error")
+            return None
+
+
+_catalog = SystemCatalog()
+
 
 class SystemService:
     def list(self) -> List[System]:
         """获取所有系统"""
-        systems = iam.list_system()
-        # 组装为返回结构
-        return [System(**i) for i in systems]
+        return list(_catalog.get().systems)
 
     def get(self, system_id: str) -> System:
+        system = _catalog.get().get(system_id)
+        if system is not None:
+            return system
+
+        # 新注册的系统可能还没有被缓存
         system = iam.get_system(system_id)
         return System(**system)
 
+    def list_by_ids(self, system_ids: List[str]) -> List[System]:
+        """批量获取指定的系统, 不存在的系统会被忽略"""
+        return _catalog.get().list_by_ids(system_ids)
+
+    def refresh(self) -> None:
+        """查询最新的系统列表, 系统有变更时通知其他进程刷新缓存"""
+        _catalog.refresh()
+
     @region.cache_on_arguments(expiration_time=5 * 60)  # 5分钟过期
     def list_client(self, system_id: str) -> List[str]:
         """
@@ -45,4 +148,4 @@ class SystemService:
         return system["clients"].split(",")
 
     def new_system_list(self) -> SystemList:
-        return SystemList(self.list())
+        return _catalog.get()
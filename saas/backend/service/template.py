@@ -20,6 +20,7 @@ from backend.common.error_codes import error_codes
 from backend.common.time import PERMANENT_SECONDS
 from backend.component import iam
 
+from .group_policy_index import GroupPolicyIndexService
 from .models import Policy, Subject, SystemCounter
 from .policy.query import PolicyList, new_backend_policy_list_by_subject
 
@@ -33,20 +34,26 @@ class TemplateGroupPreCommit(BaseModel):
 
 
 class TemplateService:
+    group_policy_index_svc = GroupPolicyIndexService()
+
     # Template Auth
     def revoke_subject(self, system_id: str, template_id: int, subject: Subject):
         """
         移除模板成员
         """
         with transaction.atomic():
-            count, _ = PermTemplatePolicyAuthorized.objects.filter(
+            qs = PermTemplatePolicyAuthorized.objects.filter(
                 template_id=template_id, subject_type=subject.type, subject_id=subject.id
-            ).delete()
+            )
+            action_ids = [action["id"] for one in qs for action in one.data["actions"]]
+            count, _ = qs.delete()
 
             if count != 0:
                 # 更新冗余count
                 PermTemplate.objects.filter(id=template_id).update(subject_count=F("subject_count") - count)
 
+                self.group_policy_index_svc.sync(system_id, subject, action_ids)
+
                 # 调用后端删除权限
                 iam.delete_template_policies(system_id, subject.type, subject.id, template_id)
 
@@ -62,6 +69,7 @@ class TemplateService:
         with transaction.atomic():
             authorized_template.save(force_insert=True)
             PermTemplate.objects.filter(id=template_id).update(subject_count=F("subject_count") + 1)
+            self.group_policy_index_svc.sync(system_id, subject, [p.action_id for p in policies])
             iam.create_and_delete_template_policies(
                 system_id, subject.type, subject.id, template_id, [p.to_backend_dict() for p in policies], []
             )
@@ -103,6 +111,9 @@ class TemplateService:
             )
             authorized_template.data = {"actions": [p.dict() for p in policy_list.policies]}
             authorized_template.save(update_fields=["_data"])
+            self.group_policy_index_svc.sync(
+                system_id, subject, [p.action_id for p in create_policies] + delete_action_ids
+            )
 
             if not create_backend_policies and not delete_policy_ids:
                 return
@@ -137,6 +148,7 @@ class TemplateService:
             )
             authorized_template.data = {"actions": [p.dict() for p in policy_list.policies]}
             authorized_template.save(update_fields=["_data"])
+            self.group_policy_index_svc.sync(system_id, subject, [p.action_id for p in policies])
             iam.update_template_policies(
                 system_id, subject.type, subject.id, template_id, [p.to_backend_dict() for p in policies]
             )
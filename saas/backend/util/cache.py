@@ -8,7 +8,10 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-from typing import Any, Dict
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
 
 import redis
 from django.conf import settings
@@ -17,6 +20,9 @@ from dogpile.cache import make_region
 # 默认是内存的Cache
 cache_dictionary: Dict[str, Any] = {}  # 内存cache是使用Python dictionary来作为Cache的
 region = make_region().configure("dogpile.cache.memory_pickle", arguments={"cache_dict": cache_dictionary})
+# 直接缓存对象本身的内存Cache, 不做序列化, 适用于构建成本高且使用时不会被修改的只读对象
+object_cache_dictionary: Dict[str, Any] = {}
+object_region = make_region().configure("dogpile.cache.memory", arguments={"cache_dict": object_cache_dictionary})
 
 # TODO: 对于Redis并非IAM独享，需要单独的key_generator
 #  https://dogpilecache.sqlalchemy.org/en/latest/api.html#module-dogpile.cache.region
@@ -44,3 +50,46 @@ redis_region = make_region().configure(
 
 # Note: 使用region.cache_on_arguments() 对类的相关方法应用时，会忽略self和cls参数，进而是在类的所有对象上缓存的，并不是针对某个对象
 # 如果需要针对对象缓存，则需要自定义 function_key_generator参数传入cache_on_arguments()里
+
+
+class ExpiringLRUCache:
+    """
+    进程内有容量上限的LRU缓存, 每条记录可单独指定过期时间
+    适用于高频调用且不需要跨进程共享的场景, 如API认证信息
+    """
+
+    def __init__(self, max_size: int, default_timeout: float) -> None:
+        self.max_size = max_size
+        self.default_timeout = default_timeout
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+
+            value, expired_at = item
+            if expired_at < time.time():
+                self._data.pop(key)
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, timeout: Optional[float] = None):
+        expired_at = time.time() + (self.default_timeout if timeout is None else timeout)
+        with self._lock:
+            self._data[key] = (value, expired_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+基准测试使用的合成策略数据
+
+可调节的规模参数:
+- instance_count: 每个条件中的实例数量
+- path_depth: 实例拓扑路径的层级
+- attribute_count: 每个条件中的属性数量
+- condition_count: 每个资源类型中的条件数量
+"""
+from typing import Any, Dict, List
+
+from backend.biz.policy import ConditionBean, InstanceBean, PolicyBean, RelatedResourceBean
+from backend.common.time import PERMANENT_SECONDS
+from backend.service.models import Action, RelatedResourceType
+from backend.service.models.instance_selection import ChainNode, InstanceSelection
+
+SYSTEM_ID = "bk_bench"
+RESOURCE_TYPE_ID = "host"
+
+
+def gen_node_types(path_depth: int) -> List[str]:
+    """
+    路径上每一层的资源类型, 最后一层为实例本身的资源类型
+    """
+    return [f"level{i}" for i in range(path_depth - 1)] + [RESOURCE_TYPE_ID]
+
+
+def gen_path(path_depth: int, index: int, prefix: str = "") -> List[Dict[str, Any]]:
+    return [
+        {"system_id": SYSTEM_ID, "type": _type, "id": f"{prefix}{_type}_{index}", "name": f"{prefix}{_type}_{index}"}
+        for _type in gen_node_types(path_depth)
+    ]
+
+
+def gen_condition(
+    instance_count: int, path_depth: int, attribute_count: int = 0, offset: int = 0, prefix: str = ""
+) -> ConditionBean:
+    """
+    生成一个条件, offset用于生成与其他条件部分重叠的实例
+    """
+    instances = []
+    if instance_count:
+        paths = [gen_path(path_depth, offset + i, prefix) for i in range(instance_count)]
+        instances.append(InstanceBean(type=RESOURCE_TYPE_ID, path=paths))
+
+    attributes = [
+        {"id": f"attr{i}", "name": f"attr{i}", "values": [{"id": f"value{i}", "name": f"value{i}"}]}
+        for i in range(attribute_count)
+    ]
+    return ConditionBean(instances=instances, attributes=attributes)
+
+
+def gen_conditions(
+    condition_count: int, instance_count: int, path_depth: int, attribute_count: int = 0, offset: int = 0
+) -> List[ConditionBean]:
+    """
+    生成多个条件, 第一个条件为纯实例条件, 其余条件带有不同的属性, 保证不会被合并
+    """
+    conditions = [gen_condition(instance_count, path_depth, offset=offset)]
+    for i in range(1, condition_count):
+        condition = gen_condition(instance_count, path_depth, attribute_count, offset, prefix=f"c{i}_")
+        for a in condition.attributes:
+            a.id = f"{a.id}_{i}"
+        conditions.append(condition)
+    return conditions
+
+
+def gen_policy(
+    action_id: str,
+    condition_count: int = 1,
+    instance_count: int = 10,
+    path_depth: int = 3,
+    attribute_count: int = 0,
+    offset: int = 0,
+) -> PolicyBean:
+    return PolicyBean(
+        id=action_id,
+        related_resource_types=[
+            RelatedResourceBean(
+                system_id=SYSTEM_ID,
+                type=RESOURCE_TYPE_ID,
+                condition=gen_conditions(condition_count, instance_count, path_depth, attribute_count, offset),
+            )
+        ],
+        expired_at=PERMANENT_SECONDS,
+    )
+
+
+def gen_policies(action_count: int, **kwargs) -> List[PolicyBean]:
+    return [gen_policy(f"action{i}", **kwargs) for i in range(action_count)]
+
+
+def gen_action(action_id: str, path_depth: int, related_actions: List[str] = None) -> Action:
+    """
+    生成操作, 实例视图为完整的拓扑路径
+    """
+    return Action(
+        id=action_id,
+        name=action_id,
+        name_en=action_id,
+        description="",
+        description_en="",
+        type="",
+        related_resource_types=[
+            RelatedResourceType(
+                id=RESOURCE_TYPE_ID,
+                system_id=SYSTEM_ID,
+                name_alias="",
+                name_alias_en="",
+                instance_selections=[
+                    InstanceSelection(
+                        id="bench",
+                        system_id=SYSTEM_ID,
+                        name="bench",
+                        name_en="bench",
+                        ignore_iam_path=False,
+                        resource_type_chain=[
+                            ChainNode(system_id=SYSTEM_ID, id=_type) for _type in gen_node_types(path_depth)
+                        ],
+                    )
+                ],
+            )
+        ],
+        related_actions=related_actions or [],
+    )
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+策略集合运算与范围检查的基准测试
+
+运行: make benchmark, 结果按提交保存在.benchmarks目录
+对比: make benchmark_compare, 与最近一次保存的结果比较, 平均耗时退化超过阈值时失败
+"""
+from copy import deepcopy
+from unittest import mock
+
+import pytest
+
+from backend.biz.policy import ConditionBeanList, PolicyBeanList
+from backend.biz.related_policy import RelatedPolicyBiz
+from backend.biz.role import ActionScopeDiffer
+from backend.service.action import ActionList
+from backend.service.utils.translate import ResourceExpressionTranslator
+
+from .generators import SYSTEM_ID, gen_action, gen_conditions, gen_policies, gen_policy
+
+pytest.importorskip("pytest_benchmark")
+
+# 每个用例的执行轮数, 每轮使用新生成的数据, 避免被测函数修改数据后影响下一轮
+ROUNDS = 10
+
+# 规模参数, 每一组只放大一个维度
+SCALES = [
+    pytest.param({"condition_count": 1, "instance_count": 10, "path_depth": 3, "attribute_count": 0}, id="base"),
+    pytest.param({"condition_count": 1, "instance_count": 1000, "path_depth": 3, "attribute_count": 0}, id="instance"),
+    pytest.param({"condition_count": 1, "instance_count": 100, "path_depth": 10, "attribute_count": 0}, id="depth"),
+    pytest.param({"condition_count": 5, "instance_count": 10, "path_depth": 3, "attribute_count": 20}, id="attribute"),
+    pytest.param({"condition_count": 50, "instance_count": 10, "path_depth": 3, "attribute_count": 2}, id="condition"),
+]
+
+
+def _run(benchmark, func, setup):
+    return benchmark.pedantic(func, setup=setup, rounds=ROUNDS, iterations=1)
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_condition_list_add(benchmark, scale):
+    def setup():
+        # 新增的实例一半与已有实例重叠
+        old = ConditionBeanList(gen_conditions(**scale))
+        new = ConditionBeanList(gen_conditions(**scale, offset=scale["instance_count"] // 2))
+        return (old, new), {}
+
+    _run(benchmark, lambda old, new: old.add(new), setup)
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_condition_list_sub(benchmark, scale):
+    def setup():
+        old = ConditionBeanList(gen_conditions(**scale))
+        delete = ConditionBeanList(gen_conditions(**scale, offset=scale["instance_count"] // 2))
+        return (old, delete), {}
+
+    _run(benchmark, lambda old, delete: old.sub(delete), setup)
+
+
+@pytest.mark.parametrize("action_count", [10, 50])
+@pytest.mark.parametrize("scale", SCALES)
+def test_split_to_creation_and_update_for_grant(benchmark, scale, action_count):
+    def setup():
+        # 一半的操作已有权限, 新授权的实例一半与已有实例重叠
+        old_policies = gen_policies(action_count // 2, **scale)
+        new_policies = gen_policies(action_count, **scale, offset=scale["instance_count"] // 2)
+        return (PolicyBeanList(SYSTEM_ID, old_policies), PolicyBeanList(SYSTEM_ID, new_policies)), {}
+
+    _run(benchmark, lambda old, new: old.split_to_creation_and_update_for_grant(new), setup)
+
+
+@pytest.mark.parametrize("scope_count", [10, 1000])
+@pytest.mark.parametrize("scale", SCALES)
+def test_action_scope_differ(benchmark, scale, scope_count):
+    # 范围为只有一层的路径, 模板中的实例都在最后一个范围下, 需要遍历所有的范围路径
+    scope_policy = gen_policy("action", instance_count=scope_count, path_depth=1)
+    scope_node = scope_policy.related_resource_types[0].condition[0].instances[0].path[-1][0]
+
+    def setup():
+        # 每轮重新生成模板策略, 避免路径节点上缓存的路径串在后续轮次命中
+        template_policy = gen_policy("action", **scale)
+        for c in template_policy.related_resource_types[0].condition:
+            for i in c.instances:
+                for p in i.path:
+                    p.insert(0, deepcopy(scope_node))
+        return (ActionScopeDiffer(template_policy, scope_policy),), {}
+
+    assert _run(benchmark, lambda differ: differ.diff(), setup)
+
+
+@pytest.mark.parametrize("related_action_count", [1, 10])
+@pytest.mark.parametrize("scale", SCALES)
+def test_create_related_policies(benchmark, scale, related_action_count):
+    related_action_ids = [f"related{i}" for i in range(related_action_count)]
+    actions = [gen_action("action", scale["path_depth"], related_action_ids)] + [
+        gen_action(_id, scale["path_depth"]) for _id in related_action_ids
+    ]
+
+    def setup():
+        return (gen_policy("action", **scale),), {}
+
+    biz = RelatedPolicyBiz()
+    with mock.patch.object(biz.action_svc, "new_action_list", return_value=ActionList(actions)):
+        related_policies = _run(benchmark, lambda policy: biz.create_related_policies(SYSTEM_ID, policy), setup)
+
+    assert len(related_policies) == related_action_count
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_resource_expression_translate(benchmark, scale):
+    resources = [rrt.dict() for rrt in gen_policy("action", **scale).related_resource_types]
+
+    def setup():
+        return (deepcopy(resources),), {}
+
+    _run(benchmark, lambda r: ResourceExpressionTranslator().translate(r), setup)
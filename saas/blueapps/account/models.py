@@ -129,16 +129,47 @@ class User(AbstractBaseUser, PermissionsMixin):
     def get_short_name(self):
         return self.nickname
 
+    @property
+    def property_dict(self):
+        """
+        用户的所有属性, 第一次访问时一次性加载, 之后读写都基于该缓存
+        """
+        if not hasattr(self, '_property_cache'):
+            self._property_cache = dict(
+                self.properties.values_list('key', 'value'))
+        return self._property_cache
+
     def get_property(self, key):
-        try:
-            return self.properties.get(key=key).value
-        except UserProperty.DoesNotExist:
-            return None
+        return self.property_dict.get(key)
 
     def set_property(self, key, value):
-        key_property, _ = self.properties.get_or_create(key=key)
-        key_property.value = value
-        key_property.save()
+        self.set_properties({key: value})
+
+    def set_properties(self, properties):
+        """
+        批量设置用户属性, 只写入有变化的属性
+        """
+        current = self.property_dict
+        created, updated = [], {}
+        properties = {
+            key: value if isinstance(value, str) else str(value)
+            for key, value in properties.items()
+        }
+        for key, value in properties.items():
+            if key not in current:
+                created.append(UserProperty(user=self, key=key, value=value))
+            elif current[key] != value:
+                updated[key] = value
+
+        if created:
+            UserProperty.objects.bulk_create(created)
+        if updated:
+            changed = list(self.properties.filter(key__in=list(updated)))
+            for key_property in changed:
+                key_property.value = updated[key_property.key]
+            UserProperty.objects.bulk_update(changed, ['value'])
+
+        current.update(properties)
 
     @property
     def avatar_url(self):
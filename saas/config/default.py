@@ -214,6 +214,10 @@ CELERYBEAT_SCHEDULE = {
         "task": "backend.apps.policy.tasks.execute_model_change_event",
         "schedule": crontab(minute="*/30"),  # 每30分钟执行一次
     },
+    "periodic_reconcile_renamed_resource": {
+        "task": "backend.apps.policy.tasks.reconcile_renamed_resource",
+        "schedule": crontab(minute="*/5"),  # 每5分钟执行一次
+    },
     "periodic_retry_long_task": {
         "task": "backend.long_task.tasks.retry_long_task",
         "schedule": crontab(minute=0, hour=3),  # 每天凌晨3时执行
@@ -315,12 +319,52 @@ AUTHORIZATION_INSTANCE_LIMIT = int(os.environ.get("BKAPP_AUTHORIZATION_INSTANCE_
 # 策略中实例数量的最大限制
 SINGLE_POLICY_MAX_INSTANCES_LIMIT = int(os.environ.get("BKAPP_SINGLE_POLICY_MAX_INSTANCES_LIMIT", 10000))
 
+# 策略资源的存储方式, json: 完整JSON存储, chunked: path分块存储, 只更新变化的分块
+POLICY_RESOURCE_STORAGE = os.environ.get("BKAPP_POLICY_RESOURCE_STORAGE", "json")
+# 分块存储时每个分块的目标path数量
+POLICY_RESOURCE_CHUNK_SIZE = int(os.environ.get("BKAPP_POLICY_RESOURCE_CHUNK_SIZE", 500))
+
+# 批量更新策略时单批的最大条数与最大数据量, 避免单条SQL超过max_allowed_packet
+POLICY_BULK_UPDATE_BATCH_SIZE = int(os.environ.get("BKAPP_POLICY_BULK_UPDATE_BATCH_SIZE", 100))
+POLICY_BULK_UPDATE_MAX_BYTES = int(os.environ.get("BKAPP_POLICY_BULK_UPDATE_MAX_BYTES", 1024 * 1024))
+
+# 策略变更的并发控制方式, lock: system+subject分布式锁, optimistic: 版本号比较并交换, 冲突时自动重试
+POLICY_CHANGE_CONCURRENCY_MODE = os.environ.get("BKAPP_POLICY_CHANGE_CONCURRENCY_MODE", "lock")
+POLICY_CHANGE_OPTIMISTIC_MAX_RETRY = int(os.environ.get("BKAPP_POLICY_CHANGE_OPTIMISTIC_MAX_RETRY", 3))
+
+# 资源实例重命名由后台任务巡检更新, 开启后查询策略时不再实时回调接入系统更新资源名称
+ENABLE_RESOURCE_RENAME_RECONCILER = (
+    os.environ.get("BKAPP_ENABLE_RESOURCE_RENAME_RECONCILER", "False").lower() == "true"
+)
+RESOURCE_RENAME_RECONCILE_BATCH_SIZE = int(os.environ.get("BKAPP_RESOURCE_RENAME_RECONCILE_BATCH_SIZE", 500))
+
+# 使用SaaS维护的用户组策略索引推荐预申请的用户组, 不再依赖Engine
+# 开启前需要执行 python manage.py build_group_policy_index 初始化索引
+ENABLE_GROUP_POLICY_INDEX = os.environ.get("BKAPP_ENABLE_GROUP_POLICY_INDEX", "False").lower() == "true"
+
 # 一次申请策略中中新增实例数量限制
 APPLY_POLICY_ADD_INSTANCES_LIMIT = int(os.environ.get("BKAPP_APPLY_POLICY_ADD_INSTANCES_LIMIT", 20))
 
 # profile record
 PYINSTRUMENT_PROFILE_DIR = os.path.join(os.path.dirname(BASE_DIR), "logs", APP_CODE, "profiles")  # 默认在日志目录下
 ENABLE_PYINSTRUMENT = os.environ.get("BKAPP_ENABLE_PYINSTRUMENT", "False").lower() == "true"  # 需要开启时则配置环境变量
+# 采样模式, 未开启ENABLE_PYINSTRUMENT时生效, 结果保存到debug redis中
+# 每N个API请求采样1个, 0表示不采样
+PYINSTRUMENT_SAMPLE_RATE = int(os.environ.get("BKAPP_PYINSTRUMENT_SAMPLE_RATE", 0))
+# 只保存耗时超过阈值(秒)的结果, 0表示不限制; 未配置采样率时, 所有API请求都会被统计, 开销较大
+PYINSTRUMENT_SLOW_THRESHOLD = float(os.environ.get("BKAPP_PYINSTRUMENT_SLOW_THRESHOLD", 0))
+# 带有该请求头且用户在白名单中的请求总是被统计, 多个用户以逗号分隔
+PYINSTRUMENT_DEBUG_HEADER = "HTTP_X_BKIAM_PROFILE"
+PYINSTRUMENT_DEBUG_USERS = [
+    u.strip() for u in os.environ.get("BKAPP_PYINSTRUMENT_DEBUG_USERS", "").split(",") if u.strip()
+]
+# 结果格式: html(火焰图页面) / json
+PYINSTRUMENT_RENDERER = os.environ.get("BKAPP_PYINSTRUMENT_RENDERER", "html")
+
+# metrics中允许作为path标签的未知组件路径前缀, 多个以逗号分隔
+METRICS_PATH_ALLOW_LIST = [
+    p.strip() for p in os.environ.get("BKAPP_METRICS_PATH_ALLOW_LIST", "").split(",") if p.strip()
+]
 
 # DB router
 DATABASE_ROUTERS = ["backend.audit.routers.AuditRouter"]
@@ -329,6 +373,14 @@ DATABASE_ROUTERS = ["backend.audit.routers.AuditRouter"]
 MAX_DEBUG_TRACE_TTL = 7 * 24 * 60 * 60  # 7天
 # debug trace的最大数量
 MAX_DEBUG_TRACE_COUNT = 1000
+# debug trace中是否记录策略操作各阶段的耗时
+ENABLE_DEBUG_TRACE_SPAN = os.environ.get("BKAPP_ENABLE_DEBUG_TRACE_SPAN", "False").lower() == "true"
+# debug trace的采样率, 0~1
+DEBUG_TRACE_SAMPLE_RATE = float(os.environ.get("BKAPP_DEBUG_TRACE_SAMPLE_RATE", 1.0))
+# debug trace是否由后台线程异步写入redis
+DEBUG_TRACE_ASYNC_FLUSH = os.environ.get("BKAPP_DEBUG_TRACE_ASYNC_FLUSH", "True").lower() == "true"
+# debug trace异步写入队列的最大长度, 超出时丢弃
+DEBUG_TRACE_QUEUE_SIZE = int(os.environ.get("BKAPP_DEBUG_TRACE_QUEUE_SIZE", 1000))
 
 # 最长已过期权限删除期限
 MAX_EXPIRED_POLICY_DELETE_TIME = 365 * 24 * 60 * 60  # 1年
@@ -345,6 +397,10 @@ PUB_SUB_REDIS_HOST = os.environ.get("BKAPP_PUB_SUB_REDIS_HOST", "")
 PUB_SUB_REDIS_PORT = os.environ.get("BKAPP_PUB_SUB_REDIS_PORT", "")
 PUB_SUB_REDIS_PASSWORD = os.environ.get("BKAPP_PUB_SUB_REDIS_PASSWORD", "")
 PUB_SUB_REDIS_DB = os.environ.get("BKAPP_PUB_SUB_REDIS_DB", 0)
+# 删除策略消息的存储方式, list: Redis List, stream: Redis Streams(需要Redis 5.0+)
+PUB_SUB_BACKEND = os.environ.get("BKAPP_PUB_SUB_BACKEND", "list")
+# 删除策略消息的合并窗口(秒), 窗口内的同类型消息合并后一次推送, 0表示不合并
+PUB_SUB_PUBLISH_BATCH_WINDOW = float(os.environ.get("BKAPP_PUB_SUB_PUBLISH_BATCH_WINDOW", 0.2))
 
 # 前端页面功能开关
 ENABLE_FRONT_END_FEATURES = {
@@ -0,0 +1,662 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+压测使用的外部依赖替身, 单进程同时模拟:
+- IAM后台: component/iam.py 调用的 /api/v1/web/* 接口, 策略与成员关系保存在内存中
+- ESB/用户管理: component/esb.py, component/usermgr.py 以及登录态校验(bk_token即用户名)
+- 接入系统回调: resource_provider.py 使用的资源回调协议
+
+启动:
+    python loadtest/fake_servers.py --port 9000 --latency 20 --jitter 5 --callback-latency 50 --instances 10000
+
+SaaS指向替身(开发环境可写在config/local_settings.py中):
+    BK_IAM_HOST = BK_PAAS_INNER_HOST = BK_COMPONENT_INNER_API_URL = "http://127.0.0.1:9000"
+    APP_ID = "bk_iam"
+
+替身启动时会生成JWT签名密钥(--key-file), 公钥通过ESB的get_api_public_key接口下发, 压测脚本使用私钥签发JWT
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+logger = logging.getLogger("loadtest")
+
+SYSTEM_ID = "bk_loadtest"
+RESOURCE_TYPES = ["biz", "host"]
+CALLBACK_PATH = "/callback/resources/"
+DEFAULT_KEY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jwt_key.pem")
+
+
+class FakeData:
+    """
+    按规模参数生成的静态数据: 系统, 操作, 资源类型, 用户, 资源实例
+    """
+
+    def __init__(self, options: argparse.Namespace):
+        self.options = options
+        self.callback_host = f"http://{options.host}:{options.port}"
+
+    def get_system(self, system_id: str) -> Dict[str, Any]:
+        return {
+            "id": system_id,
+            "name": system_id,
+            "name_en": system_id,
+            "description": "load test system",
+            "description_en": "load test system",
+            "clients": self.options.clients,
+            "provider_config": {
+                "host": self.callback_host,
+                "auth": "basic",
+                "token": "loadtest",
+                "healthz": "/healthz",
+            },
+        }
+
+    def list_resource_type(self, system_id: str) -> List[Dict[str, Any]]:
+        return [{"id": t, "name": t, "name_en": t, "provider_config": {"path": CALLBACK_PATH}} for t in RESOURCE_TYPES]
+
+    def list_instance_selection(self, system_id: str) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": "host_view",
+                "system_id": system_id,
+                "name": "host_view",
+                "name_en": "host_view",
+                "ignore_iam_path": False,
+                "resource_type_chain": [{"system_id": system_id, "id": t} for t in RESOURCE_TYPES],
+            }
+        ]
+
+    def list_action(self, system_id: str) -> List[Dict[str, Any]]:
+        return [self.get_action(system_id, f"action_{i}") for i in range(self.options.actions)]
+
+    def get_action(self, system_id: str, action_id: str) -> Dict[str, Any]:
+        return {
+            "id": action_id,
+            "name": action_id,
+            "name_en": action_id,
+            "description": "",
+            "description_en": "",
+            "type": "view",
+            "version": 1,
+            "related_actions": [],
+            "related_resource_types": [
+                {
+                    "system_id": system_id,
+                    "id": RESOURCE_TYPES[-1],
+                    "name_alias": "",
+                    "name_alias_en": "",
+                    "selection_mode": "instance",
+                    "instance_selections": self.list_instance_selection(system_id),
+                }
+            ],
+        }
+
+    def list_user(self, usernames: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        用户名为user{i}, 用户ID为i+1
+        """
+        if usernames is None:
+            usernames = [f"user{i}" for i in range(self.options.users)]
+
+        users = []
+        for username in usernames:
+            matched = re.fullmatch(r"user(\d+)", username)
+            if not matched or int(matched.group(1)) >= self.options.users:
+                continue
+            users.append(
+                {
+                    "id": int(matched.group(1)) + 1,
+                    "username": username,
+                    "display_name": username,
+                    "staff_status": "IN",
+                    "category_id": 1,
+                }
+            )
+        return users
+
+    def gen_instance(self, resource_type: str, instance_id: str) -> Dict[str, Any]:
+        name = f"{resource_type}-{instance_id}-"
+        name += "x" * max(self.options.name_length - len(name), 0)
+        return {"id": instance_id, "display_name": name}
+
+    def list_instance(self, resource_type: str, limit: int, offset: int) -> Tuple[int, List[Dict[str, Any]]]:
+        count = self.options.instances
+        end = min(offset + limit, count)
+        return count, [self.gen_instance(resource_type, str(i)) for i in range(offset, end)]
+
+
+class FakeBackendStore:
+    """
+    IAM后台的内存状态, 只保存SaaS读回时需要的数据: 策略的ID与过期时间, 用户组成员关系
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_id = 1
+        # (system_id, subject_type, subject_id) -> action_id -> policy
+        self.policies: Dict[Tuple[str, str, str], Dict[str, Dict[str, Any]]] = {}
+        # (type, id) -> (member_type, member_id) -> relation
+        self.members: Dict[Tuple[str, str], Dict[Tuple[str, str], Dict[str, Any]]] = {}
+
+    def _gen_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def list_policy(self, system_id: str, subject_type: str, subject_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.policies.get((system_id, subject_type, subject_id), {}).values())
+
+    def list_subject_policy(self, subject_type: str, subject_id: str, before_expired_at: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                p
+                for (_, _type, _id), policies in self.policies.items()
+                if (_type, _id) == (subject_type, subject_id)
+                for p in policies.values()
+                if p["expired_at"] < before_expired_at
+            ]
+
+    def alter_policies(self, system_id: str, subject: Dict[str, str], data: Dict[str, Any]) -> Dict[str, Any]:
+        created = {}
+        with self._lock:
+            policies = self.policies.setdefault((system_id, subject["type"], subject["id"]), {})
+            for p in data.get("create_policies") or []:
+                policy_id = self._gen_id()
+                policies[p["action_id"]] = {
+                    "id": policy_id,
+                    "system": system_id,
+                    "action_id": p["action_id"],
+                    "expired_at": p["expired_at"],
+                }
+                created[p["action_id"]] = policy_id
+            for p in data.get("update_policies") or []:
+                if p["action_id"] in policies:
+                    policies[p["action_id"]]["expired_at"] = p["expired_at"]
+            self._delete_policies(policies, data.get("delete_policy_ids") or [])
+        return {"create_policy_ids": created}
+
+    def delete_policies(self, system_id: str, subject_type: str, subject_id: str, policy_ids: List[int]):
+        with self._lock:
+            self._delete_policies(self.policies.get((system_id, subject_type, subject_id), {}), policy_ids)
+
+    def _delete_policies(self, policies: Dict[str, Dict[str, Any]], policy_ids: List[int]):
+        ids = set(policy_ids)
+        for action_id in [a for a, p in policies.items() if p["id"] in ids]:
+            policies.pop(action_id)
+
+    def update_policy_expired_at(self, subject_type: str, subject_id: str, items: List[Dict[str, Any]]):
+        expired_at = {i["id"]: i["expired_at"] for i in items}
+        with self._lock:
+            for (_, _type, _id), policies in self.policies.items():
+                if (_type, _id) != (subject_type, subject_id):
+                    continue
+                for p in policies.values():
+                    p["expired_at"] = expired_at.get(p["id"], p["expired_at"])
+
+    def add_members(self, _type: str, _id: str, expired_at: int, members: List[Dict[str, str]]) -> Dict[str, int]:
+        type_count = {"user": 0, "department": 0}
+        with self._lock:
+            relations = self.members.setdefault((_type, _id), {})
+            for m in members:
+                key = (m["type"], m["id"])
+                if key not in relations:
+                    type_count[m["type"]] += 1
+                    relations[key] = {
+                        "pk": self._gen_id(),
+                        "type": m["type"],
+                        "id": m["id"],
+                        "policy_expired_at": expired_at,
+                        "created_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S+08:00"),
+                    }
+                relations[key]["policy_expired_at"] = expired_at
+        return type_count
+
+    def delete_members(self, _type: str, _id: str, members: List[Dict[str, str]]) -> Dict[str, int]:
+        type_count = {"user": 0, "department": 0}
+        with self._lock:
+            relations = self.members.get((_type, _id), {})
+            for m in members:
+                if relations.pop((m["type"], m["id"]), None) is not None:
+                    type_count[m["type"]] += 1
+        return type_count
+
+    def update_members_expired_at(self, _type: str, _id: str, members: List[Dict[str, Any]]):
+        with self._lock:
+            relations = self.members.get((_type, _id), {})
+            for m in members:
+                relation = relations.get((m["type"], m["id"]))
+                if relation is not None:
+                    relation["policy_expired_at"] = m["policy_expired_at"]
+
+    def list_members(self, _type: str, _id: str, before_expired_at: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            relations = list(self.members.get((_type, _id), {}).values())
+        if before_expired_at:
+            relations = [r for r in relations if r["policy_expired_at"] < before_expired_at]
+        return relations
+
+    def list_relations(self, member_type: str, member_id: str, before_expired_at: int = 0) -> List[Dict[str, Any]]:
+        """
+        查询成员所属的用户组
+        """
+        with self._lock:
+            relations: List[Dict[str, Any]] = [
+                {**r, "type": _type, "id": _id}
+                for (_type, _id), members in self.members.items()
+                for r in [members.get((member_type, member_id))]
+                if r is not None
+            ]
+        if before_expired_at:
+            relations = [r for r in relations if r["policy_expired_at"] < before_expired_at]
+        return relations
+
+
+class RouteNotFound(Exception):
+    pass
+
+
+class Request:
+    """
+    替身处理函数的入参
+    """
+
+    def __init__(self, method: str, path: str, query: Dict[str, str], body: Dict[str, Any], match: Any):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.body = body
+        self.match = match
+
+    def param(self, key: str, default: Any = "") -> Any:
+        return self.query.get(key, self.body.get(key, default))
+
+    def int_param(self, key: str, default: int = 0) -> int:
+        return int(self.param(key, default) or default)
+
+
+class FakeApp:
+    """
+    按(method, path正则)注册的路由, 每个处理函数返回(响应格式, 数据)
+    """
+
+    def __init__(self, options: argparse.Namespace, public_key: str):
+        self.options = options
+        self.public_key = public_key
+        self.data = FakeData(options)
+        self.store = FakeBackendStore()
+        self.routes: List[Tuple[str, Any, str, Callable[[Request], Any]]] = []
+        self._register_iam()
+        self._register_esb()
+        self._register_callback()
+
+    def route(self, method: str, pattern: str, kind: str, func: Callable[[Request], Any]):
+        self.routes.append((method, re.compile(pattern + "$"), kind, func))
+
+    def dispatch(self, method: str, path: str, query: Dict[str, str], body: Dict[str, Any]) -> Tuple[str, Any]:
+        for route_method, pattern, kind, func in self.routes:
+            if route_method != method:
+                continue
+            match = pattern.match(path)
+            if match:
+                return kind, func(Request(method, path, query, body, match))
+        raise RouteNotFound(f"{method} {path}")
+
+    def latency(self, kind: str) -> float:
+        """
+        单次请求的模拟延迟(秒)
+        """
+        base = self.options.callback_latency if kind == "callback" else self.options.latency
+        jitter = random.uniform(-self.options.jitter, self.options.jitter)
+        return max(base + jitter, 0) / 1000
+
+    def _register_iam(self):
+        data, store = self.data, self.store
+        web = "/api/v1/web"
+
+        self.route("GET", f"{web}/systems", "iam", lambda r: [data.get_system(SYSTEM_ID)])
+        self.route(
+            "GET", f"{web}/systems/(?P<system_id>[^/]+)", "iam", lambda r: data.get_system(r.match["system_id"])
+        )
+        self.route(
+            "GET",
+            f"{web}/resource-types",
+            "iam",
+            lambda r: {s: data.list_resource_type(s) for s in r.param("systems").split(",") if s},
+        )
+        self.route(
+            "GET",
+            f"{web}/systems/(?P<system_id>[^/]+)/actions",
+            "iam",
+            lambda r: data.list_action(r.match["system_id"]),
+        )
+        self.route(
+            "GET",
+            f"{web}/systems/(?P<system_id>[^/]+)/actions/(?P<action_id>[^/]+)",
+            "iam",
+            lambda r: data.get_action(r.match["system_id"], r.match["action_id"]),
+        )
+        self.route(
+            "GET",
+            f"{web}/systems/(?P<system_id>[^/]+)/instance-selections",
+            "iam",
+            lambda r: data.list_instance_selection(r.match["system_id"]),
+        )
+        self.route("GET", f"{web}/systems/[^/]+/system-settings/action-groups", "iam", lambda r: [])
+        self.route("GET", f"{web}/systems/[^/]+/system-settings/resource-creator-actions", "iam", lambda r: {})
+        self.route("GET", f"{web}/systems/[^/]+/system-settings/common-actions", "iam", lambda r: [])
+
+        # subject
+        for method in ["POST", "PUT", "DELETE"]:
+            self.route(method, f"{web}/subjects", "iam", lambda r: {})
+            self.route(method, f"{web}/subject-departments", "iam", lambda r: {})
+            self.route(method, f"{web}/subject-roles", "iam", lambda r: {})
+        self.route("GET", f"{web}/subjects", "iam", lambda r: {"count": 0, "results": []})
+        self.route("GET", f"{web}/subject-departments", "iam", lambda r: {"count": 0, "results": []})
+
+        # 成员关系
+        self.route("GET", f"{web}/subject-members", "iam", lambda r: self._page_members(r))
+        self.route("GET", f"{web}/subject-members/query", "iam", lambda r: self._page_members(r))
+        self.route(
+            "POST",
+            f"{web}/subject-members",
+            "iam",
+            lambda r: store.add_members(
+                r.param("type"), r.param("id"), r.int_param("policy_expired_at"), r.body["members"]
+            ),
+        )
+        self.route(
+            "DELETE",
+            f"{web}/subject-members",
+            "iam",
+            lambda r: store.delete_members(r.param("type"), r.param("id"), r.body["members"]),
+        )
+        self.route(
+            "PUT",
+            f"{web}/subject-members/expired_at",
+            "iam",
+            lambda r: store.update_members_expired_at(r.param("type"), r.param("id"), r.body["members"]) or {},
+        )
+        self.route(
+            "GET",
+            f"{web}/subject-relations",
+            "iam",
+            lambda r: store.list_relations(r.param("type"), r.param("id"), r.int_param("before_expired_at")),
+        )
+        self.route(
+            "POST",
+            f"{web}/subjects/before_expired_at",
+            "iam",
+            lambda r: [
+                s
+                for s in r.body["subjects"]
+                if store.list_members(s["type"], s["id"], r.int_param("before_expired_at"))
+            ],
+        )
+
+        # 策略
+        self.route(
+            "GET",
+            f"{web}/systems/(?P<system_id>[^/]+)/policies",
+            "iam",
+            lambda r: store.list_policy(r.match["system_id"], r.param("subject_type"), r.param("subject_id")),
+        )
+        self.route(
+            "POST",
+            f"{web}/systems/(?P<system_id>[^/]+)/policies",
+            "iam",
+            lambda r: store.alter_policies(r.match["system_id"], r.body["subject"], r.body),
+        )
+        self.route(
+            "GET",
+            f"{web}/policies",
+            "iam",
+            lambda r: store.list_subject_policy(
+                r.param("subject_type"), r.param("subject_id"), r.int_param("before_expired_at")
+            ),
+        )
+        self.route(
+            "DELETE",
+            f"{web}/policies",
+            "iam",
+            lambda r: store.delete_policies(
+                r.param("system_id"), r.param("subject_type"), r.param("subject_id"), r.body["ids"]
+            )
+            or {},
+        )
+        self.route(
+            "PUT",
+            f"{web}/policies/expired_at",
+            "iam",
+            lambda r: store.update_policy_expired_at(
+                r.param("subject_type"), r.param("subject_id"), r.body["policies"]
+            )
+            or [],
+        )
+        for method in ["POST", "PUT", "DELETE"]:
+            self.route(method, f"{web}/perm-templates/policies", "iam", lambda r: {})
+
+        self.route("GET", f"{web}/model-change-event", "iam", lambda r: [])
+        self.route("PUT", f"{web}/model-change-event/[^/]+", "iam", lambda r: {})
+
+    def _page_members(self, r: Request) -> Dict[str, Any]:
+        members = self.store.list_members(r.param("type"), r.param("id"), r.int_param("before_expired_at"))
+        limit, offset = r.int_param("limit", 10), r.int_param("offset")
+        # limit为0时只查询数量
+        return {"count": len(members), "results": members[offset : offset + limit] if limit else []}
+
+    def _register_esb(self):
+        data = self.data
+        compapi = "/api/c/compapi/v2"
+
+        self.route("GET", f"{compapi}/esb/get_api_public_key/", "esb", lambda r: {"public_key": self.public_key})
+        self.route("POST", "/api/c/compapi/cmsi/send_mail/", "esb", lambda r: {})
+
+        # 用户管理
+        self.route("GET", f"{compapi}/usermanage/list_users/", "esb", lambda r: self._page_users(r))
+        self.route(
+            "GET",
+            f"{compapi}/usermanage/retrieve_user/",
+            "esb",
+            lambda r: (data.list_user([r.param("id")]) or [{}])[0],
+        )
+        self.route(
+            "GET",
+            f"{compapi}/usermanage/list_categories/",
+            "esb",
+            lambda r: {"count": 1, "results": [{"id": 1, "display_name": "default"}]},
+        )
+        for name in ["list_departments", "list_edges_department_profile", "list_edges_leader_profile"]:
+            self.route("GET", f"{compapi}/usermanage/{name}/", "esb", lambda r: {"count": 0, "results": []})
+
+        # 登录态: bk_token即用户名
+        self.route("GET", "/login/accounts/is_login/", "login", lambda r: {"username": r.param("bk_token")})
+        self.route(
+            "GET",
+            f"{compapi}/bk_login/get_user/",
+            "esb",
+            lambda r: {
+                "bk_username": r.param("bk_token"),
+                "bk_role": 1 if r.param("bk_token") == "admin" else 0,
+                "chname": r.param("bk_token"),
+                "language": "zh-cn",
+                "time_zone": "Asia/Shanghai",
+            },
+        )
+
+    def _page_users(self, r: Request) -> Dict[str, Any]:
+        lookups = r.param("exact_lookups")
+        users = self.data.list_user(lookups.split(",") if lookups else None)
+        page, page_size = r.int_param("page", 1), r.int_param("page_size", 1000)
+        return {"count": len(users), "results": users[(page - 1) * page_size : page * page_size]}
+
+    def _register_callback(self):
+        self.route("POST", CALLBACK_PATH, "callback", self._callback)
+        self.route("GET", "/healthz", "callback", lambda r: {})
+
+    def _callback(self, r: Request) -> Any:
+        data = self.data
+        resource_type, method = r.body["type"], r.body["method"]
+        _filter = r.body.get("filter") or {}
+        page = r.body.get("page") or {}
+        limit, offset = page.get("limit", 10), page.get("offset", 0)
+
+        if method == "fetch_instance_info":
+            return [data.gen_instance(resource_type, str(i)) for i in _filter.get("ids", [])]
+        if method in ["list_instance", "search_instance", "list_instance_by_policy"]:
+            count, results = data.list_instance(resource_type, limit, offset)
+            return {"count": count, "results": results}
+        if method == "list_attr":
+            return [{"id": "os", "display_name": "os"}]
+        if method == "list_attr_value":
+            return {
+                "count": 2,
+                "results": [{"id": "linux", "display_name": "linux"}, {"id": "windows", "display_name": "windows"}],
+            }
+        raise RouteNotFound(f"callback method {method}")
+
+
+def wrap_response(kind: str, data: Any) -> Dict[str, Any]:
+    """
+    按不同组件的协议包装响应
+    """
+    if kind in ["esb", "login"]:
+        return {"result": True, "code": 0, "message": "", "data": data}
+    return {"code": 0, "message": "ok", "data": data}
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeServer"
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _handle(self, method: str):
+        url = urlparse(self.path)
+        query = dict(parse_qsl(url.query))
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+
+        try:
+            body = json.loads(raw) if raw else {}
+            kind, data = self.server.app.dispatch(method, url.path, query, body)
+        except RouteNotFound as error:
+            self._send(404, {"code": 404, "result": False, "message": f"not found: {error}", "data": None})
+            return
+        except Exception as error:  # pylint: disable=broad-except
+            logger.exception("fake server handle %s %s fail", method, self.path)
+            self._send(500, {"code": 500, "result": False, "message": str(error), "data": None})
+            return
+
+        time.sleep(self.server.app.latency(kind))
+        self._send(200, wrap_response(kind, data))
+
+    def _send(self, status: int, content: Dict[str, Any]):
+        payload = json.dumps(content).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):  # noqa
+        logger.debug(format, *args)
+
+
+class FakeServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, options: argparse.Namespace, public_key: str):
+        super().__init__((options.host, options.port), FakeHandler)
+        self.app = FakeApp(options, public_key)
+
+
+def load_or_create_key(key_file: str) -> str:
+    """
+    读取或生成JWT签名使用的RSA私钥, 返回PEM格式的公钥
+    """
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    if os.path.exists(key_file):
+        with open(key_file, "rb") as f:
+            private_key = serialization.load_pem_private_key(f.read(), password=None, backend=default_backend())
+    else:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
+        with open(key_file, "wb") as f:
+            f.write(
+                private_key.private_bytes(
+                    serialization.Encoding.PEM,
+                    serialization.PrivateFormat.TraditionalOpenSSL,
+                    serialization.NoEncryption(),
+                )
+            )
+
+    return (
+        private_key.public_key()
+        .public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        .decode("utf-8")
+    )
+
+
+def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="fake IAM backend / ESB / usermgr / resource provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=10, help="IAM后台/ESB的响应延迟(ms)")
+    parser.add_argument("--callback-latency", type=float, default=50, help="资源回调的响应延迟(ms)")
+    parser.add_argument("--jitter", type=float, default=0, help="延迟的随机抖动范围(ms)")
+    parser.add_argument("--actions", type=int, default=20, help="系统的操作数量")
+    parser.add_argument("--users", type=int, default=10000, help="用户管理中的用户数量")
+    parser.add_argument("--instances", type=int, default=10000, help="每个资源类型的实例数量")
+    parser.add_argument("--name-length", type=int, default=16, help="资源实例名称的长度")
+    parser.add_argument("--clients", default="bk_iam,bk_loadtest", help="系统允许的调用方app_code")
+    parser.add_argument("--key-file", default=DEFAULT_KEY_FILE, help="JWT签名私钥文件, 不存在时自动生成")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(args)
+
+
+def main():
+    options = parse_args()
+    logging.basicConfig(level=logging.DEBUG if options.verbose else logging.INFO)
+
+    public_key = load_or_create_key(options.key_file)
+    server = FakeServer(options, public_key)
+    logger.info("fake servers listening on http://%s:%s, system: %s", options.host, options.port, SYSTEM_ID)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+权限中心SaaS的压测场景, 依赖locust(不在项目依赖中, 需单独安装)
+
+场景:
+- AuthorizationUser: 开放API实例授权/回收, 批量实例授权
+- GroupMemberUser: 管理类API用户组成员的添加/查询/删除
+- PolicyPageUser: 个人权限页面的系统列表与策略列表
+
+用法(在saas目录下执行, 先启动fake_servers.py与SaaS, 并执行prepare.py):
+    locust -f loadtest/locustfile.py --host http://127.0.0.1:8000 --headless -u 100 -r 10 -t 5m
+    # 只压测某个场景
+    locust -f loadtest/locustfile.py --host http://127.0.0.1:8000 --headless -u 50 -r 10 -t 5m PolicyPageUser
+
+结束时输出每个接口与整体的吞吐量(RPS)与P99耗时, 可配合--csv保存原始统计
+"""
+import os
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import jwt
+from fake_servers import DEFAULT_KEY_FILE, RESOURCE_TYPES, SYSTEM_ID
+from locust import HttpUser, between, events, task
+
+APP_CODE = os.environ.get("LOADTEST_APP_CODE", "bk_loadtest")
+USER_COUNT = int(os.environ.get("LOADTEST_USERS", "1000"))
+ACTION_COUNT = int(os.environ.get("LOADTEST_ACTIONS", "20"))
+INSTANCE_COUNT = int(os.environ.get("LOADTEST_INSTANCES", "10000"))
+BATCH_SIZE = int(os.environ.get("LOADTEST_BATCH_SIZE", "10"))
+KEY_FILE = os.environ.get("LOADTEST_KEY_FILE", DEFAULT_KEY_FILE)
+
+# JWT有效期(秒), 到期前重新签发
+JWT_EXPIRES = 300
+
+with open(KEY_FILE, "rb") as f:
+    PRIVATE_KEY = f.read()
+
+
+def sign_jwt(username: str) -> str:
+    """
+    模拟ESB签发JWT, 公钥由替身ESB的get_api_public_key下发
+    """
+    payload = {
+        "iss": "APIGW",
+        "app": {"bk_app_code": APP_CODE, "verified": True},
+        "user": {"bk_username": username, "verified": True},
+        "exp": int(time.time()) + JWT_EXPIRES,
+    }
+    token = jwt.encode(payload, PRIVATE_KEY, algorithm="RS512")
+    return token if isinstance(token, str) else token.decode("utf-8")
+
+
+def random_username() -> str:
+    return f"user{random.randrange(USER_COUNT)}"
+
+
+def random_action_id() -> str:
+    return f"action_{random.randrange(ACTION_COUNT)}"
+
+
+def random_instances(count: int) -> List[Dict[str, str]]:
+    return [{"id": str(i), "name": f"host-{i}"} for i in random.sample(range(INSTANCE_COUNT), count)]
+
+
+class BaseUser(HttpUser):
+    abstract = True
+    wait_time = between(0.1, 0.5)
+
+    def request(self, method: str, url: str, name: str, **kwargs) -> Optional[Any]:
+        """
+        发送请求并按SaaS响应的result判断成功与否, 返回data
+        """
+        with self.client.request(method, url, name=name, catch_response=True, **kwargs) as resp:
+            try:
+                content = resp.json()
+            except ValueError:
+                resp.failure(f"status: {resp.status_code}, invalid json")
+                return None
+
+            if resp.status_code != 200 or not content.get("result"):
+                resp.failure(f"status: {resp.status_code}, code: {content.get('code')}, {content.get('message')}")
+                return None
+
+            resp.success()
+            return content.get("data")
+
+
+class OpenAPIUser(BaseUser):
+    """
+    通过ESB调用开放API的接入系统
+    """
+
+    abstract = True
+
+    def on_start(self):
+        self._jwt, self._jwt_expired_at = "", 0.0
+
+    def open_request(self, method: str, url: str, name: str, **kwargs) -> Optional[Any]:
+        if time.time() > self._jwt_expired_at:
+            self._jwt, self._jwt_expired_at = sign_jwt("admin"), time.time() + JWT_EXPIRES - 30
+
+        headers = {"X-Bkapi-JWT": self._jwt, "X-Bkapi-From": "esb"}
+        return self.request(method, f"/api/v1/open/{url}", name=name, headers=headers, **kwargs)
+
+
+class AuthorizationUser(OpenAPIUser):
+    weight = 3
+
+    def _instance_data(self, operate: str) -> Dict[str, Any]:
+        instance = random_instances(1)[0]
+        return {
+            "asynchronous": False,
+            "operate": operate,
+            "system": SYSTEM_ID,
+            "action": {"id": random_action_id()},
+            "subject": {"type": "user", "id": random_username()},
+            "resources": [{"system": SYSTEM_ID, "type": RESOURCE_TYPES[-1], **instance}],
+        }
+
+    @task(5)
+    def grant_instance(self):
+        self.open_request(
+            "POST", "authorization/instance/", "authorization/instance[grant]", json=self._instance_data("grant")
+        )
+
+    @task(2)
+    def revoke_instance(self):
+        self.open_request(
+            "POST", "authorization/instance/", "authorization/instance[revoke]", json=self._instance_data("revoke")
+        )
+
+    @task(1)
+    def grant_batch_instance(self):
+        data = {
+            "asynchronous": False,
+            "operate": "grant",
+            "system": SYSTEM_ID,
+            "actions": [{"id": f"action_{i}"} for i in random.sample(range(ACTION_COUNT), min(3, ACTION_COUNT))],
+            "subject": {"type": "user", "id": random_username()},
+            "resources": [
+                {"system": SYSTEM_ID, "type": RESOURCE_TYPES[-1], "instances": random_instances(BATCH_SIZE)}
+            ],
+        }
+        self.open_request("POST", "authorization/batch_instance/", "authorization/batch_instance[grant]", json=data)
+
+
+class GroupMemberUser(OpenAPIUser):
+    weight = 2
+
+    def on_start(self):
+        super().on_start()
+        self.group_id = 0
+
+        name = f"loadtest-{uuid.uuid4().hex[:8]}"
+        role_data = {
+            "system": SYSTEM_ID,
+            "name": name,
+            "description": "load test",
+            "members": ["user0"],
+            "authorization_scopes": [{"system": SYSTEM_ID, "actions": [{"id": random_action_id()}], "resources": []}],
+            "subject_scopes": [{"type": "*", "id": "*"}],
+        }
+        role = self.open_request("POST", "management/grade_managers/", "management/grade_managers", json=role_data)
+        if not role:
+            return
+
+        groups = self.open_request(
+            "POST",
+            f"management/grade_managers/{role['id']}/groups/",
+            "management/grade_managers/{id}/groups",
+            json={"groups": [{"name": name, "description": "load test group"}]},
+        )
+        if groups:
+            self.group_id = groups[0]
+
+    @task(3)
+    def add_members(self):
+        if not self.group_id:
+            return
+        data = {
+            "members": [{"type": "user", "id": random_username()} for _ in range(BATCH_SIZE)],
+            "expired_at": int(time.time()) + 30 * 24 * 3600,
+        }
+        self.open_request(
+            "POST", f"management/groups/{self.group_id}/members/", "management/groups/{id}/members[add]", json=data
+        )
+
+    @task(5)
+    def list_members(self):
+        if not self.group_id:
+            return
+        self.open_request(
+            "GET",
+            f"management/groups/{self.group_id}/members/",
+            "management/groups/{id}/members[list]",
+            params={"limit": 100, "offset": 0},
+        )
+
+    @task(1)
+    def delete_members(self):
+        if not self.group_id:
+            return
+        ids = ",".join(random_username() for _ in range(BATCH_SIZE))
+        self.open_request(
+            "DELETE",
+            f"management/groups/{self.group_id}/members/",
+            "management/groups/{id}/members[delete]",
+            params={"type": "user", "ids": ids},
+        )
+
+
+class PolicyPageUser(BaseUser):
+    """
+    登录SaaS查看个人权限的用户, 替身登录服务直接以bk_token作为用户名
+    """
+
+    weight = 5
+
+    def on_start(self):
+        self.client.cookies.set("bk_token", random_username())
+
+    @task(1)
+    def list_policy_system(self):
+        self.request("GET", "/api/v1/policies/systems/", "policies/systems")
+
+    @task(3)
+    def list_policy(self):
+        self.request("GET", "/api/v1/policies/", "policies", params={"system_id": SYSTEM_ID})
+
+
+@events.quitting.add_listener
+def report(environment, **kwargs):
+    """
+    输出每个接口与整体的吞吐量和P99耗时
+    """
+    stats = environment.stats
+    header = f"{'Name':<60}{'Reqs':>10}{'Fails':>8}{'RPS':>10}{'P50(ms)':>10}{'P99(ms)':>10}"
+    print(header)
+    print("-" * len(header))
+    for entry in sorted(stats.entries.values(), key=lambda e: (e.name, e.method)) + [stats.total]:
+        name = f"{entry.method or ''} {entry.name}".strip()
+        print(
+            f"{name:<60}{entry.num_requests:>10}{entry.num_failures:>8}"
+            f"{entry.total_rps:>10.2f}{entry.get_response_time_percentile(0.5):>10.0f}"
+            f"{entry.get_response_time_percentile(0.99):>10.0f}"
+        )
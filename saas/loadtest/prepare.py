@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+压测前的数据准备, 需要先启动fake_servers.py并将SaaS指向替身:
+- 开放压测系统调用授权类与管理类API的白名单
+- 从替身用户管理同步压测用户
+
+用法(在saas目录下执行):
+    python loadtest/prepare.py --users 1000
+"""
+import argparse
+import os
+import sys
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+
+
+def prepare(system_id: str, users: int):
+    from backend.api.authorization.constants import AuthorizationAPIEnum
+    from backend.api.authorization.models import AuthAPIAllowListConfig
+    from backend.api.constants import ALLOW_ANY
+    from backend.api.management.models import ManagementAPIAllowListConfig
+    from backend.biz.org_sync.syncer import Syncer
+
+    for api in [AuthorizationAPIEnum.AUTHORIZATION_INSTANCE.value]:
+        AuthAPIAllowListConfig.objects.get_or_create(type=api, system_id=system_id, object_id=ALLOW_ANY)
+    ManagementAPIAllowListConfig.objects.get_or_create(api=ALLOW_ANY, system_id=system_id)
+
+    usernames = [f"user{i}" for i in range(users)]
+    not_exists = Syncer().sync_users(usernames)
+    print(f"allow list of {system_id} created, {len(usernames) - len(not_exists)} users synced")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="prepare data for load test")
+    parser.add_argument("--system", default="bk_loadtest")
+    parser.add_argument("--users", type=int, default=1000)
+    options = parser.parse_args()
+
+    django.setup()
+    prepare(options.system, options.users)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest import mock
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+
+from backend.account import role_auth
+from backend.apps.role.models import AnonymousRole, Role, RoleUser
+from backend.service.constants import RoleType
+
+
+@pytest.fixture(autouse=True)
+def local_cache():
+    with mock.patch("backend.account.role_auth.cache", LocMemCache("role_auth", {})), mock.patch(
+        "backend.account.signal_receivers.transaction.on_commit", side_effect=lambda func: func()
+    ):
+        yield
+
+
+@pytest.fixture()
+def role():
+    role = Role.objects.create(name="test", type=RoleType.RATING_MANAGER.value)
+    RoleUser.objects.create(role_id=role.id, username="admin")
+    return role
+
+
+def _gen_request(username: str):
+    return mock.Mock(user=mock.Mock(username=username, is_authenticated=True))
+
+
+@pytest.mark.django_db
+class TestRoleAuthenticate:
+    def test_cached(self, role, django_assert_num_queries):
+        request = _gen_request("admin")
+        with django_assert_num_queries(2):
+            assert role_auth.authenticate(request, role.id).id == role.id
+        with django_assert_num_queries(0):
+            assert role_auth.authenticate(request, role.id).id == role.id
+
+    def test_not_member(self, role):
+        assert isinstance(role_auth.authenticate(_gen_request("test"), role.id), AnonymousRole)
+
+    def test_invalidate(self, role):
+        request = _gen_request("admin")
+        role_auth.authenticate(request, role.id)
+
+        role.name = "new"
+        role.save()
+        assert role_auth.authenticate(request, role.id).name == "new"
+
+        RoleUser.objects.filter(role_id=role.id, username="admin").delete()
+        assert isinstance(role_auth.authenticate(request, role.id), AnonymousRole)
+
+    def test_invalidate_during_check(self, role):
+        request = _gen_request("admin")
+        user_role_exists = RoleUser.objects.user_role_exists
+
+        def remove_member(username, role_id):
+            # 查询DB确认成员关系后, 成员被删除并失效缓存
+            exists = user_role_exists(username, role_id)
+            RoleUser.objects.filter(role_id=role_id, username=username).delete()
+            return exists
+
+        with mock.patch.object(RoleUser.objects, "user_role_exists", side_effect=remove_member):
+            assert role_auth.authenticate(request, role.id).id == role.id
+
+        # 查询期间写入的快照使用的是旧版本号, 不会被使用
+        assert isinstance(role_auth.authenticate(request, role.id), AnonymousRole)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest import mock
+
+import pytest
+
+from blueapps.account import get_user_model
+from blueapps.account.components.bk_token.backends import TokenBackend
+
+
+def _gen_user_info(**kwargs):
+    user_info = {
+        "qq": "",
+        "language": "zh-cn",
+        "time_zone": "Asia/Shanghai",
+        "role": 2,
+        "phone": "",
+        "email": "test@example.com",
+        "wx_userid": "",
+        "chname": "test",
+    }
+    user_info.update(kwargs)
+    return user_info
+
+
+@pytest.mark.django_db
+class TestTokenBackend:
+    def test_authenticate_write_changed_only(self, django_assert_num_queries):
+        backend = TokenBackend()
+        with mock.patch.object(TokenBackend, "verify_bk_token", return_value=(True, "token_user")), mock.patch.object(
+            TokenBackend, "get_user_info", return_value=(True, _gen_user_info())
+        ) as mocked_get_user_info:
+            user = backend.authenticate(bk_token="token")
+            assert user.get_property("role") == "2"
+
+            # 属性无变化: 只查询用户与属性, 不写DB
+            with django_assert_num_queries(2):
+                backend.authenticate(bk_token="token")
+
+            mocked_get_user_info.return_value = (True, _gen_user_info(time_zone="UTC"))
+            backend.authenticate(bk_token="token")
+
+        user = get_user_model().objects.get(username="token_user")
+        assert user.get_property("time_zone") == "UTC"
+        assert user.get_property("chname") == "test"
+        assert user.properties.count() == 8
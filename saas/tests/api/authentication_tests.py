@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import time
+from unittest import mock
+
+import pytest
+from django.test import RequestFactory
+
+from backend.api import authentication
+from backend.api.authentication import ESBAuthentication
+
+
+def _gen_payload(exp: float):
+    return {"user": {"bk_username": "admin", "verified": True}, "app": {"bk_app_code": "bk_test"}, "exp": exp}
+
+
+def _gen_request(jwt: str = "token"):
+    return RequestFactory().get("/", HTTP_X_BKAPI_JWT=jwt, HTTP_X_BKAPI_FROM="esb")
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    authentication._verified_jwt_cache.clear()
+    authentication._user_cache.clear()
+    yield
+
+
+@pytest.mark.django_db
+class TestESBAuthentication:
+    def test_authenticate_cached(self):
+        auth = ESBAuthentication()
+        with mock.patch.object(ESBAuthentication, "_get_jwt_public_key", return_value="key"), mock.patch.object(
+            ESBAuthentication, "_decode_jwt", return_value=_gen_payload(time.time() + 600)
+        ) as mocked_decode:
+            request = _gen_request()
+            user, _ = auth.authenticate(request)
+            assert user.username == "admin"
+            assert request.bk_app_code == "bk_test"
+
+            # 命中缓存时每次返回新的user对象, 不共享ORM实例
+            request = _gen_request()
+            cached_user = auth.authenticate(request)[0]
+            assert cached_user is not user
+            assert cached_user.pk == user.pk
+            assert cached_user.username == "admin"
+            assert not cached_user._state.adding
+            assert request.bk_app_code == "bk_test"
+            assert mocked_decode.call_count == 1
+
+            # 不同的JWT需要重新校验
+            auth.authenticate(_gen_request("other"))
+            assert mocked_decode.call_count == 2
+
+    def test_authenticate_expired_not_cached(self):
+        auth = ESBAuthentication()
+        with mock.patch.object(ESBAuthentication, "_get_jwt_public_key", return_value="key"), mock.patch.object(
+            ESBAuthentication, "_decode_jwt", return_value=_gen_payload(time.time() - 1)
+        ) as mocked_decode:
+            auth.authenticate(_gen_request())
+            auth.authenticate(_gen_request())
+            assert mocked_decode.call_count == 2
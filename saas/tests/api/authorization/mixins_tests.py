@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import pytest
+
+from backend.api.authorization.mixins import AllowItem, AllowListMatcher
+
+
+@pytest.mark.parametrize(
+    "object_ids,object_id,expected",
+    [
+        (["view_host"], "view_host", True),
+        (["eq:view_host"], "view_host_1", False),
+        (["starts_with:view_"], "view_host", True),
+        (["starts_with:view_", "starts_with:edit"], "edit_host", True),
+        (["starts_with:view_host_1"], "view_host", False),
+        (["starts_with:"], "view_host", True),
+        (["starts_with:*"], "view_host", True),
+        (["*"], "view_host", True),
+        (["unknown:view_host"], "view_host", False),
+        ([], "view_host", False),
+    ],
+)
+def test_allow_list_matcher(object_ids, object_id, expected):
+    allow_items = [AllowItem(object_id=i) for i in object_ids]
+    assert AllowListMatcher(allow_items).match(object_id) is expected
+    # 与逐个规则匹配的结果一致
+    assert any(i.match(object_id) for i in allow_items) is expected
+
+
+def test_allow_list_matcher_list_not_matched():
+    matcher = AllowListMatcher([AllowItem(object_id="host"), AllowItem(object_id="starts_with:biz_")])
+    assert matcher.list_not_matched(["host", "biz_1", "set"]) == ["set"]
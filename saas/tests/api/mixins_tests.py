@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest import mock
+
+import pytest
+
+from backend.api.mixins import SubjectUserSyncMixin
+from backend.common.error_codes import APIException
+from backend.service.models import Subject
+
+
+class TestSubjectUserSyncMixin:
+    def test_check_or_sync_users_once(self):
+        subjects = [
+            Subject(type="user", id="user_a"),
+            Subject(type="group", id="1"),
+            Subject(type="user", id="user_b"),
+        ]
+        with mock.patch("backend.api.mixins.Syncer") as mocked_syncer:
+            mocked_syncer.return_value.sync_users.return_value = []
+            SubjectUserSyncMixin().check_or_sync_users(subjects)
+
+        # 多个用户一次性检查同步, 忽略用户组
+        mocked_syncer.return_value.sync_users.assert_called_once_with(["user_a", "user_b"])
+
+    def test_no_user(self):
+        with mock.patch("backend.api.mixins.Syncer") as mocked_syncer:
+            SubjectUserSyncMixin().check_or_sync_users([Subject(type="group", id="1")])
+        mocked_syncer.assert_not_called()
+
+    def test_not_exists(self):
+        with mock.patch("backend.api.mixins.Syncer") as mocked_syncer:
+            mocked_syncer.return_value.sync_users.return_value = ["user_b"]
+            with pytest.raises(APIException) as exc_info:
+                SubjectUserSyncMixin().check_or_sync_users(
+                    [Subject(type="user", id="user_a"), Subject(type="user", id="user_b")]
+                )
+        assert "user[user_b] not exists" in exc_info.value.message
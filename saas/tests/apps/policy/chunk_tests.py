@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from copy import deepcopy
+
+import pytest
+
+from backend.apps.policy.chunk import assemble_resources, digest_chunk, split_resources
+
+
+def gen_resources(host_count: int):
+    return [
+        {
+            "system_id": "bk_cmdb",
+            "type": "host",
+            "condition": [
+                {
+                    "id": "condition1",
+                    "attributes": [],
+                    "instances": [
+                        {
+                            "type": "host",
+                            "path": [
+                                [{"system_id": "bk_cmdb", "type": "host", "id": f"host{i}", "name": f"host{i}"}]
+                                for i in range(host_count)
+                            ],
+                        }
+                    ],
+                }
+            ],
+        }
+    ]
+
+
+def _path_ids(resources):
+    return {p[0]["id"] for p in resources[0]["condition"][0]["instances"][0]["path"]}
+
+
+class TestChunk:
+    @pytest.mark.parametrize("host_count, chunk_size, chunk_count", [(3, 10, 1), (30, 10, 4), (0, 10, 0)])
+    def test_split_and_assemble(self, host_count, chunk_size, chunk_count):
+        resources = gen_resources(host_count)
+        skeleton, chunks = split_resources(deepcopy(resources), chunk_size)
+
+        assert len(chunks) == chunk_count
+        assert skeleton[0]["condition"][0]["instances"][0]["path"] == []
+
+        assembled = assemble_resources(skeleton, chunks.items())
+        assert _path_ids(assembled) == _path_ids(resources)
+
+    def test_append_only_change_one_chunk(self):
+        _, chunks = split_resources(gen_resources(100), 10)
+
+        resources = gen_resources(100)
+        resources[0]["condition"][0]["instances"][0]["path"].append(
+            [{"system_id": "bk_cmdb", "type": "host", "id": "host_new", "name": "host_new"}]
+        )
+        _, new_chunks = split_resources(resources, 10)
+
+        assert chunks.keys() == new_chunks.keys()
+        changed = [key for key in chunks if digest_chunk(chunks[key]) != digest_chunk(new_chunks[key])]
+        assert len(changed) == 1
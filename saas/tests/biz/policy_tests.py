@@ -1,8 +1,10 @@
 from copy import deepcopy
 from typing import List
+from unittest import mock
 
 import pytest
 
+from backend.apps.policy.models import Policy as PolicyModel
 from backend.biz.policy import (
     ConditionBean,
     ConditionBeanList,
@@ -10,9 +12,11 @@ from backend.biz.policy import (
     InstanceBeanList,
     PathNodeBean,
     PathNodeBeanList,
+    PathScopeMatcher,
     PolicyBean,
     PolicyBeanList,
     PolicyEmptyException,
+    PolicyQueryBiz,
     RelatedResourceBean,
     RelatedResourceBeanList,
     group_paths,
@@ -20,7 +24,7 @@ from backend.biz.policy import (
 from backend.common.error_codes import APIException
 from backend.common.time import PERMANENT_SECONDS, expired_at_display
 from backend.service.constants import SelectionMode
-from backend.service.models import PathResourceType, ResourceTypeDict
+from backend.service.models import PathResourceType, ResourceTypeDict, Subject
 from backend.service.models.action import Action, RelatedResourceType
 from backend.service.models.instance_selection import InstanceSelection
 
@@ -110,6 +114,31 @@ class TestPathNodeBeanList:
     def test_to_path_string(self, path_node_bean_list: PathNodeBeanList):
         assert path_node_bean_list.to_path_string() == "/type,id/type1,id1/"
 
+    def test_to_path_string_cache(self, path_node_bean_list: PathNodeBeanList):
+        node = path_node_bean_list.nodes[1]
+        assert node.path_segment == "type1,id1/"
+        assert "_path_segment" not in node.dict()
+
+        node.id = "id2"
+        assert node.path_segment == "type1,id2/"
+
+        assert path_node_bean_list.to_path_string() == "/type,id/type1,id2/"
+
+        # 原地修改路径后, 路径字符串同步变化
+        path_node_bean_list.nodes.pop()
+        assert path_node_bean_list.to_path_string() == "/type,id/"
+
+    def test_path_key_cache(self, path_node_bean_list: PathNodeBeanList):
+        key = path_node_bean_list.path_key
+        assert key == ("type,id/", "type1,id1/")
+        assert path_node_bean_list.path_key is key
+
+        path_node_bean_list.nodes[1].id = "id2"
+        assert path_node_bean_list.path_key == ("type,id/", "type1,id2/")
+
+        path_node_bean_list.nodes = path_node_bean_list.nodes[:1]
+        assert path_node_bean_list.path_key == ("type,id/",)
+
     def test_to_path_resource_types(self, path_node_bean_list: PathNodeBeanList):
         assert path_node_bean_list._to_path_resource_types() == [
             PathResourceType(system_id="system_id", id="type"),
@@ -156,6 +185,42 @@ class TestPathNodeBeanList:
         assert path_node_bean_list.ignore_path(instance_selection) == path_node_bean_list.nodes[start:end]
 
 
+def gen_path_list(*nodes: str) -> PathNodeBeanList:
+    return PathNodeBeanList(
+        [
+            PathNodeBean(id=node.split(",")[1], name="", system_id="system_id", type=node.split(",")[0])
+            for node in nodes
+        ]
+    )
+
+
+class TestPathScopeMatcher:
+    @pytest.mark.parametrize(
+        "scope_paths, path, expected",
+        [
+            ([("a,1", "b,2")], ("a,1", "b,2"), True),
+            ([("a,1",)], ("a,1", "b,2"), True),
+            ([("a,1", "b,2")], ("a,1",), False),
+            ([("a,1", "b,*")], ("a,1", "b,3", "c,4"), True),
+            ([("a,1", "b,*")], ("a,1", "b,*"), True),
+            ([("a,1", "b,*")], ("a,1", "bb,3"), False),
+            ([("a,*", "b,2")], ("a,1", "b,2"), False),
+            ([("a,12",), ("c,3",)], ("a,1", "b,2"), False),
+            ([("a,2",), ("a,1", "b,2")], ("a,1", "b,2", "c,3"), True),
+        ],
+    )
+    def test_match(self, scope_paths, path, expected):
+        scope_path_lists = [gen_path_list(*p) for p in scope_paths]
+        path_list = gen_path_list(*path)
+        assert PathScopeMatcher(scope_path_lists).match(path_list) == expected
+
+        # 与路径字符串前缀比较的结果一致
+        scope_str_paths = [
+            sp[:-2] if sp.endswith(",*/") else sp for sp in (p.to_path_string() for p in scope_path_lists)
+        ]
+        assert any(path_list.to_path_string().startswith(sp) for sp in scope_str_paths) == expected
+
+
 @pytest.fixture()
 def instance_bean(path_node_bean: PathNodeBean):
     path_node_bean1 = path_node_bean.copy(deep=True)
@@ -743,3 +808,70 @@ def test_group_paths():
         ],
     ]
     assert len(group_paths(paths)) == 2
+
+
+@pytest.mark.django_db
+class TestPolicyQueryBiz:
+    @pytest.fixture(autouse=True)
+    def db_policy(self, related_resource_bean: RelatedResourceBean):
+        related_resource_bean.condition[0].instances[0].path = [
+            [{"system_id": "system_id", "type": "type", "id": f"id{i}", "name": f"name{i}"}] for i in range(5)
+        ]
+        p = PolicyModel(subject_type="user", subject_id="admin", system_id="system_id", action_id="id", policy_id=1)
+        p.resources = [related_resource_bean.dict()]
+        p.save()
+
+    @pytest.fixture(autouse=True)
+    def mocked_svc(self, resource_type_dict: ResourceTypeDict):
+        with mock.patch("backend.service.policy.query.iam") as mocked_iam, mock.patch.object(
+            PolicyQueryBiz.resource_type_svc, "get_resource_type_dict", return_value=resource_type_dict
+        ), mock.patch.object(PolicyQueryBiz.action_svc, "new_action_list") as mocked_new_action_list:
+            mocked_iam.list_system_policy.return_value = [
+                {"id": 1, "system": "system_id", "action_id": "id", "expired_at": PERMANENT_SECONDS}
+            ]
+            mocked_new_action_list.return_value.get.return_value = None
+            yield
+
+    def test_list_summary_by_subject(self):
+        summaries = PolicyQueryBiz().list_summary_by_subject("system_id", Subject(type="user", id="admin"))
+        assert len(summaries) == 1
+        assert summaries[0].dict()["id"] == "id"
+        assert summaries[0].related_resource_types[0].instance_count == 5
+        assert summaries[0].related_resource_types[0].name == "name_test"
+
+    def test_list_paging_instance(self):
+        count, results = PolicyQueryBiz().list_paging_instance(
+            "system_id", Subject(type="user", id="admin"), 1, "system_id", "type", 2, 3
+        )
+        assert count == 5
+        assert [one.path[0].id for one in results] == ["id3", "id4"]
+        assert results[0].path[0].type_name == "name_test"
+
+    def test_summary_count_mixed_type(self):
+        # 同一条件中包含拓扑实例与叶子实例, 摘要的实例数量需要与分页接口的总数一致
+        p = PolicyModel.objects.get(policy_id=1)
+        resources = p.resources
+        resources[0]["condition"][0]["instances"].append(
+            {
+                "type": "type1",
+                "name": "name",
+                "path": [
+                    [{"system_id": "system_id", "type": "type1", "id": f"topo{i}", "name": f"topo{i}"}]
+                    for i in range(2)
+                ],
+            }
+        )
+        p.resources = resources
+        p.save()
+
+        subject = Subject(type="user", id="admin")
+        summaries = PolicyQueryBiz().list_summary_by_subject("system_id", subject)
+        count, _ = PolicyQueryBiz().list_paging_instance("system_id", subject, 1, "system_id", "type", 10, 0)
+        assert count == 7
+        assert summaries[0].related_resource_types[0].instance_count == count
+
+    def test_list_paging_instance_not_found(self):
+        with pytest.raises(APIException):
+            PolicyQueryBiz().list_paging_instance(
+                "system_id", Subject(type="user", id="admin"), 2, "system_id", "type", 2, 0
+            )
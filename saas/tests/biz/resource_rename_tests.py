@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+from unittest import mock
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import F
+
+from backend.apps.policy.models import Policy as PolicyModel
+from backend.apps.role.models import RoleScope
+from backend.apps.template.models import PermTemplatePolicyAuthorized
+from backend.biz.resource_rename import ResourceRenameReconciler
+from backend.service.constants import RoleScopeType
+from backend.service.models import Policy, ResourceInstanceBaseInfo, Subject
+from backend.service.policy.operation import PolicyOperationService
+
+
+def _gen_resources(host_id: str, name: str):
+    return [
+        {
+            "system_id": "bk_cmdb",
+            "type": "host",
+            "condition": [
+                {
+                    "id": "condition1",
+                    "attributes": [],
+                    "instances": [
+                        {
+                            "type": "host",
+                            "path": [[{"system_id": "bk_cmdb", "type": "host", "id": host_id, "name": name}]],
+                        }
+                    ],
+                }
+            ],
+        }
+    ]
+
+
+@pytest.fixture(autouse=True)
+def local_cache():
+    cache = LocMemCache("resource_rename", {})
+    with mock.patch("backend.biz.resource_rename.cache", cache), mock.patch("backend.biz.policy.cache") as mocked:
+        mocked.lock.return_value = mock.MagicMock()
+        yield cache
+
+
+@pytest.fixture()
+def reconciler():
+    return ResourceRenameReconciler(batch_size=10)
+
+
+@pytest.fixture()
+def mocked_fetch_instance_name():
+    with mock.patch("backend.biz.resource_rename.ResourceBiz.new_resource_provider") as mocked_new_provider:
+        fetch = mocked_new_provider.return_value.fetch_instance_name
+        fetch.side_effect = lambda ids: [ResourceInstanceBaseInfo(id=_id, display_name=f"new_{_id}") for _id in ids]
+        yield fetch
+
+
+@pytest.mark.django_db
+class TestResourceRenameReconciler:
+    def test_reconcile_policies(self, reconciler, mocked_fetch_instance_name):
+        for i, subject_id in enumerate(["admin", "test"]):
+            p = PolicyModel(
+                subject_type="user",
+                subject_id=subject_id,
+                system_id="bk_cmdb",
+                action_id="view_host",
+                policy_id=i + 1,
+            )
+            p.resources = _gen_resources("host1", "old")
+            p.save()
+
+        reconciler.reconcile_policies()
+
+        # 多个subject的同一资源实例只查询一次
+        mocked_fetch_instance_name.assert_called_once_with(["host1"])
+        for p in PolicyModel.objects.all():
+            assert p.resources[0]["condition"][0]["instances"][0]["path"][0][0]["name"] == "new_host1"
+
+    def test_reconcile_chunked_policies(
+        self, reconciler, mocked_fetch_instance_name, settings, django_assert_num_queries
+    ):
+        settings.POLICY_RESOURCE_STORAGE = "chunked"
+        svc = PolicyOperationService()
+        for subject_id in ["admin", "test", "test1"]:
+            svc._create_db_policies(
+                "bk_cmdb",
+                Subject(type="user", id=subject_id),
+                [
+                    Policy(
+                        action_id="view_host",
+                        related_resource_types=_gen_resources("host1", "old"),
+                        policy_id=0,
+                        expired_at=0,
+                    )
+                ],
+            )
+        PolicyModel.objects.update(policy_id=F("id"))
+
+        # 分块一次性预加载: 分批游标, 策略, 分块各一次查询, 不随策略数量增加
+        with mock.patch.object(ResourceRenameReconciler, "_safe_execute") as mocked_execute, django_assert_num_queries(
+            3
+        ):
+            reconciler.reconcile_policies()
+        assert mocked_execute.call_count == 3
+
+    def test_reconcile_template_authorized_and_role_scope(self, reconciler, mocked_fetch_instance_name):
+        authorized_template = PermTemplatePolicyAuthorized.objects.create(
+            template_id=1,
+            subject_type="user",
+            subject_id="admin",
+            system_id="bk_cmdb",
+            _data=json.dumps(
+                {"actions": [{"id": "view_host", "related_resource_types": _gen_resources("host1", "a")}]}
+            ),
+        )
+        role_scope = RoleScope.objects.create(
+            role_id=1,
+            type=RoleScopeType.AUTHORIZATION.value,
+            content=json.dumps(
+                [
+                    {
+                        "system_id": "bk_cmdb",
+                        "actions": [{"id": "view_host", "related_resource_types": _gen_resources("host2", "b")}],
+                    }
+                ]
+            ),
+        )
+
+        reconciler.reconcile_template_authorized()
+        reconciler.reconcile_role_scopes()
+
+        data = PermTemplatePolicyAuthorized.objects.get(id=authorized_template.id).data
+        assert (
+            data["actions"][0]["related_resource_types"][0]["condition"][0]["instances"][0]["path"][0][0]["name"]
+            == "new_host1"
+        )
+        content = json.loads(RoleScope.objects.get(id=role_scope.id).content)
+        assert (
+            content[0]["actions"][0]["related_resource_types"][0]["condition"][0]["instances"][0]["path"][0][0]["name"]
+            == "new_host2"
+        )
+
+    def test_next_batch_cursor(self):
+        reconciler = ResourceRenameReconciler(batch_size=2)
+        for i in range(3):
+            p = PolicyModel(
+                subject_type="user", subject_id="admin", system_id="bk_cmdb", action_id=f"a{i}", policy_id=i + 1
+            )
+            p.resources = []
+            p.save()
+
+        qs = PolicyModel.objects.all()
+        assert len(reconciler._next_batch("policy", qs)) == 2
+        assert len(reconciler._next_batch("policy", qs)) == 1
+        # 到末尾后从头开始
+        assert len(reconciler._next_batch("policy", qs)) == 2
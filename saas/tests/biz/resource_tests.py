@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from typing import List
+from unittest import mock
+
+from backend.biz.group import GroupBiz
+from backend.biz.resource import ResourceBiz
+from backend.common.local import local
+from backend.metrics.span import get_current_operation, operation_span, stage_span
+from backend.service.models import ResourceAttribute, ResourceInstanceInfo
+
+
+class ProviderRecorder:
+    def __init__(self) -> None:
+        self.providers: List[mock.Mock] = []
+
+    def __call__(self, system_id, resource_type_id):
+        rp = mock.Mock(system_id=system_id, resource_type_id=resource_type_id)
+        rp.list_attr.return_value = [ResourceAttribute(id="os", display_name="os")]
+        rp.fetch_instance_info.side_effect = lambda ids, attrs: [
+            ResourceInstanceInfo(id=_id, display_name=_id, attributes={"os": f"{resource_type_id}_{_id}"})
+            for _id in ids
+        ]
+        self.providers.append(rp)
+        return rp
+
+    def fetch_calls(self):
+        return sorted(
+            (rp.resource_type_id, call[0][0])
+            for rp in self.providers
+            for call in rp.fetch_instance_info.call_args_list
+        )
+
+    def list_attr_count(self):
+        return sum(rp.list_attr.call_count for rp in self.providers)
+
+
+class TestResourceBiz:
+    def test_batch_fetch_auth_attributes(self):
+        recorder = ProviderRecorder()
+        with mock.patch.object(ResourceBiz, "new_resource_provider", side_effect=recorder):
+            result = ResourceBiz().batch_fetch_auth_attributes(
+                {("batch_system", "host"): ["h2", "h1", "h2"], ("batch_system", "set"): ["s1"]}
+            )
+            assert result[("batch_system", "host")].get_attributes("h1") == {"os": "host_h1"}
+            assert result[("batch_system", "set")].get_attributes("s1") == {"os": "set_s1"}
+            assert recorder.fetch_calls() == [("host", ["h1", "h2"]), ("set", ["s1"])]
+
+            # 资源类型的属性列表被缓存
+            ResourceBiz().batch_fetch_auth_attributes({("batch_system", "host"): ["h3"]})
+            assert recorder.list_attr_count() == 2
+
+    def test_batch_fetch_in_caller_context(self):
+        recorder = ProviderRecorder()
+        contexts = []
+
+        def new_provider(system_id, resource_type_id):
+            rp = recorder(system_id, resource_type_id)
+            fetch = rp.fetch_instance_info.side_effect
+
+            def side_effect(ids, attrs):
+                contexts.append((local.request, get_current_operation()))
+                with stage_span("callback"):
+                    return fetch(ids, attrs)
+
+            rp.fetch_instance_info.side_effect = side_effect
+            return rp
+
+        request = mock.Mock(request_id="request_id")
+        local.request = request
+        try:
+            with mock.patch.object(ResourceBiz, "new_resource_provider", side_effect=new_provider), operation_span(
+                "grant", "context_system"
+            ):
+                operation = get_current_operation()
+                ResourceBiz().batch_fetch_auth_attributes(
+                    {("context_system", "host"): ["h1"], ("context_system", "set"): ["s1"]}
+                )
+        finally:
+            local.release()
+
+        # 工作线程中可以读取到调用线程的request与策略操作
+        assert contexts == [(request, operation), (request, operation)]
+        assert operation.counts["callback"] == 2
+
+
+class TestGroupBiz:
+    def test_fill_resources_attribute(self):
+        resources = [
+            {"system": "fill_system", "type": "host", "id": "h1", "attribute": {}},
+            {"system": "fill_system", "type": "set", "id": "s1", "attribute": {}},
+            {"system": "fill_system", "type": "host", "id": "h1", "attribute": {}},
+            {"system": "fill_system", "type": "host", "id": "*", "attribute": {"os": ["linux"]}},
+        ]
+        recorder = ProviderRecorder()
+        with mock.patch.object(ResourceBiz, "new_resource_provider", side_effect=recorder):
+            GroupBiz()._fill_resources_attribute(resources)
+
+        # 不相邻的同类型资源也只查询一次
+        assert recorder.fetch_calls() == [("host", ["h1"]), ("set", ["s1"])]
+        assert resources[0]["attribute"] == resources[2]["attribute"] == {"os": "host_h1"}
+        assert resources[1]["attribute"] == {"os": "set_s1"}
+        assert resources[3]["attribute"] == {"os": ["linux"]}
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest import mock
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+
+from backend.apps.organization.models import User
+from backend.biz.org_sync.syncer import Syncer
+from backend.biz.org_sync.user_cache import KnownUserCache
+
+
+def _gen_user(user_id: int, username: str):
+    return {"id": user_id, "username": username, "display_name": "", "staff_status": "IN", "category_id": 1}
+
+
+@pytest.fixture()
+def known_user_cache():
+    user_cache = KnownUserCache()
+    with mock.patch("backend.biz.org_sync.user_cache.cache", LocMemCache("known_user", {})), mock.patch(
+        "backend.biz.org_sync.syncer.known_user_cache", user_cache
+    ):
+        yield user_cache
+
+
+@pytest.fixture()
+def mocked_component():
+    with mock.patch("backend.biz.org_sync.syncer.usermgr") as mocked_usermgr, mock.patch(
+        "backend.biz.org_sync.syncer.iam"
+    ) as mocked_iam:
+        yield mocked_usermgr, mocked_iam
+
+
+@pytest.mark.django_db
+class TestSyncer:
+    def test_sync_users(self, known_user_cache, mocked_component):
+        mocked_usermgr, mocked_iam = mocked_component
+        User.objects.create(id=90001, username="exists_user", display_name="", staff_status="IN", category_id=1)
+        mocked_usermgr.list_user_by_usernames.return_value = [_gen_user(90002, "new_user")]
+
+        not_exists = Syncer().sync_users(["exists_user", "new_user", "not_exists_user", "new_user"])
+
+        assert not_exists == ["not_exists_user"]
+        # 未同步的用户一次性查询
+        mocked_usermgr.list_user_by_usernames.assert_called_once_with(["new_user", "not_exists_user"])
+        mocked_iam.create_subjects.assert_called_once_with([{"type": "user", "id": "new_user", "name": "new_user"}])
+        assert User.objects.filter(username="new_user").exists()
+
+        # 已知用户直接命中缓存
+        mocked_usermgr.reset_mock()
+        with mock.patch.object(User.objects, "filter") as mocked_filter:
+            assert Syncer().sync_users(["exists_user", "new_user"]) == []
+            mocked_filter.assert_not_called()
+        mocked_usermgr.list_user_by_usernames.assert_not_called()
+
+    def test_sync_users_concurrently(self, known_user_cache, mocked_component):
+        mocked_usermgr, mocked_iam = mocked_component
+
+        def list_user_by_usernames(usernames):
+            # 查询UserMgr期间, 其他请求已同步了该用户
+            User.objects.create(id=90003, username="user_a", display_name="", staff_status="IN", category_id=1)
+            return [_gen_user(90003, "user_a"), _gen_user(90004, "user_b")]
+
+        mocked_usermgr.list_user_by_usernames.side_effect = list_user_by_usernames
+
+        assert Syncer().sync_users(["user_a", "user_b"]) == []
+        # 只同步本次创建的用户到IAM后台
+        mocked_iam.create_subjects.assert_called_once_with([{"type": "user", "id": "user_b", "name": "user_b"}])
+        assert User.objects.filter(username__in=["user_a", "user_b"]).count() == 2
+
+    def test_cache_invalidate(self, known_user_cache):
+        known_user_cache.add(["admin"])
+        assert known_user_cache.filter_unknown(["admin", "test"]) == ["test"]
+
+        # 进程内缓存失效后仍可从Redis读取
+        known_user_cache._local.clear()
+        assert known_user_cache.filter_unknown(["admin"]) == []
+
+        known_user_cache.invalidate()
+        assert known_user_cache.filter_unknown(["admin"]) == ["admin"]
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest import mock
+
+from backend.common.celery_signal_receivers import worker_process_shutdown_handler
+from backend.common.debug import RedisObserver, RedisStorage, SensitiveCleaner, TraceFlusher
+
+
+def _gen_storage(cli):
+    with mock.patch("backend.common.debug.get_redis_connection", return_value=cli):
+        return RedisStorage()
+
+
+class TestSensitiveCleaner:
+    def test_clean_copy_on_write(self):
+        data = {
+            "id": "1",
+            "stack": [{"url": "http://127.0.0.1/api/", "body": {"a": 1}}, {"url": "http://iam/", "body": {"b": 2}}],
+            "data": {"bk_app_secret": "secret"},
+            "exc": {"c": 3},
+        }
+        clean_data = SensitiveCleaner().clean(data)
+
+        assert clean_data["stack"][0]["url"] == "http://ip/api/"
+        assert clean_data["data"]["bk_app_secret"] == "***"
+        # 原数据不变
+        assert data["stack"][0]["url"] == "http://127.0.0.1/api/"
+        assert data["data"]["bk_app_secret"] == "secret"
+        # 未改写的部分共享
+        assert clean_data["exc"] is data["exc"]
+        assert clean_data["stack"][0]["body"] is data["stack"][0]["body"]
+        assert clean_data["stack"][1] is data["stack"][1]
+
+    def test_clean_unchanged(self):
+        data = {"id": "1", "stack": [{"url": "http://iam/"}]}
+        assert SensitiveCleaner().clean(data) is data
+
+
+class TestRedisStorage:
+    def test_set_many_single_pipeline(self):
+        cli = mock.MagicMock()
+        pipe = cli.pipeline.return_value.__enter__.return_value
+        pipe.execute.return_value = [True, 1, 1, True, [], True]
+        storage = _gen_storage(cli)
+
+        storage.set_many([{"id": "t1", "type": "task"}])
+
+        assert cli.pipeline.call_count == 1
+        pipe.lpush.assert_any_call(storage.queue_key, "t1")
+        pipe.ltrim.assert_called_once_with(storage.queue_key, 0, storage.queue_size - 1)
+        assert pipe.expire.call_count == 1
+        pipe.delete.assert_not_called()
+
+    def test_set_many_delete_overflow(self):
+        cli = mock.MagicMock()
+        pipe = cli.pipeline.return_value.__enter__.return_value
+        pipe.execute.return_value = [True, 1, [b"old"], True]
+        storage = _gen_storage(cli)
+
+        storage.set_many([{"id": "a1", "type": "api"}])
+
+        assert cli.pipeline.call_count == 2
+        pipe.delete.assert_called_once_with("iam:debug:old")
+
+
+class TestRedisObserver:
+    def test_sample(self):
+        with mock.patch("backend.common.debug.get_redis_connection"):
+            observer = RedisObserver()
+        observer.flusher = mock.MagicMock()
+
+        observer.sample_rate = 0
+        observer.update({"id": "1", "type": "api"})
+        observer.flusher.put.assert_not_called()
+
+        observer.sample_rate = 1
+        observer.update({"id": "1", "type": "api"})
+        observer.flusher.put.assert_called_once()
+
+    def test_flusher_drop_when_full(self):
+        storage = mock.MagicMock()
+        flusher = TraceFlusher(storage, maxsize=2)
+        with mock.patch.object(TraceFlusher, "_ensure_thread"):
+            for i in range(3):
+                flusher.put({"id": str(i), "type": "api"})
+
+        flusher.flush()
+        storage.set_many.assert_called_once_with([{"id": "0", "type": "api"}, {"id": "1", "type": "api"}])
+
+    def test_flush_on_worker_process_shutdown(self):
+        storage = mock.MagicMock()
+        with mock.patch("backend.common.debug.get_redis_connection"):
+            observer = RedisObserver()
+        observer.flusher = TraceFlusher(storage)
+        with mock.patch.object(TraceFlusher, "_ensure_thread"):
+            observer.update({"id": "1", "type": "api"})
+
+        with mock.patch("backend.common.debug.receiver._observers", [observer]):
+            worker_process_shutdown_handler(pid=1, exitcode=0)
+        storage.set_many.assert_called_once_with([{"id": "1", "type": "api"}])
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest import mock
+
+import pytest
+
+from backend.common.local import local
+from backend.common.memo import invalidate_request_memo, request_memoize
+from backend.service.action import ActionService
+
+
+class Service:
+    def __init__(self):
+        self.calls = 0
+
+    @request_memoize("test_list")
+    def list(self, system_ids):
+        self.calls += 1
+        return [self.calls]
+
+    @request_memoize("test_copy", copy=True)
+    def list_copy(self):
+        return [1]
+
+
+@pytest.fixture()
+def request_scope():
+    local.request = mock.MagicMock()
+    yield
+    local.release()
+
+
+class TestRequestMemoize:
+    def test_memo_in_request(self, request_scope):
+        svc = Service()
+        assert svc.list(["bk_cmdb"]) == [1]
+        assert svc.list(["bk_cmdb"]) == [1]
+        assert svc.list(system_ids=["bk_job"]) == [2]
+
+        invalidate_request_memo("test_list")
+        assert svc.list(["bk_cmdb"]) == [3]
+
+    def test_memo_copy(self, request_scope):
+        svc = Service()
+        svc.list_copy().append(2)
+        assert svc.list_copy() == [1]
+
+    def test_no_memo_without_request(self):
+        svc = Service()
+        svc.list(["bk_cmdb"])
+        svc.list(["bk_cmdb"])
+        assert svc.calls == 2
+
+    def test_release(self):
+        svc = Service()
+        local.request = mock.MagicMock()
+        svc.list(["bk_cmdb"])
+        local.release()
+
+        local.request = mock.MagicMock()
+        svc.list(["bk_cmdb"])
+        local.release()
+        assert svc.calls == 2
+
+    def test_action_list_not_shared(self, request_scope):
+        with mock.patch("backend.service.action.iam") as mocked_iam:
+            mocked_iam.list_action.return_value = [
+                {"id": "view_host", "name": "view", "name_en": "view", "description": "", "description_en": ""}
+            ]
+            svc = ActionService()
+            svc.list("memo_system")[0].name = "changed"
+            assert svc.list("memo_system")[0].name == "view"
+            mocked_iam.list_action.assert_called_once()
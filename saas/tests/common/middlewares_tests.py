@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest import mock
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from backend.common.middlewares import CustomProfilerMiddleware
+
+
+def _gen_request(path="/api/v1/systems/", **extra):
+    request = RequestFactory().get(path, **extra)
+    request.request_id = "r1"
+    request.user = mock.MagicMock(username="admin")
+    return request
+
+
+@pytest.fixture()
+def storage():
+    storage = mock.MagicMock()
+    with mock.patch("backend.common.middlewares.RedisStorage", return_value=storage):
+        yield storage
+
+
+class TestCustomProfilerMiddleware:
+    def test_disabled(self, storage):
+        middleware = CustomProfilerMiddleware(lambda r: HttpResponse("ok"))
+        assert middleware(_gen_request()).content == b"ok"
+        storage.set_profile.assert_not_called()
+
+    @override_settings(PYINSTRUMENT_SAMPLE_RATE=2)
+    def test_sample(self, storage):
+        middleware = CustomProfilerMiddleware(lambda r: HttpResponse("ok"))
+        for _ in range(4):
+            middleware(_gen_request())
+        # 非API请求不统计
+        middleware(_gen_request("/static/"))
+
+        assert storage.set_profile.call_count == 2
+        data = storage.set_profile.call_args[0][0]
+        assert data["id"] == "r1"
+        assert data["path"] == "/api/v1/systems/"
+        assert data["renderer"] == "html"
+        assert data["content"]
+
+    @override_settings(PYINSTRUMENT_SLOW_THRESHOLD=10)
+    def test_slow_threshold(self, storage):
+        middleware = CustomProfilerMiddleware(lambda r: HttpResponse("ok"))
+        middleware(_gen_request())
+        storage.set_profile.assert_not_called()
+
+    @override_settings(PYINSTRUMENT_DEBUG_USERS=["admin"], PYINSTRUMENT_RENDERER="json")
+    def test_debug_header(self, storage):
+        middleware = CustomProfilerMiddleware(lambda r: HttpResponse("ok"))
+        middleware(_gen_request(HTTP_X_BKIAM_PROFILE="1"))
+        assert storage.set_profile.call_args[0][0]["renderer"] == "json"
+
+        request = _gen_request(HTTP_X_BKIAM_PROFILE="1")
+        request.user = mock.MagicMock(username="other")
+        middleware(request)
+        assert storage.set_profile.call_count == 1
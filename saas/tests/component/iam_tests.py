@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest import mock
+
+from backend.component import iam
+from backend.util.cache import cache_dictionary
+
+
+def test_list_resource_type_cache_by_system():
+    cache_dictionary.clear()
+
+    def _call_iam_api(http_func, url_path, data):
+        return {system_id: [{"id": f"{system_id}_type"}] for system_id in data["systems"].split(",")}
+
+    with mock.patch.object(iam, "_call_iam_api", side_effect=_call_iam_api) as mocked_call:
+        assert iam.list_resource_type(["bk_cmdb", "bk_job"]).keys() == {"bk_cmdb", "bk_job"}
+        # 顺序不同, 命中缓存
+        assert iam.list_resource_type(["bk_job", "bk_cmdb"])["bk_job"] == [{"id": "bk_job_type"}]
+        assert mocked_call.call_count == 1
+
+        # 只查询未缓存的系统
+        assert iam.list_resource_type(["bk_cmdb", "bk_sops"]).keys() == {"bk_cmdb", "bk_sops"}
+        assert mocked_call.call_args[1]["data"]["systems"] == "bk_sops"
+
+    cache_dictionary.clear()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import pytest
+from django.test import override_settings
+
+from backend.metrics import OTHER_PATH, get_component_by_url, get_component_route
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("http://iam/api/v1/web/systems", ("iam_backend", "/api/v1/web/systems")),
+        ("http://iam/api/v1/web/systems/bk_cmdb", ("iam_backend", "/api/v1/web/systems/{system_id}")),
+        (
+            "http://iam/api/v1/web/systems/bk_cmdb/policies",
+            ("iam_backend", "/api/v1/web/systems/{system_id}/policies"),
+        ),
+        (
+            "http://iam/prefix/api/v1/web/systems/bk_cmdb/system-settings/action-groups",
+            ("iam_backend", "/prefix/api/v1/web/systems/{system_id}/system-settings/action-groups"),
+        ),
+        (
+            "http://iam/api/v1/web/systems/bk_cmdb/actions/view_host",
+            ("iam_backend", "/api/v1/web/systems/{system_id}/actions/{action_id}"),
+        ),
+        (
+            "http://iam/api/v1/web/systems/bk_cmdb/actions/view_host/policies",
+            ("iam_backend", "/api/v1/web/systems/{system_id}/actions/{action_id}/policies"),
+        ),
+        ("http://iam/api/v1/web/model-change-event/12", ("iam_backend", "/api/v1/web/model-change-event/{event_pk}")),
+        ("http://iam/api/v1/web/subject-members?id=1", ("iam_backend", "/api/v1/web/subject-members")),
+        (
+            "http://esb/api/c/compapi/v2/usermanage/list_users/",
+            ("usermgr", "/api/c/compapi/v2/usermanage/list_users/"),
+        ),
+        ("http://other/api/v1/objects/1/", ("unknown", OTHER_PATH)),
+    ],
+)
+def test_get_component_route(url, expected):
+    assert get_component_route(url) == expected
+    assert get_component_by_url(url) == expected[0]
+
+
+@override_settings(METRICS_PATH_ALLOW_LIST=["/api/v1/objects/"])
+def test_get_component_route_allow_list():
+    assert get_component_route("http://other/api/v1/objects/1/") == ("unknown", "/api/v1/objects/1/")
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest import mock
+
+from django.test import override_settings
+
+from backend.metrics import span
+from backend.metrics.span import get_current_operation, operation_span, stage_span, trace_operation
+
+
+@stage_span("db_read")
+def _read():
+    return get_current_operation()
+
+
+@trace_operation("alter")
+def _alter(system_id, subject):
+    with operation_span("inner", system_id):
+        return _read()
+
+
+class TestSpan:
+    def test_stage_outside_operation(self):
+        assert _read() is None
+
+    def test_operation(self):
+        with mock.patch.object(span, "policy_operation_stage_duration") as mocked_histogram:
+            with operation_span("grant", "bk_cmdb"):
+                operation = _read()
+                _read()
+
+        assert get_current_operation() is None
+        assert operation.counts == {"db_read": 2, "total": 1}
+        stages = [c[1]["stage"] for c in mocked_histogram.labels.call_args_list]
+        assert stages == ["db_read", "db_read", "total"]
+        mocked_histogram.labels.assert_any_call(system="bk_cmdb", operation="grant", stage="total")
+
+    def test_nested_operation(self):
+        with mock.patch.object(span, "policy_operation_stage_duration"):
+            operation = _alter("bk_cmdb", None)
+
+        # 内层操作合并到外层
+        assert operation.operation == "alter"
+        assert operation.counts == {"db_read": 1, "total": 1}
+
+    @override_settings(ENABLE_DEBUG_TRACE_SPAN=True)
+    def test_debug_trace(self):
+        with mock.patch.object(span, "policy_operation_stage_duration"), mock.patch.object(
+            span, "span_trace"
+        ) as mocked_trace:
+            _alter(system_id="bk_cmdb", subject=None)
+
+        kwargs = mocked_trace.call_args[1]
+        assert kwargs["operation"] == "alter"
+        assert kwargs["system"] == "bk_cmdb"
+        assert kwargs["stages"]["db_read"]["count"] == 1
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest import mock
+
+import pytest
+
+from backend.common.celery_signal_receivers import task_postrun_handler
+from backend.publisher import publisher as publisher_module
+from backend.publisher.publisher import DeletePolicyPublisher
+
+
+@pytest.fixture()
+def mocked_push():
+    with mock.patch.object(publisher_module, "is_pub_sub_enabled", return_value=True), mock.patch.object(
+        publisher_module, "push_delete_policies_messages"
+    ) as mocked_push, mock.patch.object(
+        publisher_module, "publish_delete_policies_message_by_celery"
+    ) as mocked_celery:
+        yield mocked_push, mocked_celery
+
+
+class TestDeletePolicyPublisher:
+    def test_merge_in_window(self, mocked_push):
+        push, celery = mocked_push
+        publisher = DeletePolicyPublisher(batch_window=60)
+        publisher.publish("policy", {"policy_ids": [1, 2]})
+        publisher.publish("policy", {"policy_ids": [3]})
+        publisher.publish("subject", {"subjects": [{"type": "group", "id": "1"}]})
+        push.assert_not_called()
+
+        publisher._timer.cancel()
+        publisher.flush()
+
+        messages = push.call_args[0][0]
+        assert [(m["type"], m["data"]) for m in messages] == [
+            ("policy", {"policy_ids": [1, 2, 3]}),
+            ("subject", {"subjects": [{"type": "group", "id": "1"}]}),
+        ]
+        celery.assert_not_called()
+
+    def test_split_large_message(self, mocked_push):
+        push, _ = mocked_push
+        publisher = DeletePolicyPublisher(batch_window=0)
+        publisher.publish("policy", {"policy_ids": list(range(publisher_module.MESSAGE_MAX_ITEMS + 1))})
+        assert [len(m["data"]["policy_ids"]) for m in push.call_args[0][0]] == [publisher_module.MESSAGE_MAX_ITEMS, 1]
+
+    def test_fallback_to_celery(self, mocked_push):
+        push, celery = mocked_push
+        push.side_effect = Exception("redis error")
+        publisher = DeletePolicyPublisher(batch_window=0)
+        publisher.publish("policy", {"policy_ids": [1]})
+        assert celery.call_args[0][0]["data"] == {"policy_ids": [1]}
+
+    def test_reset_after_fork(self, mocked_push):
+        push, _ = mocked_push
+        publisher = DeletePolicyPublisher(batch_window=60)
+        publisher.publish("policy", {"policy_ids": [1]})
+        publisher._timer.cancel()
+
+        # 模拟fork出的子进程: 父进程的缓冲与定时器被丢弃, 重新调度推送
+        with mock.patch.object(publisher_module.os, "getpid", return_value=publisher._pid + 1):
+            publisher.publish("policy", {"policy_ids": [2]})
+            assert publisher._timer is not None
+            publisher._timer.cancel()
+            publisher.flush()
+
+        assert push.call_args[0][0][0]["data"] == {"policy_ids": [2]}
+
+    def test_flush_on_task_postrun(self, mocked_push):
+        push, _ = mocked_push
+        publisher = DeletePolicyPublisher(batch_window=60)
+        publisher.publish("policy", {"policy_ids": [1]})
+        publisher._timer.cancel()
+
+        with mock.patch("backend.common.celery_signal_receivers.publisher", publisher):
+            task_postrun_handler(task_id="task")
+        assert push.call_args[0][0][0]["data"] == {"policy_ids": [1]}
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest import mock
+
+import pytest
+import redis
+
+from backend.publisher.connection import push_delete_policies_messages
+from backend.publisher.constants import DELETE_POLICY_STREAM_KEY
+from backend.publisher.stream import DeletePolicyStreamConsumer
+
+
+def test_push_to_stream(settings):
+    settings.PUB_SUB_BACKEND = "stream"
+    with mock.patch("backend.publisher.connection.get_pub_sub_redis") as mocked_redis:
+        pipe = mocked_redis.return_value.pipeline.return_value.__enter__.return_value
+        push_delete_policies_messages([{"type": "policy", "data": {"policy_ids": [1]}}, {"type": "subject"}])
+
+    assert pipe.execute_command.call_count == 2
+    args = pipe.execute_command.call_args_list[0][0]
+    assert args[:6] == ("XADD", DELETE_POLICY_STREAM_KEY, "MAXLEN", "~", 100000, "*")
+    pipe.lpush.assert_not_called()
+    pipe.execute.assert_called_once_with()
+
+
+class TestDeletePolicyStreamConsumer:
+    def test_read_and_ack(self):
+        client = mock.Mock()
+        client.execute_command.return_value = [
+            [DELETE_POLICY_STREAM_KEY, [["1-0", ["message", '{"type": "policy"}']], ["2-0", []]]]
+        ]
+        consumer = DeletePolicyStreamConsumer("cache", "worker1", client=client)
+
+        assert consumer.read(count=10, block_ms=100) == [("1-0", {"type": "policy"}), ("2-0", {})]
+        client.execute_command.assert_called_with(
+            "XREADGROUP",
+            "GROUP",
+            "cache",
+            "worker1",
+            "COUNT",
+            10,
+            "BLOCK",
+            100,
+            "STREAMS",
+            DELETE_POLICY_STREAM_KEY,
+            ">",
+        )
+
+        consumer.ack(["1-0", "2-0"])
+        client.execute_command.assert_called_with("XACK", DELETE_POLICY_STREAM_KEY, "cache", "1-0", "2-0")
+
+    def test_ensure_group_exists(self):
+        client = mock.Mock()
+        client.execute_command.side_effect = redis.ResponseError("BUSYGROUP Consumer Group name already exists")
+        DeletePolicyStreamConsumer("cache", "worker1", client=client).ensure_group()
+
+        client.execute_command.side_effect = redis.ResponseError("ERR other")
+        with pytest.raises(redis.ResponseError):
+            DeletePolicyStreamConsumer("cache", "worker1", client=client).ensure_group()
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+
+import pytest
+
+from backend.apps.group.models import GroupPolicyIndex
+from backend.apps.policy.models import Policy as PolicyModel
+from backend.apps.template.models import PermTemplatePolicyAuthorized
+from backend.service.engine import PolicyResource
+from backend.service.group_policy_index import GroupPolicyIndexService
+
+
+def _gen_related_resource_types(paths=None, attributes=None):
+    return [
+        {
+            "system_id": "bk_cmdb",
+            "type": "host",
+            "condition": [
+                {
+                    "id": "condition1",
+                    "instances": [
+                        {
+                            "type": "host",
+                            "path": [
+                                [{"system_id": "bk_cmdb", "type": t, "id": i, "name": i} for t, i in path]
+                                for path in paths
+                            ],
+                        }
+                    ]
+                    if paths
+                    else [],
+                    "attributes": [
+                        {"id": k, "name": k, "values": [{"id": v, "name": v} for v in values]}
+                        for k, values in (attributes or {}).items()
+                    ],
+                }
+            ],
+        }
+    ]
+
+
+def _create_policy(group_id: int, action_id: str, related_resource_types):
+    p = PolicyModel(
+        subject_type="group", subject_id=str(group_id), system_id="bk_cmdb", action_id=action_id, policy_id=group_id
+    )
+    p.resources = related_resource_types
+    p.save()
+
+
+def _gen_host(host_id: str, path: str = "", **attrs):
+    attribute = dict(attrs)
+    if path:
+        attribute["_bk_iam_path_"] = path
+    return {"system": "bk_cmdb", "type": "host", "id": host_id, "attribute": attribute}
+
+
+@pytest.fixture()
+def svc():
+    svc = GroupPolicyIndexService()
+    # 1: 整个业务1下的主机
+    _create_policy(1, "view_host", _gen_related_resource_types(paths=[[("biz", "1")]]))
+    # 2: 指定主机
+    _create_policy(2, "view_host", _gen_related_resource_types(paths=[[("biz", "1"), ("host", "h1")]]))
+    # 3: 任意主机, 来自模板授权
+    PermTemplatePolicyAuthorized.objects.create(
+        template_id=1,
+        subject_type="group",
+        subject_id="3",
+        system_id="bk_cmdb",
+        _data=json.dumps(
+            {
+                "actions": [
+                    {
+                        "id": "view_host",
+                        "related_resource_types": [{"system_id": "bk_cmdb", "type": "host", "condition": []}],
+                    }
+                ]
+            }
+        ),
+    )
+    # 4: 属性os=linux的主机
+    _create_policy(4, "view_host", _gen_related_resource_types(attributes={"os": ["linux"]}))
+
+    for group_id in [1, 2, 3, 4]:
+        svc.rebuild("bk_cmdb", group_id)
+    return svc
+
+
+@pytest.mark.django_db
+class TestGroupPolicyIndexService:
+    def test_list_group_ids(self, svc):
+        policy_resources = [PolicyResource(action_id="view_host", resources=[_gen_host("h1", "/biz,1/", os="linux")])]
+        assert svc.list_group_ids("bk_cmdb", policy_resources) == [1, 2, 3, 4]
+
+        # 需要覆盖所有申请的资源
+        resources = [_gen_host("h1", "/biz,1/", os="linux"), _gen_host("h2", "/biz,1/", os="windows")]
+        assert svc.list_group_ids("bk_cmdb", [PolicyResource(action_id="view_host", resources=resources)]) == [1, 3]
+
+        # 申请任意资源
+        assert svc.list_group_ids("bk_cmdb", [PolicyResource(action_id="view_host", resources=[])]) == [3]
+
+        assert svc.list_group_ids("bk_cmdb", [PolicyResource(action_id="edit_host", resources=[])]) == []
+
+    def test_no_resource_count_limit(self, svc):
+        resources = [_gen_host(f"h{i}", "/biz,1/") for i in range(100)]
+        assert svc.list_group_ids("bk_cmdb", [PolicyResource(action_id="view_host", resources=resources)]) == [1, 3]
+
+    def test_rebuild_after_change(self, svc):
+        PolicyModel.objects.filter(subject_id="1").delete()
+        svc.rebuild("bk_cmdb", 1)
+
+        resources = [_gen_host("h2", "/biz,1/")]
+        assert svc.list_group_ids("bk_cmdb", [PolicyResource(action_id="view_host", resources=resources)]) == [3]
+
+    def test_rebuild_actions(self, svc):
+        _create_policy(1, "edit_host", _gen_related_resource_types(paths=[[("biz", "1")]]))
+        svc.rebuild("bk_cmdb", 1, ["edit_host"])
+
+        resources = [_gen_host("h1", "/biz,1/")]
+        assert svc.list_group_ids("bk_cmdb", [PolicyResource(action_id="edit_host", resources=resources)]) == [1]
+
+        # 只重建变更的操作, 其他操作的索引不变
+        PolicyModel.objects.filter(subject_id="1", action_id="view_host").delete()
+        svc.rebuild("bk_cmdb", 1, ["edit_host"])
+        assert GroupPolicyIndex.objects.filter(group_id=1, action_id="view_host").count() == 1
+
+        svc.rebuild("bk_cmdb", 1, ["view_host"])
+        assert not GroupPolicyIndex.objects.filter(group_id=1, action_id="view_host").exists()
+
+    def test_delete(self, svc):
+        svc.delete_by_group(1)
+        resources = [_gen_host("h1", "/biz,1/", os="linux")]
+        assert svc.list_group_ids("bk_cmdb", [PolicyResource(action_id="view_host", resources=resources)]) == [2, 3, 4]
+
+        svc.delete_by_action("bk_cmdb", "view_host")
+        assert not GroupPolicyIndex.objects.filter(system_id="bk_cmdb", action_id="view_host").exists()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest import mock
+
+import pytest
+from django.db import connection
+
+from backend.apps.policy.models import Policy as PolicyModel
+from backend.apps.policy.models import PolicyResourceChunk
+from backend.service.models import Policy, Subject
+from backend.service.policy.operation import PolicyOperationService
+
+
+@pytest.fixture()
+def subject():
+    return Subject(type="user", id="admin")
+
+
+def _new_policy(action_id: str, policy_id: int = 0) -> Policy:
+    return Policy(action_id=action_id, related_resource_types=[], policy_id=policy_id, expired_at=4102444800)
+
+
+@pytest.mark.django_db
+class TestPolicyOperationServiceAlter:
+    def test_alter_use_returned_policy_ids(self, subject):
+        with mock.patch("backend.service.policy.operation.iam") as mocked_iam:
+            mocked_iam.alter_policies.return_value = {"create_policy_ids": {"view_host": 11, "edit_host": 12}}
+            PolicyOperationService().alter("bk_test", subject, [_new_policy("view_host"), _new_policy("edit_host")])
+
+            mocked_iam.list_system_policy.assert_not_called()
+
+        policy_ids = dict(
+            PolicyModel.objects.filter(system_id="bk_test", subject_id="admin").values_list("action_id", "policy_id")
+        )
+        assert policy_ids == {"view_host": 11, "edit_host": 12}
+
+    def test_alter_fallback_sync_policy_id(self, subject):
+        with mock.patch("backend.service.policy.operation.iam") as mocked_iam, mock.patch(
+            "backend.service.policy.query.iam"
+        ) as mocked_query_iam:
+            mocked_iam.alter_policies.return_value = {}
+            atomic_depth = len(connection.savepoint_ids)
+            sync_atomic_depths = []
+
+            def list_system_policy(*args, **kwargs):
+                sync_atomic_depths.append(len(connection.savepoint_ids))
+                return [{"id": 21, "system": "bk_test", "action_id": "view_host", "expired_at": 4102444800}]
+
+            mocked_query_iam.list_system_policy.side_effect = list_system_policy
+            PolicyOperationService().alter("bk_test", subject, [_new_policy("view_host")])
+
+            mocked_query_iam.list_system_policy.assert_called_once()
+
+        # 回退查询后端时, alter的事务已经提交
+        assert sync_atomic_depths == [atomic_depth]
+
+        assert PolicyModel.objects.get(system_id="bk_test", subject_id="admin", action_id="view_host").policy_id == 21
+
+    def test_update_db_policies_in_batch(self, subject, settings):
+        settings.POLICY_BULK_UPDATE_BATCH_SIZE = 2
+        action_ids = ["view_host", "edit_host", "delete_host"]
+        with mock.patch("backend.service.policy.operation.iam") as mocked_iam:
+            mocked_iam.alter_policies.return_value = {
+                "create_policy_ids": {action_id: i + 1 for i, action_id in enumerate(action_ids)}
+            }
+            svc = PolicyOperationService()
+            svc.alter("bk_test", subject, [_new_policy(action_id) for action_id in action_ids])
+
+            update_policies = [
+                Policy(
+                    action_id=action_id,
+                    related_resource_types=[{"system_id": "bk_test", "type": "host", "condition": []}],
+                    policy_id=i + 1,
+                    expired_at=4102444800,
+                )
+                for i, action_id in enumerate(action_ids)
+            ]
+
+            with mock.patch.object(PolicyModel.objects, "bulk_update") as mocked_bulk_update:
+                svc.update_db_policies("bk_test", subject, update_policies)
+                assert [len(call[0][0]) for call in mocked_bulk_update.call_args_list] == [2, 1]
+
+            svc.update_db_policies("bk_test", subject, update_policies)
+
+        for db_policy in PolicyModel.objects.filter(system_id="bk_test", subject_id="admin"):
+            assert db_policy.resources == [{"system_id": "bk_test", "type": "host", "condition": []}]
+
+
+@pytest.mark.django_db
+class TestPolicyOperationServiceChunkedStorage:
+    def _gen_policy(self, host_ids, policy_id: int = 0) -> Policy:
+        return Policy(
+            action_id="view_host",
+            related_resource_types=[
+                {
+                    "system_id": "bk_cmdb",
+                    "type": "host",
+                    "condition": [
+                        {
+                            "id": "condition1",
+                            "attributes": [],
+                            "instances": [
+                                {
+                                    "type": "host",
+                                    "path": [
+                                        [{"system_id": "bk_cmdb", "type": "host", "id": _id, "name": _id}]
+                                        for _id in host_ids
+                                    ],
+                                }
+                            ],
+                        }
+                    ],
+                }
+            ],
+            policy_id=policy_id,
+            expired_at=4102444800,
+        )
+
+    def _db_host_ids(self):
+        db_policy = PolicyModel.objects.get(system_id="bk_cmdb", subject_id="admin", action_id="view_host")
+        return {p[0]["id"] for p in db_policy.resources[0]["condition"][0]["instances"][0]["path"]}
+
+    def test_create_and_update(self, subject, settings):
+        settings.POLICY_RESOURCE_STORAGE = "chunked"
+        settings.POLICY_RESOURCE_CHUNK_SIZE = 10
+        host_ids = [f"host{i}" for i in range(100)]
+
+        with mock.patch("backend.service.policy.operation.iam") as mocked_iam:
+            mocked_iam.alter_policies.return_value = {"create_policy_ids": {"view_host": 1}}
+            svc = PolicyOperationService()
+            svc.alter("bk_cmdb", subject, [self._gen_policy(host_ids)])
+            assert self._db_host_ids() == set(host_ids)
+
+            chunks = {c.key: c.digest for c in PolicyResourceChunk.objects.all()}
+            svc.update_db_policies("bk_cmdb", subject, [self._gen_policy(host_ids + ["host_new"], 1)])
+            assert self._db_host_ids() == set(host_ids + ["host_new"])
+
+            new_chunks = {c.key: c.digest for c in PolicyResourceChunk.objects.all()}
+            assert len([key for key in chunks if chunks[key] != new_chunks[key]]) == 1
+
+            svc.alter("bk_cmdb", subject, delete_policy_ids=[1])
+            assert not PolicyResourceChunk.objects.exists()
+
+    def test_create_with_leftover_policy(self, subject, settings):
+        settings.POLICY_RESOURCE_STORAGE = "chunked"
+        settings.POLICY_RESOURCE_CHUNK_SIZE = 10
+        # 残留的未同步policy_id的记录, 不能被关联上新建策略的分块
+        leftover = PolicyModel(subject_type="user", subject_id="admin", system_id="bk_cmdb", action_id="view_host")
+        leftover.resources = []
+        leftover.save()
+
+        svc = PolicyOperationService()
+        svc._create_db_policies("bk_cmdb", subject, [self._gen_policy([f"host{i}" for i in range(20)])])
+
+        assert not PolicyResourceChunk.objects.filter(policy_pk=leftover.pk).exists()
+        created = PolicyModel.objects.exclude(pk=leftover.pk).get(action_id="view_host")
+        assert PolicyResourceChunk.objects.filter(policy_pk=created.pk).count() == 2
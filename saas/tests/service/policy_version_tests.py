@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from copy import deepcopy
+from unittest import mock
+
+import pytest
+from django.db import transaction
+
+from backend.biz.policy import policy_change_lock
+from backend.common.error_codes import APIException
+from backend.service.models import Subject
+from backend.service.policy.version import PolicyVersionConflict, PolicyVersionService
+
+
+@pytest.fixture()
+def subject():
+    return Subject(type="user", id="admin")
+
+
+@pytest.fixture()
+def optimistic_mode(settings):
+    settings.POLICY_CHANGE_CONCURRENCY_MODE = "optimistic"
+    settings.POLICY_CHANGE_OPTIMISTIC_MAX_RETRY = 2
+
+
+@pytest.mark.django_db
+class TestPolicyVersionService:
+    def test_compare_and_swap(self, subject, optimistic_mode):
+        svc = PolicyVersionService()
+        version = svc.get("bk_test", subject)
+
+        with svc.expect("bk_test", subject, version):
+            svc.compare_and_swap("bk_test", subject)
+            # 同一上下文中可以连续变更
+            svc.compare_and_swap("bk_test", subject)
+
+        assert svc.get("bk_test", subject) == version + 2
+
+    def test_conflict(self, subject, optimistic_mode):
+        svc = PolicyVersionService()
+        version = svc.get("bk_test", subject)
+
+        with svc.expect("bk_test", subject, version):
+            # 其他未经过乐观并发控制的变更
+            with svc.expect("bk_test", subject, version):
+                svc.compare_and_swap("bk_test", subject)
+
+            with pytest.raises(PolicyVersionConflict):
+                svc.compare_and_swap("bk_test", subject)
+
+    def test_disabled(self, subject):
+        svc = PolicyVersionService()
+        svc.compare_and_swap("bk_test", subject)
+        assert svc.get("bk_test", subject) == 0
+
+
+# 乐观模式只在调用方未开启事务时生效, 不能使用默认包裹在事务中的测试
+@pytest.mark.django_db(transaction=True)
+class TestPolicyChangeLockOptimistic:
+    def test_retry_on_conflict(self, subject, optimistic_mode):
+        svc = PolicyVersionService()
+        calls = []
+
+        @policy_change_lock
+        def change(system_id, subject, policies):
+            calls.append(list(policies))
+            policies.append("changed")
+            if len(calls) == 1:
+                # 模拟读取策略后, 其他请求先完成了变更
+                svc.compare_and_swap(system_id, Subject(type="user", id="other"))
+                with svc.expect(system_id, subject, svc.get(system_id, subject)):
+                    svc.compare_and_swap(system_id, subject)
+            svc.compare_and_swap(system_id, subject)
+            return len(calls)
+
+        policies = ["origin"]
+        assert change("bk_test", subject, policies) == 2
+        # 重试时使用的是原始的输入
+        assert calls == [["origin"], ["origin"]]
+
+    def test_copy_once_without_conflict(self, subject, optimistic_mode):
+        @policy_change_lock
+        def change(system_id, subject, policies):
+            policies.append("changed")
+
+        policies = ["origin"]
+        with mock.patch("backend.biz.policy.deepcopy", wraps=deepcopy) as mocked_deepcopy:
+            change("bk_test", subject, policies)
+        # 未发生冲突时与锁模式一致, 直接使用调用方的参数, 只在执行前复制一次
+        assert policies == ["origin", "changed"]
+        assert mocked_deepcopy.call_count == 1
+
+    def test_in_transaction_use_lock(self, subject, optimistic_mode):
+        calls = []
+
+        @policy_change_lock
+        def change(system_id, subject):
+            calls.append(1)
+
+        with mock.patch("backend.biz.policy.cache") as cache, transaction.atomic():
+            change("bk_test", subject)
+
+        # 调用方已开启事务时, 重试无法读到最新的版本号, 回退为分布式锁
+        cache.lock.assert_called_once()
+        assert calls == [1]
+
+    def test_too_many_conflict(self, subject, optimistic_mode):
+        svc = PolicyVersionService()
+
+        @policy_change_lock
+        def change(system_id, subject):
+            with svc.expect(system_id, subject, svc.get(system_id, subject)):
+                svc.compare_and_swap(system_id, subject)
+            svc.compare_and_swap(system_id, subject)
+
+        with pytest.raises(APIException):
+            change("bk_test", subject)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-权限中心(BlueKing-IAM) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest import mock
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+
+from backend.service.system import SystemCatalog
+
+
+def _gen_system(system_id: str):
+    return {"id": system_id, "name": system_id, "name_en": system_id, "description": "", "description_en": ""}
+
+
+@pytest.fixture()
+def mocked_iam():
+    with mock.patch("backend.service.system.iam") as mocked_iam, mock.patch(
+        "backend.service.system.cache", LocMemCache("system_catalog", {})
+    ):
+        mocked_iam.list_system.return_value = [_gen_system("bk_cmdb"), _gen_system("bk_job")]
+        yield mocked_iam
+
+
+class TestSystemCatalog:
+    def test_get_cached(self, mocked_iam):
+        catalog = SystemCatalog()
+        assert catalog.get().get("bk_cmdb").id == "bk_cmdb"
+        assert [s.id for s in catalog.get().list_by_ids(["bk_job", "bk_not_exists"])] == ["bk_job"]
+        assert mocked_iam.list_system.call_count == 1
+
+    def test_version_changed(self, mocked_iam):
+        catalog, other = SystemCatalog(), SystemCatalog()
+        catalog.get()
+        other.get()
+
+        # 其他进程发现系统列表变更后递增版本号
+        mocked_iam.list_system.return_value = [_gen_system("bk_cmdb")]
+        other.refresh()
+        assert other.get().get("bk_job") is None
+
+        # 版本号检查间隔内仍然使用缓存
+        assert catalog.get().get("bk_job") is not None
+
+        catalog._checked_at = 0
+        assert catalog.get().get("bk_job") is None
+
+    def test_version_unchanged(self, mocked_iam):
+        catalog, other = SystemCatalog(), SystemCatalog()
+        catalog.get()
+
+        # 系统列表没有变化, 不递增版本号
+        other.refresh()
+        catalog._checked_at = 0
+        catalog.get()
+        assert mocked_iam.list_system.call_count == 2